@@ -5,12 +5,23 @@ import base64
 from datetime import datetime, date, time, timedelta
 import plotly.graph_objects as go
 from predict import load_model_artifacts, predict_wait_time
+from src.data_preprocessing.forecast_provider import ForecastProvider
 import warnings
 import os
 
 
 warnings.filterwarnings('ignore')
 
+
+@st.cache_resource
+def get_forecast_provider():
+    # Una instancia por proceso: su cache en memoria sobrevive a los reruns de la página
+    return ForecastProvider()
+
+
+def clamp(valor, minimo, maximo):
+    return int(round(min(max(valor, minimo), maximo)))
+
 def get_base64_image(image_path):
     
     with open(image_path, "rb") as img_file:
@@ -392,7 +403,20 @@ def main():
             st.info(f" **Día:** {dia_semana_es.get(dia_nombre, dia_nombre)} - {'Fin de semana' if es_fin_semana else 'Día laborable'}")
 
   
-    with st.expander("🌤️ Configurar condiciones meteorológicas (opcional)", expanded=False):
+    # Previsión de open-meteo para la fecha y hora elegidas (None si está fuera del horizonte)
+    try:
+        prevision = get_forecast_provider().for_hour(fecha_seleccionada, hora_seleccionada.hour)
+    except Exception:
+        prevision = None
+    # Claves por fecha/hora: al cambiarlas, los controles vuelven a tomar la previsión
+    sufijo = f"_{fecha_seleccionada.isoformat()}_{hora_seleccionada.hour:02d}" if prevision else ""
+    titulo = ("🌤️ Condiciones meteorológicas (previsión autocompletada)" if prevision
+              else "🌤️ Configurar condiciones meteorológicas (opcional)")
+
+    with st.expander(titulo, expanded=False):
+        if prevision:
+            st.caption(f"Previsión de Open-Meteo para el {fecha_seleccionada.strftime('%d/%m/%Y')} "
+                       f"a las {hora_seleccionada.hour:02d}:00. Puedes ajustar los valores.")
         col1, col2 = st.columns(2)
         
         with col1:
@@ -400,9 +424,9 @@ def main():
                 "Temperatura (°C)", 
                 min_value=-5, 
                 max_value=45, 
-                value=22,
+                value=clamp(prevision["temperatura"], -5, 45) if prevision else 22,
                 help="Temperatura en grados Celsius",
-                key="temp_slider"
+                key="temp_slider" + sufijo
             )
             
         with col2:
@@ -410,22 +434,22 @@ def main():
                 "Humedad (%)", 
                 min_value=0, 
                 max_value=100, 
-                value=60,
-                key="humidity_slider"
+                value=clamp(prevision["humedad"], 0, 100) if prevision else 60,
+                key="humidity_slider" + sufijo
             )
 
         sensacion_termica = st.slider(
             "Sensación térmica (°C)", 
             min_value=-10, 
             max_value=50, 
-            value=22,
-            key="feels_like_slider"
+            value=clamp(prevision["sensacion_termica"], -10, 50) if prevision else 22,
+            key="feels_like_slider" + sufijo
         )
 
         codigo_clima = st.selectbox(
             "Condición meteorológica",
             options=[1, 2, 3, 4, 5],
-            index=2,
+            index=prevision["codigo_clima"] - 1 if prevision else 2,
             format_func=lambda x: {
                 1: "☀️ Soleado - Excelente",
                 2: "⛅ Parcialmente nublado - Bueno",
@@ -433,7 +457,7 @@ def main():
                 4: "🌧️ Lluvia ligera - Malo",
                 5: "⛈️ Lluvia fuerte/Tormenta - Muy malo"
             }[x],
-            key="weather_select"
+            key="weather_select" + sufijo
         )
 
  
@@ -0,0 +1,52 @@
+# ====================================================
+# BENCHMARK: DESCARGA SECUENCIAL vs ASÍNCRONA MULTIPARQUE
+# Contra el stub local (con latencia simulada) compara la descarga
+# secuencial con requests.get (como el download_queue_times original)
+# frente a async_downloader, para un número creciente de parques.
+# ====================================================
+
+import os
+import sys
+import time
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from ingestion import async_downloader
+from benchmarks.stub_server import StubServer
+
+PARK_COUNTS = [1, 5, 10, 25, 50, 100]
+LATENCY_S = 0.05
+
+
+def download_sequential(park_ids, url_template):
+    rows = []
+    for park_id in park_ids:
+        data = requests.get(url_template.format(park_id=park_id)).json()
+        rows.extend(async_downloader.normalize_park(park_id, data))
+    return rows
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    with StubServer(latency_s=LATENCY_S) as stub:
+        print(f"Latencia simulada por petición: {LATENCY_S * 1000:.0f} ms, "
+              f"límite por host: {async_downloader.LIMIT_PER_HOST}")
+        print(f"{'parques':>8} {'secuencial (s)':>15} {'parques/s':>10} {'async (s)':>10} {'parques/s':>10} {'filas':>7}")
+        for n in PARK_COUNTS:
+            park_ids = list(range(1, n + 1))
+            t_seq, rows = timed(lambda: download_sequential(park_ids, stub.url_template))
+            t_async, (batch, errors) = timed(
+                lambda: async_downloader.download_parks(park_ids, stub.url_template))
+            assert not errors and len(batch) == len(rows)
+            print(f"{n:>8} {t_seq:>15.3f} {n / t_seq:>10.1f} {t_async:>10.3f} {n / t_async:>10.1f} {len(batch):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# ====================================================
+# BENCHMARK: TICKS DE INGESTA CON Y SIN CALENDARIO DEL PARQUE
+# Con una respuesta de ejemplo del calendario (fixtures/, escrita a mano
+# con la forma esperada de la API, no grabada) simula un mes de
+# ticks cada 15 minutos y cuenta cuántas ejecuciones del pipeline se
+# evitan al suprimir los días cerrados y espaciar las horas sin abrir.
+# ====================================================
+
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from ingestion.park_calendar import ParkCalendar, fixture_fetcher, parse_calendar
+
+FIXTURE = os.path.join(BASE_DIR, "benchmarks", "fixtures", "parquesreunidos_calendar_2025-11_synthetic.json")
+INTERVAL = timedelta(minutes=15)
+
+
+def main():
+    fetches = []
+    fetch_fixture = fixture_fetcher(FIXTURE)
+
+    def fetcher(start, end):
+        fetches.append(start)
+        return fetch_fixture(start, end)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "calendario.json")
+        hoy = {"valor": date(2025, 11, 1)}
+        calendar = ParkCalendar(path, fetcher=fetcher, today=lambda: hoy["valor"], log=lambda msg: None)
+
+        # Comprobaciones sobre la respuesta de ejemplo
+        calendar.refresh_if_stale()
+        assert calendar.is_open(datetime(2025, 11, 8, 12, 0)) is True
+        assert calendar.is_open(datetime(2025, 11, 5, 12, 0)) is False
+        assert calendar.should_tick(datetime(2025, 11, 5, 12, 0)) is False
+        assert calendar.should_tick(datetime(2025, 11, 8, 21, 0)) is True
+        assert calendar.should_tick(datetime(2025, 11, 8, 21, 15)) is False
+        assert calendar.is_open(datetime(2026, 1, 1, 12, 0)) is None
+        # Persistido: otra instancia lo lee sin descargar
+        assert ParkCalendar(path, fetcher=None, today=lambda: hoy["valor"]).dias == calendar.dias
+        # Un formato de día sin campo de estado conocido no para la ingesta
+        desconocido = ParkCalendar(os.path.join(tmp, "otro.json"), fetcher=None, log=lambda msg: None)
+        desconocido.dias = parse_calendar([{"date": "2026-01-02", "openingTime": "10:00", "closingTime": "20:00"}])
+        assert desconocido.dias["2026-01-02"]["abierto"] is None
+        assert desconocido.should_tick(datetime(2026, 1, 2, 3, 0)) is True
+
+        total = run = 0
+        when = datetime(2025, 11, 1)
+        while when < datetime(2025, 12, 1):
+            hoy["valor"] = when.date()
+            calendar.refresh_if_stale()
+            total += 1
+            run += calendar.should_tick(when, tick_every=INTERVAL)
+            when += INTERVAL
+
+    print(f"Ticks en noviembre 2025 cada 15 min: {total}")
+    print(f"Con calendario: {run} ejecuciones ({total - run} evitadas, {1 - run / total:.0%})")
+    print(f"Descargas del calendario: {len(fetches)} (una por día como máximo)")
+
+
+if __name__ == "__main__":
+    main()
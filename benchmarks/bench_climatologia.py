@@ -0,0 +1,98 @@
+# ====================================================
+# BENCHMARK: CLIMATOLOGÍA DE UN MES DE HISTÓRICO
+# Genera un mes de filas (25 atracciones cada 15 min en horario de
+# apertura) y mide climatologia_datos.enrich_with_weather contra
+# benchmarks/replay_server.py con latencia por petición:
+#   - antes: una petición HTTP bloqueante por fila (se mide sobre una
+#     muestra y se extrapola);
+#   - ahora, con la cache en disco vacía (días en paralelo, con límite de ritmo);
+#   - ahora, con la cache ya llena.
+#
+#   python benchmarks/bench_climatologia.py --days 30 --latency 0.3
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import pandas as pd
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.replay_server import ReplayServer
+from src.processing import climatologia_datos
+
+TICKS_PER_DAY = 44  # 11:00 → 22:00 cada 15 min
+N_ATRACCIONES = 25
+
+
+def make_month(days):
+    instantes = [pd.Timestamp("2025-10-01 11:00") + pd.Timedelta(days=d, minutes=15 * i)
+                 for d in range(days) for i in range(TICKS_PER_DAY)]
+    return pd.DataFrame([{"fecha": t.strftime("%Y-%m-%d"), "hora": t.strftime("%H:%M"),
+                          "atraccion": f"Atracción {a}", "tiempo_espera": 10}
+                         for t in instantes for a in range(N_ATRACCIONES)])
+
+
+def old_get_weather_for_time(url, date_str, hour_str):
+    """get_weather_for_time antes del cambio: una petición por fila, sin cache."""
+    hour = int(hour_str.split(":")[0])
+    data = requests.get(
+        f"{url}?latitude={climatologia_datos.LAT}&longitude={climatologia_datos.LON}"
+        f"&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,weathercode"
+        f"&start_date={date_str}&end_date={date_str}&timezone=Europe/Madrid"
+    ).json()
+    i = [t[11:13] for t in data["hourly"]["time"]].index(f"{hour:02d}")
+    return data["hourly"]["temperature_2m"][i]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la climatología de un mes")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.3, help="latencia por petición (s)")
+    parser.add_argument("--sample", type=int, default=20, help="filas para medir el método antiguo")
+    args = parser.parse_args()
+
+    df = make_month(args.days)
+    work_dir = tempfile.mkdtemp(prefix="bench_clima_")
+    cwd = os.getcwd()
+    try:
+        with ReplayServer(latency_s=args.latency) as server:
+            climatologia_datos.OPEN_METEO_URL = server.forecast_url
+            os.chdir(work_dir)
+
+            muestra = df.head(args.sample)
+            t_old, _ = timed(lambda: [old_get_weather_for_time(server.forecast_url, f, h)
+                                      for f, h in zip(muestra["fecha"], muestra["hora"])])
+            antes = server.httpd.requests
+            t_cold, out = timed(climatologia_datos.enrich_with_weather, df)
+            peticiones_cold = server.httpd.requests - antes
+            antes = server.httpd.requests
+            t_warm, _ = timed(climatologia_datos.enrich_with_weather, df)
+            peticiones_warm = server.httpd.requests - antes
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n📅 {args.days} días, {len(df)} filas, {df[['fecha', 'hora']].drop_duplicates().shape[0]} "
+          f"(fecha, hora) distintas, latencia {args.latency:g}s por petición")
+    print(f"{'':<34}{'peticiones':>12}{'tiempo (s)':>14}")
+    print(f"{'antes: una petición por fila':<34}{len(df):>12}{t_old / len(muestra) * len(df):>14.0f}  "
+          f"(extrapolado de {len(muestra)} filas)")
+    print(f"{'ahora, cache en disco vacía':<34}{peticiones_cold:>12}{t_cold:>14.2f}")
+    print(f"{'ahora, cache en disco llena':<34}{peticiones_warm:>12}{t_warm:>14.2f}")
+    print(f"✅ Filas con columnas de clima: {len(out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# ====================================================
+# BENCHMARK: MEMORIA CON EL ESQUEMA COMPACTO
+# Compara la memoria (incluidos los textos) de los DataFrames tal como
+# los deja pandas (object, int64, float64, bool) con el esquema de
+# compact_schema (category, int8, int16, float32):
+#   - datos actuales: data/clean/tiempos_final.csv;
+#   - un año sintético: 25 atracciones cada 15 min en horario de apertura;
+#   - ambos con los indicadores y features de train_model.py añadidos,
+#     y el tamaño del pickle equivalente a models/df_processed.pkl.
+#
+#   python benchmarks/bench_compact_schema.py
+# ====================================================
+
+import os
+import sys
+import argparse
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import compact_schema
+from src.data_preprocessing.slot_keys import hora_minutes
+
+TIEMPOS_FINAL = os.path.join(BASE_DIR, "data", "clean", "tiempos_final.csv")
+TICKS_PER_DAY = 44  # 11:00 → 22:00 cada 15 min
+N_ATRACCIONES = 25
+ZONAS = ["Cartoon Village", "DC Super Heroes World", "Movie World Studios", "Old West Territory"]
+
+
+def make_year(days):
+    """Un año (``days`` días) de filas con las columnas del histórico."""
+    rng = np.random.default_rng(0)
+    instantes = (pd.Timestamp("2025-01-01 11:00")
+                 + pd.to_timedelta(np.repeat(np.arange(days), TICKS_PER_DAY), unit="D")
+                 + pd.to_timedelta(np.tile(np.arange(TICKS_PER_DAY) * 15, days), unit="min"))
+    t = pd.DatetimeIndex(np.repeat(instantes, N_ATRACCIONES))
+    a = np.tile(np.arange(N_ATRACCIONES), len(instantes))
+    n = len(t)
+    return pd.DataFrame({
+        "zona": np.array(ZONAS, dtype=object)[a % len(ZONAS)],
+        "atraccion": np.array([f"Atracción {i}" for i in range(N_ATRACCIONES)], dtype=object)[a],
+        "tiempo_espera": rng.integers(0, 90, n),
+        "abierta": rng.random(n) > 0.1,
+        "fecha": t.strftime("%Y-%m-%d"),
+        "hora": t.strftime("%H:%M"),
+        "dia_semana": t.day_name(),
+        "mes": t.month,
+        "fin_de_semana": t.dayofweek >= 5,
+        "temperatura": rng.uniform(0, 38, n).round(1),
+        "humedad": rng.uniform(20, 95, n).round(),
+        "sensacion_termica": rng.uniform(-2, 40, n).round(1),
+        "codigo_clima": rng.choice([0, 1, 2, 3, 61], n).astype(float),
+        "temporada": np.where(np.isin(t.month, [7, 8]), "alta", np.where(np.isin(t.month, [12, 1, 2]), "media", "baja")),
+    })
+
+
+def add_train_features(df):
+    """Indicadores y features de train_model.py (como los crea: int64 y float64)."""
+    df = df.copy()
+    fecha = pd.to_datetime(df["fecha"])
+    df["hora"] = hora_minutes(df["hora"]) / 60
+    df["dia_mes"] = fecha.dt.day
+    df["dia_semana_num"] = fecha.dt.weekday
+    df["hora_int"] = df["hora"].astype(int)
+    for i, dia in enumerate(["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]):
+        df[f"es_{dia}"] = (df["dia_semana_num"] == i).astype(int)
+    df["es_fin_de_semana"] = df["dia_semana_num"].isin([5, 6]).astype(int)
+    for mes in range(1, 13):
+        df[f"es_mes_{mes}"] = (df["mes"] == mes).astype(int)
+    for col, periodo in [("hora", 24), ("mes", 12), ("dia_semana_num", 7), ("dia_mes", 31)]:
+        df[f"{col}_sin"] = np.sin(2 * np.pi * df[col] / periodo)
+        df[f"{col}_cos"] = np.cos(2 * np.pi * df[col] / periodo)
+    df["hora_mes"] = df["hora"] * df["mes"]
+    df["hora_dia_semana"] = df["hora"] * df["dia_semana_num"]
+    for stat in ["count", "mean", "median", "std"]:
+        df[f"{stat}_hora"] = df.groupby(["atraccion", "hora_int"])["tiempo_espera"].transform(stat)
+    return df
+
+
+def pickle_mb(df):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "df.pkl")
+        joblib.dump(df, path)
+        return os.path.getsize(path) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria con el esquema compacto")
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    datasets = {"datos actuales": pd.read_csv(TIEMPOS_FINAL), f"año sintético ({args.days} días)": make_year(args.days)}
+    print(f"{'':<44}{'filas':>10}{'columnas':>10}{'antes (MB)':>12}{'después (MB)':>14}{'×':>6}")
+    for nombre, df in datasets.items():
+        featured = add_train_features(df)
+        for etiqueta, frame in [(nombre, df), (f"{nombre} + features", featured)]:
+            antes, despues = compact_schema.memory_mb(frame), compact_schema.memory_mb(compact_schema.compact(frame))
+            print(f"{etiqueta:<44}{len(frame):>10}{frame.shape[1]:>10}{antes:>12.2f}{despues:>14.2f}{antes / despues:>6.1f}")
+        antes, despues = pickle_mb(featured), pickle_mb(compact_schema.compact(featured))
+        print(f"{'   pickle (como df_processed.pkl)':<44}{'':>20}{antes:>12.2f}{despues:>14.2f}{antes / despues:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ====================================================
+# BENCHMARK: ALMACÉN DE SNAPSHOTS POR DIFERENCIAS
+# Codifica el histórico de data/raw/queue_times, comprueba que la
+# decodificación reproduce cada snapshot y mide la compresión (frente a
+# los snapshots crudos y a un Parquet plano), el rendimiento de decodificación
+# y el coste de añadir un tick con el almacén ya lleno y tras compactarlo.
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import raw_snapshots, raw_compaction, delta_store
+
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw", "queue_times")
+COLS = ["timestamp", "zona", "atraccion", "tiempo_espera", "abierta", "ultima_actualizacion"]
+# Réplicas desplazadas del histórico real para ver la compresión a mayor escala
+SCALE_COPIES = 30
+
+
+def normalized(df):
+    df = df[COLS].copy()
+    df["tiempo_espera"] = pd.to_numeric(df["tiempo_espera"]).astype("Int64")
+    df["abierta"] = df["abierta"].astype(str).str.lower().eq("true")
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).astype("datetime64[ns]")
+    df["ultima_actualizacion"] = pd.to_datetime(df["ultima_actualizacion"], utc=True).astype("datetime64[ns, UTC]")
+    return df.sort_values(["timestamp", "zona", "atraccion"], ignore_index=True)
+
+
+def main():
+    # Snapshots sin compactar y días compactados; el tamaño crudo cuenta ambos tal como están en disco
+    frames = raw_snapshots.iter_snapshot_frames(RAW_DIR)
+    compact_dir = raw_compaction.compact_dir_for(RAW_DIR)
+    raw_bytes = sum(os.path.getsize(f) for f in raw_compaction.uncompacted_files(RAW_DIR)) \
+        + sum(os.path.getsize(os.path.join(compact_dir, f"{d.isoformat()}.parquet"))
+              for d in raw_compaction.compacted_days(compact_dir))
+    snapshots = pd.concat([raw_snapshots.add_timestamp(df, name) for name, df in frames], ignore_index=True)
+    snapshots = snapshots.drop_duplicates(subset=["timestamp", "atraccion"], keep="last")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_delta_")
+    try:
+        root = os.path.join(work_dir, "delta")
+        # En dos lotes, como en la ingesta incremental
+        mitad = snapshots["timestamp"].sort_values().iloc[len(snapshots) // 2]
+        start = time.perf_counter()
+        delta_store.append_snapshots(snapshots[snapshots["timestamp"] <= mitad], root)
+        delta_store.append_snapshots(snapshots, root)
+        t_encode = time.perf_counter() - start
+
+        plain = os.path.join(work_dir, "plano.parquet")
+        snapshots[COLS].to_parquet(plain, index=False)
+        delta_bytes = delta_store.store_size(root)
+
+        rides, ticks, deltas = delta_store.read_store(root)
+        print(f"Snapshots: {len(frames)} ficheros, {len(ticks)} ticks, {len(rides)} atracciones, {len(snapshots)} filas")
+        print(f"Deltas guardados: {len(deltas)} ({len(deltas) / len(snapshots):.1%} de las filas)")
+        print(f"Crudos:         {raw_bytes / 1024:8.1f} KB")
+        print(f"Parquet plano:  {os.path.getsize(plain) / 1024:8.1f} KB")
+        print(f"Delta:          {delta_bytes / 1024:8.1f} KB  (×{raw_bytes / delta_bytes:.1f} frente a crudos, "
+              f"×{os.path.getsize(plain) / delta_bytes:.1f} frente a Parquet plano)")
+        print(f"Codificación:   {t_encode:.3f}s")
+
+        # Ida y vuelta completa
+        store = delta_store.read_store(root)
+        start = time.perf_counter()
+        decoded = delta_store.decode(root, store=store)
+        t_decode = time.perf_counter() - start
+        pd.testing.assert_frame_equal(normalized(decoded), normalized(snapshots))
+        print(f"Decodificación completa: {t_decode:.3f}s ({len(decoded) / t_decode:,.0f} filas/s) — idéntica al original")
+
+        # Un día completo y snapshots puntuales
+        dia = ticks["timestamp"].dt.normalize().value_counts().idxmax()
+        start = time.perf_counter()
+        decoded_day = delta_store.decode(root, start=dia, end=dia + pd.Timedelta(days=1), store=store)
+        t_day = time.perf_counter() - start
+        print(f"Día {dia.date()}: {len(decoded_day)} filas en {t_day * 1000:.1f} ms")
+
+        sample = ticks["timestamp"].sample(20, random_state=0)
+        start = time.perf_counter()
+        for ts in sample:
+            one = delta_store.decode(root, start=ts, store=store)
+            expected = snapshots[snapshots["timestamp"] == ts]
+            assert len(one) == len(expected)
+        t_point = (time.perf_counter() - start) / len(sample)
+        print(f"Snapshot puntual: {t_point * 1000:.1f} ms de media")
+
+        # Mismo patrón de cambios repetido SCALE_COPIES veces
+        span = snapshots["timestamp"].max() - snapshots["timestamp"].min() + pd.Timedelta(days=1)
+        big = pd.concat([snapshots.assign(timestamp=snapshots["timestamp"] + k * span)
+                         for k in range(SCALE_COPIES)], ignore_index=True)
+        big_root = os.path.join(work_dir, "delta_big")
+        delta_store.append_snapshots(big, big_root)
+        big[COLS].to_parquet(plain, index=False)
+        big_bytes = delta_store.store_size(big_root)
+        store = delta_store.read_store(big_root)
+        start = time.perf_counter()
+        decoded = delta_store.decode(big_root, store=store)
+        t_decode = time.perf_counter() - start
+        print(f"\n×{SCALE_COPIES} ({len(big)} filas): crudos equivalentes {raw_bytes * SCALE_COPIES / 1024:.0f} KB, "
+              f"Parquet plano {os.path.getsize(plain) / 1024:.1f} KB, delta {big_bytes / 1024:.1f} KB "
+              f"(×{raw_bytes * SCALE_COPIES / big_bytes:.0f} frente a crudos, "
+              f"×{os.path.getsize(plain) / big_bytes:.1f} frente a Parquet plano)")
+        print(f"Decodificación completa: {len(decoded) / t_decode:,.0f} filas/s")
+
+        # Un tick más con el almacén lleno: el estado sale de estado.npz, sin releer los parts
+        ultimo = big[big["timestamp"] == big["timestamp"].max()]
+        siguiente = ultimo.assign(timestamp=ultimo["timestamp"] + pd.Timedelta(minutes=15))
+        start = time.perf_counter()
+        delta_store.append_snapshots(siguiente, big_root)
+        t_tick = time.perf_counter() - start
+        print(f"Tick incremental: {t_tick * 1000:.1f} ms")
+
+        # Días cerrados fundidos en un part por mes
+        n_parts = len(os.listdir(os.path.join(big_root, "deltas")))
+        meses = delta_store.compact_parts(big_root, hoy=siguiente["timestamp"].max() + pd.Timedelta(days=1))
+        decoded = delta_store.decode(big_root)
+        pd.testing.assert_frame_equal(normalized(decoded), normalized(pd.concat([big, siguiente])))
+        print(f"Compactación: {n_parts} → {len(os.listdir(os.path.join(big_root, 'deltas')))} parts de deltas "
+              f"({len(meses)} meses), delta {delta_store.store_size(big_root) / 1024:.1f} KB — idéntica al original")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ====================================================
+# BENCHMARK: INGESTA ANTE FALLOS DEL UPSTREAM
+# Contra el stub local con fallos inyectados (respuestas lentas, 5xx y
+# conexiones reseteadas) mide cuánto tarda un tick de descarga, cuántos
+# parques se recuperan con los reintentos y si el circuito se abre.
+# Después comprueba que el planificador omite los ticks que se solapan.
+# ====================================================
+
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from ingestion import async_downloader, resilience
+from benchmarks.stub_server import StubServer
+
+N_PARKS = 10
+# Plazos cortos para que el benchmark dure segundos y no minutos
+resilience.READ_TIMEOUT_S = 1
+resilience.BACKOFF_BASE_S = 0.05
+
+SCENARIOS = [
+    ("sin fallos", dict()),
+    ("lento 30%", dict(fault="slow", fault_rate=0.3, slow_s=5)),
+    ("5xx 30%", dict(fault="5xx", fault_rate=0.3)),
+    ("reset 30%", dict(fault="reset", fault_rate=0.3)),
+    ("5xx 100%", dict(fault="5xx", fault_rate=1.0)),
+]
+
+
+def run_download_scenarios():
+    print(f"{'escenario':>12} {'tiempo (s)':>11} {'ok':>4} {'error':>6} {'peticiones':>11} {'circuito':>12}")
+    for name, kwargs in SCENARIOS:
+        async_downloader.breaker = resilience.CircuitBreaker()
+        with StubServer(**kwargs) as stub:
+            start = time.perf_counter()
+            batch, errors = async_downloader.download_parks(
+                list(range(1, N_PARKS + 1)), stub.url_template, deadline_s=10)
+            elapsed = time.perf_counter() - start
+            ok = N_PARKS - len(errors)
+            print(f"{name:>12} {elapsed:>11.2f} {ok:>4} {len(errors):>6} {stub.requests:>11} "
+                  f"{async_downloader.breaker.state:>12}")
+
+
+def run_scheduler_check():
+    # Cada tick tarda 1.2 s con un intervalo de 0.5 s: deben omitirse ticks sin solaparse
+    running = []
+    overlaps = []
+
+    def slow_tick():
+        if running:
+            overlaps.append(1)
+        running.append(1)
+        time.sleep(1.2)
+        running.pop()
+
+    scheduler = resilience.TickScheduler(0.5, slow_tick, log=lambda msg: None)
+    scheduler.run_forever(poll_s=0.05, max_slots=10)
+    scheduler.join()
+    print(f"\nPlanificador (intervalo 0.5s, tick 1.2s, 10 horas de tick): {scheduler.stats}, "
+          f"solapes={len(overlaps)}")
+
+
+def main():
+    run_download_scenarios()
+    run_scheduler_check()
+
+
+if __name__ == "__main__":
+    main()
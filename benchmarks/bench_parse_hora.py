@@ -0,0 +1,77 @@
+# ====================================================
+# BENCHMARK: parse_hora FILA A FILA vs hora_decimal VECTORIZADO
+# 1) Equivalencia: reúne todos los valores distintos de la columna hora
+#    de los CSV de data/ (tal como los lee pd.read_csv y como texto) y
+#    del histórico particionado, más una lista de casos límite, y
+#    comprueba que hora_decimal (y parse_hora para un valor) dan
+#    exactamente lo mismo que el parser antiguo fila a fila.
+# 2) Rendimiento: --rows filas con valores reales (pocos distintos) y
+#    con "HH:MM:SS" de todo el día (86.400 distintos).
+#
+#   python benchmarks/bench_parse_hora.py --rows 2000000
+# ====================================================
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.slot_keys import hora_decimal, parse_hora
+# El parser de referencia y los casos límite son los de los tests
+from tests.hora_referencia import DATA_DIR, CASOS_LIMITE, parse_hora_fila, valores_de_datos, mismos
+
+
+def comprobar(nombre, valores):
+    esperado = valores.apply(parse_hora_fila) if len(valores) else pd.Series(dtype="float64")
+    ok = mismos(esperado, hora_decimal(valores))
+    ok &= mismos(esperado, [parse_hora(v) for v in valores])
+    if not ok.all():
+        malos = valores[~ok].head(10).tolist()
+        raise AssertionError(f"❌ {nombre}: resultados distintos para {malos}")
+    return len(valores)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parseo vectorizado de la hora")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    columnas = valores_de_datos()
+    distintos = set()
+    for nombre, valores in columnas.items():
+        comprobar(nombre, valores)
+        distintos.update(valores.astype(str))
+    comprobar("casos límite", pd.Series(CASOS_LIMITE, dtype="object"))
+    print(f"✅ Resultados idénticos: {len(columnas)} columnas hora de {DATA_DIR} "
+          f"({len(distintos)} valores distintos) y {len(CASOS_LIMITE)} casos límite")
+
+    rng = np.random.default_rng(0)
+    reales = pd.concat(columnas.values()).astype(str).unique() if columnas else np.array(["11:30"])
+    segundos = rng.integers(0, 86_400, args.rows)
+    escenarios = {
+        "valores reales": pd.Series(rng.choice(reales, args.rows), dtype="object"),
+        "HH:MM:SS todo el día": pd.Series([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in segundos],
+                                          dtype="object"),
+    }
+    print(f"\n{'':<24}{'filas':>11}{'distintos':>11}{'apply (s)':>11}{'vector (s)':>12}{'filas/s':>14}{'×':>7}")
+    for nombre, serie in escenarios.items():
+        t_apply, ref = timed(serie.apply, parse_hora_fila)
+        t_vec, res = timed(hora_decimal, serie)
+        assert mismos(ref, res).all()
+        print(f"{nombre:<24}{len(serie):>11,}{serie.nunique():>11,}{t_apply:>11.2f}{t_vec:>12.3f}"
+              f"{len(serie) / t_vec:>14,.0f}{t_apply / t_vec:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
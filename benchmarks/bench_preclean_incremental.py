@@ -0,0 +1,78 @@
+# ====================================================
+# BENCHMARK: PRECLEAN COMPLETO vs INCREMENTAL (MANIFIESTO)
+# Genera directorios crudos sintéticos de tamaño creciente y mide
+# cuánto tarda un tick (un snapshot nuevo) en cada modo. El incremental
+# incluye el commit del tick (añadir sus filas al preclean y promover el
+# manifiesto) y debe mantenerse plano al crecer el directorio.
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from scripts.preclean_queue_times import preclean, commit_manifest
+from src.data_preprocessing.key_index import KeyIndex
+
+TEMPLATE = os.path.join(BASE_DIR, "data", "raw", "queue_times", "queue_times_2025-11-22_14-49.csv")
+SIZES = [100, 500, 1000, 2000]
+
+
+def write_snapshot(raw_dir, template, ts):
+    df = template.copy()
+    df["fecha"] = ts.strftime("%Y-%m-%d")
+    df["hora"] = ts.strftime("%H:%M")
+    df.to_csv(os.path.join(raw_dir, f"queue_times_{ts.strftime('%Y-%m-%d_%H-%M')}.csv"),
+              index=False, encoding="utf-8-sig")
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    template = pd.read_csv(TEMPLATE)
+    t0 = datetime(2025, 1, 1, 10, 0)
+
+    print(f"{'snapshots':>10} {'completo (s)':>14} {'incremental (s)':>16}")
+    for n in SIZES:
+        work_dir = tempfile.mkdtemp(prefix="bench_preclean_")
+        try:
+            raw_dir = os.path.join(work_dir, "raw")
+            os.makedirs(raw_dir)
+            for i in range(n):
+                write_snapshot(raw_dir, template, t0 + timedelta(minutes=15 * i))
+
+            kwargs = dict(raw_dir=raw_dir,
+                          preclean_file=os.path.join(work_dir, "preclean.csv"),
+                          manifest_file=os.path.join(work_dir, "manifest.json"),
+                          key_index_file=os.path.join(work_dir, "claves.sqlite"))
+            # Claves del histórico, como las deja la ingesta
+            KeyIndex(kwargs["key_index_file"]).add(preclean(full_rebuild=True, **kwargs))
+            # El histórico se daría por guardado: el manifiesto pasa a definitivo
+            commit_manifest(kwargs["manifest_file"], kwargs["preclean_file"])
+
+            # Tick nuevo: un snapshot más
+            write_snapshot(raw_dir, template, t0 + timedelta(minutes=15 * n))
+            t_full = timed(lambda: preclean(full_rebuild=True, **kwargs))
+            # Sin esto el tick incremental vería dos snapshots pendientes en lugar de uno
+            commit_manifest(kwargs["manifest_file"], kwargs["preclean_file"])
+
+            write_snapshot(raw_dir, template, t0 + timedelta(minutes=15 * (n + 1)))
+            t_incr = timed(lambda: (preclean(**kwargs), commit_manifest(kwargs["manifest_file"], kwargs["preclean_file"])))
+
+            print(f"{n:>10} {t_full:>14.3f} {t_incr:>16.3f}")
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
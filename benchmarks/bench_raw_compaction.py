@@ -0,0 +1,74 @@
+# ====================================================
+# BENCHMARK: LECTURA DEL HISTÓRICO CRUDO ANTES/DESPUÉS DE COMPACTAR
+# Genera N días de snapshots sintéticos (un CSV cada 15 min en horario
+# de apertura) y mide cuánto tarda un escaneo completo del histórico
+# con los CSV sueltos y tras compactar los días cerrados en Parquet.
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime, timedelta, date
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import raw_compaction
+
+TEMPLATE = os.path.join(BASE_DIR, "data", "raw", "queue_times", "queue_times_2025-11-22_14-49.csv")
+DAYS = [7, 30, 90]
+TICKS_PER_DAY = 44  # 11:00 → 22:00 cada 15 min
+
+
+def write_days(raw_dir, template, n_days):
+    t0 = datetime(2025, 1, 1, 11, 0)
+    for d in range(n_days):
+        for i in range(TICKS_PER_DAY):
+            ts = t0 + timedelta(days=d, minutes=15 * i)
+            df = template.copy()
+            df["fecha"] = ts.strftime("%Y-%m-%d")
+            df["hora"] = ts.strftime("%H:%M")
+            df.to_csv(os.path.join(raw_dir, f"queue_times_{ts.strftime('%Y-%m-%d_%H-%M')}.csv"),
+                      index=False, encoding="utf-8-sig")
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    template = pd.read_csv(TEMPLATE)
+    print(f"{'días':>5} {'CSV':>6} {'lectura CSV (s)':>16} {'MB CSV':>7} "
+          f"{'Parquet':>8} {'lectura Parquet (s)':>20} {'MB Parquet':>11}")
+    for n_days in DAYS:
+        work_dir = tempfile.mkdtemp(prefix="bench_compaction_")
+        try:
+            raw_dir = os.path.join(work_dir, "queue_times")
+            os.makedirs(raw_dir)
+            write_days(raw_dir, template, n_days)
+            n_csv = len(raw_compaction.loose_files(raw_dir))
+            csv_mb = dir_size(raw_dir) / 1e6
+
+            t_csv, before = timed(lambda: raw_compaction.read_raw(raw_dir))
+            raw_compaction.compact_closed_days(raw_dir, today=date(2030, 1, 1), manifest_file=None)
+            compact_dir = raw_compaction.compact_dir_for(raw_dir)
+            t_parquet, after = timed(lambda: raw_compaction.read_raw(raw_dir))
+            assert len(before) == len(after)
+
+            print(f"{n_days:>5} {n_csv:>6} {t_csv:>16.3f} {csv_mb:>7.2f} "
+                  f"{len(os.listdir(compact_dir)):>8} {t_parquet:>20.3f} {dir_size(compact_dir) / 1e6:>11.2f}")
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
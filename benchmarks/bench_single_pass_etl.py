@@ -0,0 +1,165 @@
+# ====================================================
+# BENCHMARK: CADENA DE 5 SCRIPTS vs ETL EN UNA SOLA PASADA
+# Prepara tres directorios de trabajo idénticos con los snapshots crudos
+# del repositorio (replicados --copies veces desplazando las fechas), el
+# histórico vacío y la cache del clima precargada con valores sintéticos
+# (no se hace ninguna petición HTTP), y compara:
+#   - cadena: los 5 scripts de ingestion_pipeline.SCRIPTS, un intérprete
+#     por script, comunicados mediante CSV;
+#   - ETL: python ingestion/pipeline_runner.py, un único proceso;
+#   - ETL en caliente: pipeline_runner.run_inprocess en este proceso
+#     (sin el coste de arrancar Python e importar pandas).
+#
+# Cada modo se mide en dos escenarios: carga inicial (todos los snapshots
+# pendientes) y un tick (un snapshot nuevo). Se cuentan los bytes leídos
+# y escritos con /proc/self/io, que incluye los procesos hijos ya
+# terminados, y al final se comprueba que el histórico es idéntico.
+#
+#   python benchmarks/bench_single_pass_etl.py --copies 10
+# ====================================================
+
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import contextlib
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.bench_weather_join import seed_store
+from benchmarks.load_driver import proc_io
+from ingestion import pipeline_runner
+from ingestion.ingestion_pipeline import SCRIPTS
+from src.data_preprocessing import history_store, slot_keys
+
+RAW_SOURCE = os.path.join(BASE_DIR, "data", "raw", "queue_times")
+RAW_DIR = os.path.join("data", "raw", "queue_times")
+IO_KEYS = ["rchar", "wchar", "read_bytes", "write_bytes"]
+
+
+@contextlib.contextmanager
+def working_dir(path):
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def make_snapshots(copies):
+    """Snapshots crudos del repositorio, replicados desplazando las fechas: {nombre: (instante, DataFrame)}."""
+    base = {}
+    for path in sorted(glob.glob(os.path.join(RAW_SOURCE, "queue_times_*.csv"))):
+        df = pd.read_csv(path)
+        if not {"fecha", "hora"} <= set(df.columns):
+            continue
+        ts = pd.to_datetime(df["fecha"].astype(str) + " " + df["hora"].astype(str), errors="coerce").min()
+        if pd.notna(ts):
+            base[ts.floor("min")] = df
+    span = pd.Timedelta(days=(max(base).normalize() - min(base).normalize()).days + 1)
+
+    snapshots = {}
+    for i in range(copies):
+        for ts, df in base.items():
+            nuevo = ts + span * i
+            copia = df.copy()
+            copia["fecha"] = nuevo.strftime("%Y-%m-%d")
+            copia["dia_semana"] = nuevo.strftime("%A")
+            snapshots[f"queue_times_{nuevo.strftime('%Y-%m-%d_%H-%M')}.csv"] = (nuevo, copia)
+    return snapshots
+
+
+def write_snapshot(workdir, name, df):
+    df.to_csv(os.path.join(workdir, RAW_DIR, name), index=False, encoding="utf-8-sig")
+
+
+def prepare(workdir, snapshots, fechas):
+    os.makedirs(os.path.join(workdir, RAW_DIR))
+    os.makedirs(os.path.join(workdir, "data", "processed"))
+    for name, (_, df) in snapshots.items():
+        write_snapshot(workdir, name, df)
+    with working_dir(workdir):
+        seed_store(fechas)
+
+
+def run_chain():
+    for script in SCRIPTS:
+        subprocess.run([sys.executable, os.path.join(BASE_DIR, script)], check=True,
+                       stdout=subprocess.DEVNULL)
+
+
+def run_etl():
+    subprocess.run([sys.executable, os.path.join(BASE_DIR, "ingestion", "pipeline_runner.py")], check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def run_etl_warm():
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        pipeline_runner.run_inprocess(log=lambda msg: None)
+
+
+def measure(workdir, func):
+    with working_dir(workdir):
+        io_start = proc_io()
+        start = time.perf_counter()
+        func()
+        wall = time.perf_counter() - start
+        io_end = proc_io()
+    return wall, {k: io_end.get(k, 0) - io_start.get(k, 0) for k in IO_KEYS}
+
+
+def history(workdir):
+    with working_dir(workdir):
+        df = history_store.read_history()
+    return df.sort_values(slot_keys.KEY_COLS, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la cadena de scripts frente al ETL de una pasada")
+    parser.add_argument("--copies", type=int, default=10, help="réplicas de los snapshots del repositorio")
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(args.copies)
+    *iniciales, (ultimo, (ts_tick, df_tick)) = sorted(snapshots.items())
+    n_filas = sum(len(df) for _, df in snapshots.values())
+    fechas = sorted({ts.strftime("%Y-%m-%d") for ts, _ in snapshots.values()})
+    modos = {"cadena (5 scripts)": run_chain, "ETL (1 proceso)": run_etl, "ETL en caliente": run_etl_warm}
+
+    # Importaciones y cache de bytecode fuera de la medición
+    with tempfile.TemporaryDirectory(prefix="bench_etl_warmup_") as tmp:
+        prepare(tmp, dict(iniciales[:1]), fechas)
+        run_etl_warm()
+
+    resultados = {}
+    workdirs = {}
+    try:
+        for modo, func in modos.items():
+            workdirs[modo] = workdir = tempfile.mkdtemp(prefix="bench_etl_")
+            prepare(workdir, dict(iniciales), fechas)
+            resultados[(modo, "carga inicial")] = measure(workdir, func)
+            write_snapshot(workdir, ultimo, df_tick)
+            resultados[(modo, "un tick")] = measure(workdir, func)
+
+        ref = history(workdirs["cadena (5 scripts)"])
+        for modo in list(modos)[1:]:
+            pd.testing.assert_frame_equal(ref, history(workdirs[modo]), check_dtype=False)
+    finally:
+        for workdir in workdirs.values():
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n📦 {len(snapshots)} snapshots, {n_filas} filas crudas; histórico final: {len(ref)} filas")
+    print(f"{'':<22}{'escenario':<15}{'tiempo (s)':>11}" + "".join(f"{k + ' (MB)':>17}" for k in IO_KEYS))
+    for (modo, escenario), (wall, io) in resultados.items():
+        print(f"{modo:<22}{escenario:<15}{wall:>11.2f}" + "".join(f"{io[k] / 1e6:>17.2f}" for k in IO_KEYS))
+    print("✅ El histórico generado es idéntico en los tres modos")
+
+
+if __name__ == "__main__":
+    main()
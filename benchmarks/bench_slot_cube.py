@@ -0,0 +1,103 @@
+# ====================================================
+# BENCHMARK: SERIES DESDE EL HISTÓRICO PARQUET vs CUBO EN MEMORIA MAPEADA
+# Genera un histórico sintético (--days días, 25 atracciones cada 15 min
+# en horario de apertura) en un directorio temporal, construye el cubo y
+# compara cómo obtiene cada consumidor una serie regular:
+#   - antes: read_history del rango + filtrar + pivot a atracciones × slots;
+#   - cubo: SlotCube.slice (vistas de los .npy, huecos enmascarados).
+# Escenarios: una atracción durante una semana y todas durante todo el
+# rango. Comprueba que los valores coinciden y mide también un tick de
+# ingesta (update con un slot nuevo).
+#
+#   python benchmarks/bench_slot_cube.py --days 365
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.bench_compact_schema import make_year
+from benchmarks.bench_single_pass_etl import working_dir
+from src.data_preprocessing import history_store
+from src.data_preprocessing.slot_cube import SlotCube, MASK_VAR
+
+ATRACCION = "Atracción 3"
+
+
+def serie_desde_historico(start, end, atracciones=None):
+    """Lo que hacen hoy los consumidores: leer filas y pivotarlas a una rejilla."""
+    df = history_store.read_history(start=start, end=end,
+                                    columns=["hora", "atraccion", "tiempo_espera", "slot", "atraccion_id"])
+    if atracciones is not None:
+        df = df[df["atraccion"].isin(atracciones)]
+    return df.pivot_table(index="atraccion_id", columns="slot", values="tiempo_espera", observed=True)
+
+
+def mismos_valores(pivot, cubo):
+    """Las celdas observadas del cubo son exactamente las del pivot."""
+    filas = pd.Index(cubo["atraccion_id"]).get_indexer(pivot.index)
+    cols = pd.Index(cubo["slot"]).get_indexer(pivot.columns)
+    denso = cubo["espera"].filled(-1)[np.ix_(filas, cols)]
+    esperado = pivot.fillna(-1).to_numpy()
+    assert (denso == esperado).all() and cubo["espera"].count() == pivot.notna().to_numpy().sum()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Series desde Parquet frente al cubo mapeado en memoria")
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_cubo_")
+    try:
+        with working_dir(workdir):
+            df = make_year(args.days)
+            history_store.write_partitions(df)
+            t_build, _ = timed(SlotCube().rebuild_from_store)
+            cube = SlotCube()
+            fechas = history_store.list_partitions()
+            semana = (fechas[len(fechas) // 2], fechas[min(len(fechas) - 1, len(fechas) // 2 + 6)])
+
+            filas = []
+            for nombre, rango, atracciones in [("1 atracción, 1 semana", semana, [ATRACCION]),
+                                               (f"todas, {len(fechas)} días", (fechas[0], fechas[-1]), None)]:
+                t_hist, pivot = timed(serie_desde_historico, *rango, atracciones)
+                t_cubo, cubo = timed(cube.slice, *rango, atracciones)
+                mismos_valores(pivot, cubo)
+                filas.append((nombre, int(pivot.notna().to_numpy().sum()), t_hist, t_cubo))
+
+            ultimo = pd.Timestamp(fechas[-1]) + pd.Timedelta(hours=22)
+            tick = df[df["fecha"] == fechas[-1]].drop_duplicates("atraccion").copy()
+            tick["hora"] = ultimo.strftime("%H:%M")
+            t_tick, _ = timed(cube.update, tick)
+            # Solo la generación vigente (la anterior se conserva para los lectores rezagados)
+            carpeta = os.path.dirname(cube._path(MASK_VAR))
+            tamano = sum(os.path.getsize(os.path.join(carpeta, f)) for f in os.listdir(carpeta)) / 1e6
+            info = cube.info()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{info}")
+    print(f"🏗️ Construcción desde el histórico: {t_build:.2f}s; ficheros del cubo: {tamano:.1f} MB")
+    print(f"{'':<26}{'lecturas':>10}{'Parquet + pivot (s)':>22}{'cubo (s)':>11}{'×':>9}")
+    for nombre, n, t_hist, t_cubo in filas:
+        print(f"{nombre:<26}{n:>10,}{t_hist:>22.3f}{t_cubo:>11.4f}{t_hist / t_cubo:>9.0f}")
+    print(f"⏱️ Tick de ingesta ({len(tick)} atracciones): {t_tick * 1000:.1f} ms")
+    print("✅ Mismos valores en el cubo y en el histórico")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# ====================================================
+# BENCHMARK: FEATURES DE TENDENCIA (RETARDOS, VENTANAS MÓVILES)
+# Construye el cubo con un histórico sintético (--days días, 25
+# atracciones cada 15 min en horario de apertura, ~5 % de huecos) en un
+# directorio temporal y compara:
+#   - referencia: bucle por atracción con groupby + shift/rolling de
+#     pandas (la pendiente con rolling.apply), sobre la rejilla en formato
+#     largo;
+#   - trend_features: arrays 2D atracciones × slots, sin bucles por grupo.
+# Comprueba que todas las features coinciden (también las de features_at
+# con las de la rejilla completa) y mide también attach (las filas del
+# histórico, como en train_model.py) y features_at (una atracción en vivo,
+# como en predict.py).
+#
+#   python benchmarks/bench_trend_features.py --days 90
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.bench_compact_schema import make_year
+from benchmarks.bench_single_pass_etl import working_dir
+from src.data_preprocessing import slot_keys, trend_features
+from src.data_preprocessing.slot_cube import SlotCube, SLOTS_PER_DAY, slot_of
+
+LIVE_CALLS = 200
+
+
+def pendiente(y):
+    """Pendiente por mínimos cuadrados (por hora) de una ventana que acaba en el último elemento."""
+    x = (np.arange(len(y)) - (len(y) - 1)) * slot_keys.SLOT_MINUTES / 60.0
+    ok = ~np.isnan(y)
+    if ok.sum() < 2:
+        return np.nan
+    x, y = x[ok], y[ok]
+    return ((x - x.mean()) * (y - y.mean())).sum() / ((x - x.mean()) ** 2).sum()
+
+
+def referencia(rejilla):
+    """Las mismas features con un bucle por atracción sobre la rejilla en formato largo."""
+    partes = []
+    for codigo, g in rejilla.groupby("atraccion_id", sort=True):
+        g = g.sort_values("slot")
+        out = pd.DataFrame({"atraccion_id": codigo, "slot": g["slot"].to_numpy()})
+        espera = g["espera"].reset_index(drop=True)
+        previa = espera.shift(1)
+        for nombre, k in trend_features.LAGS.items():
+            out[nombre] = espera.shift(k)
+        for minutos, w in trend_features.WINDOWS.items():
+            out[f"espera_media_{minutos}"] = previa.rolling(w, min_periods=1).mean()
+            out[f"espera_max_{minutos}"] = previa.rolling(w, min_periods=1).max()
+        out["espera_pendiente_60"] = previa.rolling(trend_features.SLOPE_WINDOW, min_periods=2).apply(pendiente, raw=True)
+
+        pos = pd.Series(np.arange(len(g)) % SLOTS_PER_DAY)
+        dia = pd.Series(np.arange(len(g)) // SLOTS_PER_DAY)
+        abierta_previa = (g["abierta"].reset_index(drop=True) == 1).shift(1, fill_value=False) & (pos > 0)
+        primera = pos.where(abierta_previa).groupby(dia).transform("min")
+        out["minutos_desde_apertura"] = ((pos - primera) * slot_keys.SLOT_MINUTES).where(primera <= pos)
+        # Sin lecturas anteriores del mismo día, todo NaN (como al predecir un día futuro)
+        lecturas = espera.notna().astype(int)
+        sin_lecturas = (lecturas.groupby(dia).cumsum() - lecturas) == 0
+        out.loc[sin_lecturas.to_numpy(), trend_features.FEATURE_COLS] = np.nan
+        partes.append(out)
+    return pd.concat(partes, ignore_index=True)
+
+
+def rejilla_larga(cube, start, end):
+    """El cubo completo en formato largo (una fila por atracción y slot, huecos incluidos)."""
+    cubo = cube.slice(start, end)
+    a, t = cubo["espera"].shape
+    return pd.DataFrame({
+        "atraccion_id": np.repeat(cubo["atraccion_id"], t),
+        "slot": np.tile(cubo["slot"], a),
+        "espera": cubo["espera"].astype(np.float64).filled(np.nan).ravel(),
+        "abierta": cubo["abierta"].filled(-1).ravel(),
+    })
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las features de tendencia")
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_tendencia_")
+    try:
+        with working_dir(workdir):
+            # Códigos de atracción registrados como en la ingesta
+            df = slot_keys.add_keys(make_year(args.days), add=True)
+            # Huecos: lecturas que no llegaron
+            df = df.sample(frac=0.95, random_state=0).sort_index()
+            cube = SlotCube()
+            cube.update(df)
+            rango = (df["fecha"].min(), df["fecha"].max())
+            larga = rejilla_larga(cube, *rango)
+
+            t_ref, ref = timed(referencia, larga)
+            t_grid, (features, rejilla) = timed(trend_features.grid_features, cube, *rango)
+            a, t = rejilla["espera"].shape
+            for col in trend_features.FEATURE_COLS:
+                esperado = ref[col].to_numpy(dtype=np.float64).reshape(a, t)
+                np.testing.assert_allclose(features[col], esperado, rtol=1e-5, atol=1e-4, equal_nan=True,
+                                           err_msg=col)
+
+            filas = slot_keys.add_keys(df)
+            t_attach, con_features = timed(trend_features.attach, filas, cube)
+            instantes = pd.Timestamp(df["fecha"].iloc[-1]) + pd.to_timedelta(np.arange(LIVE_CALLS) % 44 * 15 + 660, unit="min")
+            atracciones = df["atraccion"].unique()
+            codes = slot_keys.AttractionCodes.shared()
+            start = time.perf_counter()
+            en_vivo = [trend_features.features_at(instante, atracciones[i % len(atracciones)], cube, codes)
+                       for i, instante in enumerate(instantes)]
+            t_live = (time.perf_counter() - start) / LIVE_CALLS
+            # features_at lee solo una atracción y unas horas: mismo valor que en la rejilla completa
+            filas_vivo = pd.Index(rejilla["atraccion_id"]).get_indexer(
+                codes.encode([atracciones[i % len(atracciones)] for i in range(LIVE_CALLS)]).astype("int64"))
+            cols_vivo = [(slot_of(t) - rejilla["slot"][0]) // slot_keys.SLOT_MINUTES for t in instantes]
+            for col in trend_features.FEATURE_COLS:
+                np.testing.assert_allclose([f[col] for f in en_vivo], features[col][filas_vivo, cols_vivo],
+                                           rtol=1e-6, equal_nan=True, err_msg=col)
+            cobertura = con_features[trend_features.FEATURE_COLS].notna().mean()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n🧊 Rejilla: {a} atracciones × {t} slots ({a * t:,} celdas), {len(df):,} lecturas")
+    print(f"{'':<40}{'tiempo (s)':>12}{'celdas/s':>14}{'×':>8}")
+    print(f"{'referencia (bucle por atracción)':<40}{t_ref:>12.2f}{a * t / t_ref:>14,.0f}{1:>8.0f}")
+    print(f"{'trend_features.grid_features':<40}{t_grid:>12.3f}{a * t / t_grid:>14,.0f}{t_ref / t_grid:>8.0f}")
+    print(f"⏱️ attach a {len(filas):,} filas (entrenamiento): {t_attach:.3f}s")
+    print(f"⏱️ features_at (predicción en vivo): {t_live * 1000:.1f} ms por llamada")
+    print("📈 Filas con valor: " + ", ".join(f"{col} {p:.0%}" for col, p in cobertura.items()))
+    print("✅ Mismas features que la referencia (y features_at que la rejilla completa)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# ====================================================
+# BENCHMARK: UNIÓN DEL CLIMA (BUCLE iterrows vs MERGE POR CLAVES)
+# Replica tiempos_final.csv hasta N filas (desplazando las fechas) y
+# compara el bucle antiguo de add_weather (iterrows + df.loc por fila)
+# con la versión que une una tabla de (fecha, hora) distintas con un
+# merge. El clima sale de la cache en disco, precargada con valores
+# sintéticos en un directorio temporal: no se hace ninguna petición HTTP.
+#
+# El bucle antiguo tarda horas con 1M de filas: se mide sobre
+# --loop-rows filas y se extrapola linealmente.
+#
+#   python benchmarks/bench_weather_join.py --rows 1000000 --loop-rows 20000
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from scripts import weather_enrichment
+from src.data_preprocessing.weather_store import WeatherStore
+
+TIEMPOS_FINAL = os.path.join(BASE_DIR, "data", "clean", "tiempos_final.csv")
+WEATHER_COLS = weather_enrichment.WEATHER_COLS
+
+
+def make_rows(n_rows):
+    """N filas sin clima con fechas consecutivas a partir de tiempos_final.csv."""
+    base = pd.read_csv(TIEMPOS_FINAL).drop(columns=WEATHER_COLS)
+    base["fecha"] = pd.to_datetime(base["fecha"])
+    span = (base["fecha"].max() - base["fecha"].min()).days + 1
+    copias = []
+    for i in range(-(-n_rows // len(base))):
+        copia = base.copy()
+        copia["fecha"] = (copia["fecha"] + pd.Timedelta(days=span * i)).dt.strftime("%Y-%m-%d")
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True).head(n_rows)
+
+
+def seed_store(fechas):
+    """Clima sintético (definitivo) de todas las horas de ``fechas`` en la cache en disco."""
+    horas = pd.DataFrame([(f, h) for f in fechas for h in range(24)], columns=["fecha", "hora"])
+    rng = np.random.default_rng(0)
+    hourly = {
+        "time": [f"{f}T{h:02d}:00" for f, h in horas.itertuples(index=False)],
+        "temperature_2m": rng.uniform(5, 35, len(horas)).round(1).tolist(),
+        "relative_humidity_2m": rng.uniform(20, 95, len(horas)).round().tolist(),
+        "apparent_temperature": rng.uniform(3, 37, len(horas)).round(1).tolist(),
+        "weathercode": rng.choice([0, 1, 2, 3, 61], len(horas)).astype(float).tolist(),
+    }
+    WeatherStore(clock=lambda: datetime(2100, 1, 1)).save(hourly)
+
+
+def add_weather_loop(df):
+    """add_weather antes del cambio: una asignación df.loc por fila."""
+    df = df.copy()
+    for col in WEATHER_COLS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df_missing = df[df["temperatura"].isna()]
+    weather_enrichment.ensure_weather(df_missing["fecha"].unique())
+    for idx, row in df_missing.iterrows():
+        key = (pd.Timestamp(row["fecha"]).strftime("%Y-%m-%d"), weather_enrichment._hour_of(row["hora"]))
+        df.loc[idx, WEATHER_COLS] = weather_enrichment.weather_cache.get(key, weather_enrichment.SIN_DATOS)
+    df[WEATHER_COLS] = df[WEATHER_COLS].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la unión del clima")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--loop-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = make_rows(args.rows)
+    work_dir = tempfile.mkdtemp(prefix="bench_weather_")
+    cwd = os.getcwd()
+    try:
+        os.chdir(work_dir)
+        seed_store(df["fecha"].unique())
+
+        muestra = df.head(args.loop_rows)
+        t_loop, ref = timed(add_weather_loop, muestra)
+        t_vec_muestra, vec = timed(weather_enrichment.add_weather, muestra)
+        pd.testing.assert_frame_equal(ref[WEATHER_COLS], vec[WEATHER_COLS], check_dtype=False)
+
+        t_vec, out = timed(weather_enrichment.add_weather, df)
+        sin_clima = out["temperatura"].isna().sum()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    por_fila = t_loop / len(muestra)
+    print(f"\n{'':<30}{'filas':>10}{'tiempo (s)':>14}{'filas/s':>14}")
+    print(f"{'bucle iterrows + df.loc':<30}{len(muestra):>10}{t_loop:>14.2f}{len(muestra) / t_loop:>14,.0f}")
+    print(f"{'merge por claves':<30}{len(muestra):>10}{t_vec_muestra:>14.2f}{len(muestra) / t_vec_muestra:>14,.0f}")
+    print(f"{'merge por claves':<30}{len(out):>10}{t_vec:>14.2f}{len(out) / t_vec:>14,.0f}")
+    print(f"📈 Bucle extrapolado a {len(out)} filas: ~{por_fila * len(out):.0f}s "
+          f"(×{por_fila * len(out) / t_vec:.0f} más lento)")
+    print(f"✅ Resultados idénticos en la muestra; filas sin clima: {sin_clima}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# ====================================================
+# GENERADOR DE CARGA DE LA INGESTA
+# Ejecuta la ingesta real (download_queue_times + pipeline) contra
+# benchmarks/replay_server.py, tick a tick, en un directorio de trabajo
+# temporal con el histórico vacío (si se copiara tiempos_final, las
+# claves reproducidas se rechazarían como duplicadas).
+#
+# Mide ticks/s, latencia de tick de extremo a extremo (descarga →
+# histórico) y bytes escritos (/proc/self/io y crecimiento en disco).
+#
+#   python benchmarks/load_driver.py --ticks 40
+#   python benchmarks/load_driver.py --ticks 40 --latency 0.05 --error-rate 0.1
+#   python benchmarks/load_driver.py --speed 900 --ticks 20    # un tick cada segundo
+# ====================================================
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import contextlib
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.replay_server import ReplayServer
+from ingestion import ingestion_pipeline, async_downloader, resilience
+from scripts import weather_enrichment
+
+TICK_INTERVAL_S = 15 * 60
+
+
+def proc_io():
+    """Contadores de E/S del proceso (Linux); vacío si no hay /proc."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {k: int(v) for k, v in (line.split(":") for line in f)}
+    except OSError:
+        return {}
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def point_ingestion_at(server, workdir):
+    """Redirige la ingesta al servidor local y a ``workdir``."""
+    ingestion_pipeline.RAW_DIR = os.path.join(workdir, "data", "raw", "queue_times")
+    ingestion_pipeline.RAW_PARKS_DIR = os.path.join(workdir, "data", "raw", "queue_times_parques")
+    ingestion_pipeline.STATE_FILE = os.path.join(workdir, "data", "raw", "queue_times_estado.json")
+    ingestion_pipeline.DELTA_DIR = os.path.join(workdir, "data", "history", "snapshots_delta")
+    ingestion_pipeline.LOG_FILE = os.path.join(workdir, "data", "logs", "ingestion_log.txt")
+    for path in (ingestion_pipeline.RAW_DIR, os.path.dirname(ingestion_pipeline.LOG_FILE)):
+        os.makedirs(path, exist_ok=True)
+    async_downloader.QUEUE_TIMES_URL_TEMPLATE = server.url_template
+    async_downloader.PARK_IDS = [ingestion_pipeline.MAIN_PARK_ID]
+    async_downloader.breaker = resilience.CircuitBreaker()
+    weather_enrichment.OPEN_METEO_URL = server.forecast_url
+    weather_enrichment.weather_cache.clear()
+
+
+def run(ticks, speed=None, latency_s=0.0, error_rate=0.0, quiet=True):
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    cwd = os.getcwd()
+    server = ReplayServer(speed=speed, latency_s=latency_s, error_rate=error_rate)
+    ticks = min(ticks, len(server.instantes))
+    latencies, escritos = [], 0
+    try:
+        with server:
+            point_ingestion_at(server, workdir)
+            os.chdir(workdir)
+            io_start = proc_io()
+            start = time.perf_counter()
+            for i in range(ticks):
+                if speed is not None:
+                    # Ritmo del reloj acelerado del servidor: un tick cada 15 min virtuales
+                    time.sleep(max(0.0, start + (i * TICK_INTERVAL_S) / speed - time.perf_counter()))
+                t0 = time.perf_counter()
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+                    if ingestion_pipeline.download_queue_times(now=server.current_time()):
+                        ingestion_pipeline.run_pipeline()
+                        escritos += 1
+                latencies.append(time.perf_counter() - t0)
+                if speed is None and not server.advance():
+                    break
+            elapsed = time.perf_counter() - start
+            io_end = proc_io()
+            stats = {
+                "ticks": len(latencies),
+                "ticks_con_datos": escritos,
+                "ticks_s": len(latencies) / elapsed,
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "max": max(latencies),
+                "peticiones": server.httpd.requests,
+                "errores_503": server.httpd.errors,
+                "bytes_recibidos": server.httpd.bytes_sent,
+                "disco": dir_size(os.path.join(workdir, "data")),
+                **{k: io_end[k] - io_start[k] for k in ("wchar", "write_bytes") if k in io_end},
+            }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga de la ingesta sobre el histórico reproducido")
+    parser.add_argument("--ticks", type=int, default=40)
+    parser.add_argument("--speed", type=float, default=None,
+                        help="N× tiempo real (por defecto, paso a paso lo más rápido posible)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latencia por petición (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--verbose", action="store_true", help="muestra el log de la ingesta")
+    args = parser.parse_args()
+
+    s = run(args.ticks, args.speed, args.latency, args.error_rate, quiet=not args.verbose)
+    modo = f"×{args.speed:g}" if args.speed else "paso a paso"
+    print(f"🎬 Reproducción {modo}, latencia {args.latency:g}s, errores {args.error_rate:.0%}")
+    print(f"⏱️ {s['ticks']} ticks ({s['ticks_con_datos']} con datos nuevos) → {s['ticks_s']:.2f} ticks/s")
+    print(f"   latencia de tick: p50 {s['p50'] * 1000:.0f} ms | p95 {s['p95'] * 1000:.0f} ms | máx {s['max'] * 1000:.0f} ms")
+    print(f"🌐 {s['peticiones']} peticiones ({s['errores_503']} errores 503), {s['bytes_recibidos'] / 1024:.0f} KiB servidos")
+    escritura = f"wchar {s['wchar'] / 2**20:.1f} MiB, write_bytes {s['write_bytes'] / 2**20:.1f} MiB, " if "wchar" in s else ""
+    print(f"💾 Escrito: {escritura}en disco {s['disco'] / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# ====================================================
+# SERVIDOR DE REPRODUCCIÓN DEL HISTÓRICO
+# Sustituto local de queue-times.com y open-meteo construido con nuestros
+# propios datos: los snapshots crudos (data/raw/queue_times, compactados
+# o no) se sirven como queue_times.json y el clima guardado en el
+# histórico como respuestas horarias de /v1/forecast (y de /v1/archive,
+# para probar el relleno histórico del clima).
+#
+# El histórico se reproduce a N× tiempo real (las pausas largas entre
+# días se comprimen a un tick) o paso a paso con ``advance()``. Admite
+# latencia y una tasa de errores 503 configurables.
+#
+#   python benchmarks/replay_server.py --port 8766 --speed 60
+#   QUEUE_TIMES_URL_TEMPLATE=http://127.0.0.1:8766/parks/{park_id}/queue_times.json \
+#   OPEN_METEO_URL=http://127.0.0.1:8766/v1/forecast python ingestion/ingestion_pipeline.py
+# ====================================================
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import raw_compaction, raw_snapshots, history_store
+from benchmarks.stub_server import _Server
+
+PARK_PATH = re.compile(r"^/parks/(\d+)/queue_times\.json$")
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw", "queue_times")
+HISTORY_ROOT = os.path.join(BASE_DIR, history_store.HISTORY_DIR)
+TIEMPOS_FINAL = os.path.join(BASE_DIR, "data", "clean", "tiempos_final.csv")
+# Las pausas entre snapshots (noches, días sin datos) se reproducen como un tick
+MAX_GAP = pd.Timedelta(minutes=15)
+HOURLY_VARS = {"temperature_2m": "temperatura", "relative_humidity_2m": "humedad",
+               "apparent_temperature": "sensacion_termica", "weathercode": "codigo_clima"}
+
+
+def load_timeline(raw_dir=RAW_DIR):
+    """Snapshots del histórico ordenados: (instantes, [DataFrame por snapshot])."""
+    snapshots = {}
+    for name, df in raw_compaction.iter_raw_frames(raw_dir):
+        df = raw_snapshots.add_timestamp(df, name)
+        if df.empty or df["timestamp"].isna().all():
+            continue
+        snapshots[df["timestamp"].iloc[0]] = df
+    instantes = sorted(snapshots)
+    return instantes, [snapshots[t] for t in instantes]
+
+
+def load_hourly_weather(history_root=HISTORY_ROOT, csv_path=TIEMPOS_FINAL):
+    """Clima por (fecha, hora entera) a partir del histórico guardado."""
+    cols = ["fecha", "hora"] + list(HOURLY_VARS.values())
+    df = history_store.read_history(history_root, columns=cols)
+    if df.empty and os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, usecols=cols)
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    df["fecha"] = pd.to_datetime(df["fecha"]).dt.strftime("%Y-%m-%d")
+    df["hour"] = df["hora"].astype(str).str.split(":").str[0].astype(int)
+    return df.groupby(["fecha", "hour"])[list(HOURLY_VARS.values())].mean()
+
+
+def park_json(df):
+    """Snapshot → JSON con la forma de queue-times (lands → rides)."""
+    lands = []
+    for l, (zona, rides) in enumerate(df.groupby("zona", sort=False)):
+        lands.append({"id": l, "name": zona, "rides": [{
+            "id": l * 1000 + r,
+            "name": row.atraccion,
+            "is_open": str(row.abierta).lower() == "true",
+            "wait_time": int(row.tiempo_espera) if pd.notna(row.tiempo_espera) else 0,
+            "last_updated": pd.Timestamp(row.ultima_actualizacion).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            if pd.notna(row.ultima_actualizacion) else None,
+        } for r, row in enumerate(rides.itertuples(index=False))]})
+    return {"lands": lands, "rides": []}
+
+
+def forecast_json(weather, start_date, end_date):
+    """Respuesta horaria de open-meteo para el rango pedido, con el clima del histórico.
+
+    Las horas sin dato se rellenan con la más cercana del mismo día.
+    """
+    times, values = [], {var: [] for var in HOURLY_VARS}
+    for fecha in pd.date_range(start_date, end_date).strftime("%Y-%m-%d"):
+        day = weather.loc[fecha] if fecha in weather.index.get_level_values(0) else None
+        if day is not None:
+            day = day.reindex(range(24)).ffill().bfill()
+        for hour in range(24):
+            times.append(f"{fecha}T{hour:02d}:00")
+            for var, col in HOURLY_VARS.items():
+                v = day.at[hour, col] if day is not None else np.nan
+                values[var].append(None if pd.isna(v) else float(v))
+    return {"latitude": 40.2, "longitude": -3.6, "timezone": "Europe/Madrid",
+            "hourly": {"time": times, **values}}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, payload, etag=True):
+        body = json.dumps(payload).encode("utf-8")
+        tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if etag and self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+
+    def do_GET(self):
+        replay = self.server.replay
+        if replay.latency_s:
+            time.sleep(replay.latency_s)
+        self.server.requests += 1
+        if replay.error_rate and replay.rng.random() < replay.error_rate:
+            self.server.errors += 1
+            self.send_error(503)
+            return
+
+        url = urlparse(self.path)
+        if PARK_PATH.match(url.path):
+            self._send_json(park_json(replay.current()))
+        elif url.path in ("/v1/forecast", "/v1/archive"):
+            query = parse_qs(url.query)
+            self._send_json(forecast_json(replay.weather, query["start_date"][0], query["end_date"][0]), etag=False)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Reproduce el histórico en un hilo.
+
+    Con ``speed`` (N× tiempo real) la posición avanza sola; con
+    ``speed=None`` solo avanza con ``advance()`` (un snapshot por llamada).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, speed=None, latency_s=0.0, error_rate=0.0,
+                 raw_dir=RAW_DIR, history_root=HISTORY_ROOT, seed=0):
+        self.instantes, self.snapshots = load_timeline(raw_dir)
+        if not self.instantes:
+            raise FileNotFoundError(f"❌ No hay snapshots que reproducir en {raw_dir}")
+        self.weather = load_hourly_weather(history_root)
+        gaps = np.diff(np.array(self.instantes, dtype="datetime64[ns]")).astype("timedelta64[s]").astype(float)
+        self.offsets = np.concatenate([[0.0], np.cumsum(np.minimum(gaps, MAX_GAP.total_seconds()))])
+        self.speed = speed
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.position = 0
+        self.started = None
+
+        self.httpd = _Server((host, port), ReplayHandler)
+        self.httpd.replay = self
+        self.httpd.requests = 0
+        self.httpd.errors = 0
+        self.httpd.bytes_sent = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url_template(self):
+        return self.base_url + "/parks/{park_id}/queue_times.json"
+
+    @property
+    def forecast_url(self):
+        return self.base_url + "/v1/forecast"
+
+    def _index(self):
+        if self.speed is None:
+            return self.position
+        virtual = (time.monotonic() - self.started) * self.speed
+        return min(int(np.searchsorted(self.offsets, virtual, side="right")) - 1, len(self.instantes) - 1)
+
+    def current(self):
+        return self.snapshots[self._index()]
+
+    def current_time(self):
+        """Instante original del snapshot que se está sirviendo."""
+        return self.instantes[self._index()].to_pydatetime()
+
+    def advance(self):
+        """Pasa al siguiente snapshot (modo paso a paso). False si ya no quedan."""
+        if self.position + 1 >= len(self.instantes):
+            return False
+        self.position += 1
+        return True
+
+    @property
+    def finished(self):
+        return self._index() >= len(self.instantes) - 1
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que reproduce el histórico de queue-times y clima")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--speed", type=float, default=60.0, help="N× tiempo real")
+    parser.add_argument("--latency", type=float, default=0.0, help="latencia por petición (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    args = parser.parse_args()
+
+    with ReplayServer(port=args.port, speed=args.speed, latency_s=args.latency, error_rate=args.error_rate) as server:
+        print(f"🎬 Reproduciendo {len(server.instantes)} snapshots a ×{args.speed:g} en {server.base_url}")
+        print(f"   QUEUE_TIMES_URL_TEMPLATE={server.url_template}")
+        print(f"   OPEN_METEO_URL={server.forecast_url}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
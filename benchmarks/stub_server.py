@@ -0,0 +1,164 @@
+# ====================================================
+# SERVIDOR STUB DE QUEUE-TIMES
+# Servidor HTTP local (keep-alive) que imita /parks/<id>/queue_times.json
+# con datos sintéticos y latencia configurable, para benchmarks y pruebas
+# sin depender de la API real. Como la API real, los datos solo cambian
+# cada ``refresh_s`` segundos y admite ETag / If-None-Match.
+# Puede inyectar fallos en una fracción de las peticiones:
+#   slow  → responde tras ``slow_s`` segundos
+#   5xx   → 503 Service Unavailable
+#   reset → cierra la conexión con RST sin responder
+# ====================================================
+
+import re
+import sys
+import json
+import time
+import random
+import socket
+import struct
+import hashlib
+import threading
+import argparse
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PARK_PATH = re.compile(r"^/parks/(\d+)/queue_times\.json$")
+LANDS_PER_PARK = 5
+RIDES_PER_LAND = 8
+
+
+def park_payload(park_id, now=None):
+    """JSON sintético con la misma forma que la respuesta real de queue-times."""
+    now = now or datetime.now(timezone.utc)
+    last_updated = now.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    lands = []
+    for l in range(LANDS_PER_PARK):
+        rides = [{
+            "id": park_id * 1000 + l * 100 + r,
+            "name": f"Atracción {park_id}-{l}-{r}",
+            "is_open": r % 4 != 0,
+            "wait_time": (park_id + l * 7 + r * 5) % 60,
+            "last_updated": last_updated,
+        } for r in range(RIDES_PER_LAND)]
+        lands.append({"id": park_id * 10 + l, "name": f"Zona {l}", "rides": rides})
+    return {"lands": lands, "rides": []}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        match = PARK_PATH.match(self.path)
+        if not match:
+            self.send_error(404)
+            return
+        if self.server.latency_s:
+            time.sleep(self.server.latency_s)
+        self.server.requests += 1
+
+        fault = self.server.fault
+        if fault and self.server.rng.random() < self.server.fault_rate:
+            self.server.faults += 1
+            if fault == "slow":
+                time.sleep(self.server.slow_s)
+            elif fault == "5xx":
+                self.send_error(503)
+                return
+            elif fault == "reset":
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                self.close_connection = True
+                return
+
+        # Los datos solo cambian al inicio de cada periodo de refresco
+        refreshed = int(time.time() // self.server.refresh_s * self.server.refresh_s)
+        body = json.dumps(park_payload(int(match.group(1)),
+                                       datetime.fromtimestamp(refreshed, timezone.utc))).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(refreshed, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # el valor por defecto (5) descarta conexiones en ráfaga
+
+    def handle_error(self, request, client_address):
+        # El cliente cortó por timeout mientras respondíamos (respuestas lentas)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Arranca el stub en un hilo; ``url_template`` sirve para async_downloader."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_s=0.0, refresh_s=300,
+                 fault=None, fault_rate=1.0, slow_s=30.0, seed=0):
+        self.httpd = _Server((host, port), StubHandler)
+        self.httpd.latency_s = latency_s
+        self.httpd.refresh_s = refresh_s
+        self.httpd.fault = fault
+        self.httpd.fault_rate = fault_rate
+        self.httpd.slow_s = slow_s
+        self.httpd.rng = random.Random(seed)
+        self.httpd.requests = 0
+        self.httpd.not_modified = 0
+        self.httpd.faults = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url_template(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/parks/{{park_id}}/queue_times.json"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local de queue-times.com")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="latencia por petición (s)")
+    parser.add_argument("--refresh", type=int, default=300, help="cada cuántos segundos cambian los datos")
+    parser.add_argument("--fault", choices=["slow", "5xx", "reset"], help="tipo de fallo a inyectar")
+    parser.add_argument("--fault-rate", type=float, default=1.0, help="fracción de peticiones con fallo")
+    parser.add_argument("--slow", type=float, default=30.0, help="retraso de las respuestas lentas (s)")
+    args = parser.parse_args()
+
+    with StubServer(port=args.port, latency_s=args.latency, refresh_s=args.refresh,
+                    fault=args.fault, fault_rate=args.fault_rate, slow_s=args.slow) as stub:
+        print(f"🧪 Stub escuchando en {stub.url_template}")
+        try:
+            stub.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
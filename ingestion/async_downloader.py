@@ -0,0 +1,138 @@
+import os
+import sys
+import asyncio
+import aiohttp
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from ingestion import resilience
+
+# Parques a seguir (ids de queue-times.com), configurables por entorno: "298,4,6"
+PARK_IDS = [int(p) for p in os.environ.get("QUEUE_TIMES_PARKS", "298").split(",") if p.strip()]
+QUEUE_TIMES_URL_TEMPLATE = os.environ.get("QUEUE_TIMES_URL_TEMPLATE",
+                                          "https://queue-times.com/parks/{park_id}/queue_times.json")
+# Máximo de peticiones simultáneas contra el mismo host
+LIMIT_PER_HOST = 8
+# Plazo máximo de toda la descarga de un tick, reintentos incluidos
+TICK_DEADLINE_S = 120
+
+# Un único upstream (queue-times.com): un circuito compartido entre ticks
+breaker = resilience.CircuitBreaker()
+
+
+class RetryableHTTPError(Exception):
+    """Respuesta 5xx / 429: se puede reintentar."""
+
+
+def normalize_park(park_id, data, only_open=True):
+    """Aplana el JSON ``lands``/``rides`` de un parque en una lista de filas."""
+    rows = []
+    lands = list(data.get("lands", []))
+    # Algunos parques no agrupan por zonas y traen "rides" en la raíz
+    if data.get("rides"):
+        lands.append({"name": None, "rides": data["rides"]})
+
+    for land in lands:
+        for ride in land.get("rides", []):
+            if only_open and ride.get("is_open") != True:
+                continue
+            rows.append({
+                "zona": land["name"],
+                "atraccion": ride["name"],
+                "tiempo_espera": ride["wait_time"],
+                "ultima_actualizacion": ride["last_updated"],
+                "parque_id": park_id,
+            })
+    return rows
+
+
+async def _get_json(session, url, headers):
+    async with session.get(url, headers=headers) as response:
+        validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if response.status == 304:
+            return None, validators
+        if response.status >= 500 or response.status == 429:
+            raise RetryableHTTPError(f"HTTP {response.status}")
+        response.raise_for_status()
+        return await response.json(content_type=None), validators
+
+
+async def fetch_park(session, park_id, url_template=QUEUE_TIMES_URL_TEMPLATE, headers=None,
+                     max_retries=resilience.MAX_RETRIES):
+    """Descarga el JSON de un parque con reintentos (backoff exponencial con jitter).
+
+    Devuelve (park_id, datos o None, error o None, (etag, last_modified)).
+    Con una respuesta 304 (sin cambios) no hay datos ni error. Los errores
+    4xx no se reintentan; con el circuito abierto no se hace la petición.
+    """
+    url = url_template.format(park_id=park_id)
+    error = None
+    for attempt in range(max_retries + 1):
+        if not breaker.allow():
+            return park_id, None, resilience.CircuitOpenError(f"circuito {breaker.state}"), (None, None)
+        try:
+            data, validators = await _get_json(session, url, headers)
+            breaker.record_success()
+            return park_id, data, None, validators
+        except (RetryableHTTPError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                asyncio.TimeoutError) as e:
+            breaker.record_failure()
+            error = e
+        except Exception as e:
+            return park_id, None, e, (None, None)
+        finally:
+            # Si era la llamada de prueba y no se registró nada (4xx, cancelación por plazo), se libera
+            breaker.release()
+        if attempt < max_retries:
+            await asyncio.sleep(resilience.backoff_delay(attempt))
+    return park_id, None, error, (None, None)
+
+
+async def download_parks_async(park_ids, url_template=QUEUE_TIMES_URL_TEMPLATE,
+                               limit_per_host=LIMIT_PER_HOST, state=None, deadline_s=TICK_DEADLINE_S):
+    """Descarga todos los parques en paralelo sobre un pool de conexiones keep-alive compartido.
+
+    Si se pasa ``state`` (SnapshotState) se usan peticiones condicionales y se
+    guardan los validadores nuevos; los parques sin cambios (304) no aportan filas.
+    Cada petición tiene plazos de conexión y lectura, y la descarga entera
+    no pasa de ``deadline_s``: los parques pendientes cuentan como error.
+    Devuelve (DataFrame con todas las atracciones abiertas, {park_id: error}).
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
+    timeout = aiohttp.ClientTimeout(sock_connect=resilience.CONNECT_TIMEOUT_S,
+                                    sock_read=resilience.READ_TIMEOUT_S)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.ensure_future(
+            fetch_park(session, p, url_template, state.request_headers(p) if state else None))
+            for p in park_ids]
+        done, pending = await asyncio.wait(tasks, timeout=deadline_s) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        results = [t.result() if t in done else
+                   (p, None, asyncio.TimeoutError(f"plazo de {deadline_s}s agotado"), (None, None))
+                   for p, t in zip(park_ids, tasks)]
+
+    rows = []
+    errors = {}
+    for park_id, data, error, validators in results:
+        if error is not None:
+            errors[park_id] = error
+            continue
+        if state is not None and any(validators):
+            state.update_validators(park_id, *validators)
+        if data is not None:
+            rows.extend(normalize_park(park_id, data))
+    return pd.DataFrame(rows), errors
+
+
+def download_parks(park_ids=None, url_template=None, limit_per_host=LIMIT_PER_HOST, state=None,
+                   deadline_s=TICK_DEADLINE_S):
+    """Versión síncrona de ``download_parks_async`` para el scheduler."""
+    if park_ids is None:
+        park_ids = PARK_IDS
+    if url_template is None:
+        url_template = QUEUE_TIMES_URL_TEMPLATE
+    return asyncio.run(download_parks_async(park_ids, url_template, limit_per_host, state=state,
+                                            deadline_s=deadline_s))
@@ -1,19 +1,38 @@
 import os
 import time
-import schedule
 import subprocess
-import requests
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from ingestion import pipeline_runner
+from ingestion import async_downloader
+from ingestion.snapshot_state import SnapshotState
+from ingestion.resilience import TickScheduler
+from ingestion.park_calendar import ParkCalendar
+from src.data_preprocessing import delta_store
+from src.data_preprocessing import raw_compaction
+from src.data_preprocessing import history_store
+
 RAW_DIR = os.path.join(BASE_DIR, "data", "raw", "queue_times")
 os.makedirs(RAW_DIR, exist_ok=True)
 LOG_FILE = os.path.join(BASE_DIR, "data", "logs", "ingestion_log.txt")
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
 
-QUEUE_TIMES_URL = "https://queue-times.com/parks/298/queue_times.json"
+# Parque Warner: el único que alimenta el pipeline y el modelo
+MAIN_PARK_ID = 298
+# El resto de parques de async_downloader.PARK_IDS se guardan aparte, en un lote por tick
+RAW_PARKS_DIR = os.path.join(BASE_DIR, "data", "raw", "queue_times_parques")
+# "csv" (por defecto) o "csv+delta": además del CSV, guarda solo los cambios por atracción
+RAW_STORAGE = os.environ.get("RAW_STORAGE", "csv")
+DELTA_DIR = os.path.join(BASE_DIR, delta_store.DELTA_DIR)
+# "on": suprime/espacia ticks con el parque cerrado según su calendario; "off": cada intervalo
+CALENDAR_MODE = os.environ.get("CALENDAR_MODE", "on")
+# Validadores HTTP y last_updated por atracción del último snapshot escrito
+STATE_FILE = os.path.join(BASE_DIR, "data", "raw", "queue_times_estado.json")
 SCRIPTS = [
     "scripts/preclean_queue_times.py",
     "scripts/combine_queue_times.py",
@@ -21,6 +40,8 @@ SCRIPTS = [
     "scripts/weather_enrichment.py",
     "scripts/add_temporada.py"
 ]
+# "inprocess" (por defecto) o "subprocess" para comparar con la cadena clásica
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "inprocess")
 
 def log(msg):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -29,76 +50,140 @@ def log(msg):
         f.write(f"[{timestamp}] {msg}\n")
 
 # ---------------- Descarga datos nuevos ----------------
-def download_queue_times():
+def download_queue_times(now=None):
+    """Descarga un snapshot por parque y escribe solo los que han cambiado.
+
+    Devuelve True si se escribió un snapshot nuevo del parque principal
+    (es decir, si hay algo que procesar en el pipeline). ``now`` permite
+    fijar el instante del snapshot (p. ej. al reproducir el histórico).
+    """
     try:
-        response = requests.get(QUEUE_TIMES_URL)
-        response.raise_for_status()
-        data = response.json()
-
-        rides_list = []
-        for land in data.get("lands", []):
-            for ride in land.get("rides", []):
-                if ride["is_open"] == True:
-                    rides_list.append({
-                        "zona": land["name"],
-                        "atraccion": ride["name"],
-                        "tiempo_espera": ride["wait_time"],
-                        "ultima_actualizacion": ride["last_updated"]
-                    })
-
-        df = pd.DataFrame(rides_list)
-        if df.empty:
-            log("⚠️ No se descargaron registros nuevos")
-            return
+        park_ids = async_downloader.PARK_IDS
+        if MAIN_PARK_ID not in park_ids:
+            park_ids = [MAIN_PARK_ID] + park_ids
+        state = SnapshotState(STATE_FILE)
+        batch, errors = async_downloader.download_parks(park_ids, state=state)
+        for park_id, error in errors.items():
+            log(f"❌ Error descargando parque {park_id}: {error}")
 
-        df["ultima_actualizacion"] = pd.to_datetime(df["ultima_actualizacion"])
-        now = datetime.now()
-        df["fecha"] = now.strftime("%Y-%m-%d")
-        df["hora"] = now.strftime("%H:%M")
-        df["dia_semana"] = now.strftime("%A")
+        now = now or datetime.now()
+        filename = f"queue_times_{now.strftime('%Y-%m-%d_%H-%M')}.csv"
+        # Parques cuyo last_updated no ha cambiado desde el último snapshot
+        batch = state.filter_changed(batch)
+        if batch.empty:
+            state.save()
+            log("💤 Sin cambios desde el último snapshot, no se escribe nada")
+            return False
 
-        if "timestamp" in df.columns:
-            df = df.drop(columns=["timestamp"])
+        batch["ultima_actualizacion"] = pd.to_datetime(batch["ultima_actualizacion"])
+        batch["fecha"] = now.strftime("%Y-%m-%d")
+        batch["hora"] = now.strftime("%H:%M")
+        batch["dia_semana"] = now.strftime("%A")
+
+        otros = batch[batch["parque_id"] != MAIN_PARK_ID]
+        if not otros.empty:
+            os.makedirs(RAW_PARKS_DIR, exist_ok=True)
+            otros_path = os.path.join(RAW_PARKS_DIR, filename)
+            otros.to_csv(otros_path, index=False, encoding="utf-8-sig")
+            log(f"📥 Lote multiparque: {len(otros)} registros de {otros['parque_id'].nunique()} parques → {otros_path}")
+
+        # Mismo formato de siempre para el parque principal
+        df = batch[batch["parque_id"] == MAIN_PARK_ID].drop(columns=["parque_id"])
+        if df.empty:
+            state.save()
+            log("💤 Parque principal sin cambios desde el último snapshot")
+            return False
 
-        filename = f"queue_times_{now.strftime('%Y-%m-%d_%H-%M')}.csv"
         output_path = os.path.join(RAW_DIR, filename)
         df.to_csv(output_path, index=False, encoding="utf-8-sig")
+        if "delta" in RAW_STORAGE:
+            snapshot = df.assign(abierta=True, timestamp=pd.Timestamp(now).floor("s"))
+            delta_store.append_snapshots(snapshot, DELTA_DIR)
+        # El estado se guarda después de escribir, para no perder un snapshot si falla
+        state.save()
 
         log(f"📥 Ingesta completada: {len(df)} registros → {output_path}")
+        return True
 
     except Exception as e:
         log(f"❌ Error durante la ingesta: {e}")
+        return False
 
 # ---------------- Ejecutar scripts ----------------
-def run_pipeline():
-    log("🚀 Ejecutando pipeline completo...")
+def run_pipeline_subprocess():
+    """Modo clásico: un intérprete nuevo por script, comunicados mediante CSV."""
+    timings = {}
     for script in SCRIPTS:
         path = os.path.join(BASE_DIR, script)
         if os.path.exists(path):
             log(f"▶ Ejecutando {script}...")
+            start = time.perf_counter()
             try:
                 subprocess.run([sys.executable, path], check=True)
                 log(f"✅ Finalizado {script}")
             except subprocess.CalledProcessError as e:
                 log(f"❌ Error en {script}: {e}")
+            timings[script] = (time.perf_counter() - start, 0.0)
         else:
             log(f"❌ No se encontró {script}")
-    log("Pipeline completo.\n")
+    return timings
+
+
+def run_pipeline(mode=PIPELINE_MODE):
+    """Ejecuta el pipeline en proceso ("inprocess") o lanzando un script por etapa ("subprocess")."""
+    log(f"🚀 Ejecutando pipeline completo (modo {mode})...")
+    start = time.perf_counter()
+    if mode == "subprocess":
+        timings = run_pipeline_subprocess()
+    else:
+        timings = pipeline_runner.run_inprocess(log=log)
+
+    total = time.perf_counter() - start
+    resumen = ", ".join(f"{name}={c + k:.2f}s" for name, (c, k) in timings.items())
+    log(f"⏱️ Tiempos por etapa: {resumen}")
+    log(f"Pipeline completo en {total:.2f}s.\n")
+    return timings
 
 # ---------------- Scheduler ----------------
 def run_scheduler(interval_minutes=15):
     log(f"⏰ Iniciando ingesta automática cada {interval_minutes} minutos")
     
+    ultima_compactacion = {"dia": None}
+
     def job():
-        download_queue_times()
-        run_pipeline()
-    
-    schedule.every(interval_minutes).minutes.do(job)
-    job()  # primera ejecución inmediata
+        if download_queue_times():
+            run_pipeline()
+        else:
+            log("⏭️ Pipeline omitido: no hay datos nuevos")
+
+        # Una vez al día: compactar los días cerrados en Parquet y fundir los
+        # ficheros que append_rows deja en cada partición del histórico
+        if ultima_compactacion["dia"] != date.today():
+            manifest = os.path.join(BASE_DIR, raw_compaction.PRECLEAN_MANIFEST)
+            dias = raw_compaction.compact_closed_days(RAW_DIR, manifest_file=manifest)
+            particiones = history_store.compact_partitions(os.path.join(BASE_DIR, history_store.HISTORY_DIR))
+            meses = delta_store.compact_parts(DELTA_DIR) if "delta" in RAW_STORAGE else []
+            ultima_compactacion["dia"] = date.today()
+            if dias:
+                log(f"🗜️ Compactados {len(dias)} días de snapshots crudos")
+            if particiones:
+                log(f"🗜️ Compactadas {len(particiones)} particiones del histórico")
+            if meses:
+                log(f"🗜️ Compactados los parts de {len(meses)} meses del almacén por diferencias")
+        log(f"📊 Ticks: {scheduler.stats}")
+
+    gate = None
+    if CALENDAR_MODE != "off":
+        calendar = ParkCalendar(log=log)
+
+        def gate():
+            # Como mucho una descarga del calendario al día, en otro hilo para no frenar el bucle
+            calendar.refresh_in_background()
+            return calendar.should_tick(datetime.now(), tick_every=timedelta(minutes=interval_minutes))
 
-    while True:
-        schedule.run_pending()
-        time.sleep(10)
+    # Ritmo fijo, un tick cada vez; la primera ejecución es inmediata
+    scheduler = TickScheduler(interval_minutes * 60, job, log=log, gate=gate)
+    scheduler.run_forever(poll_s=10)
 
 if __name__ == "__main__":
-    run_scheduler(15)
\ No newline at end of file
+    run_scheduler(15)
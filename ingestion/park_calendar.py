@@ -0,0 +1,191 @@
+import os
+import json
+import threading
+from datetime import date, datetime, timedelta
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calendario de apertura de Parque Warner (cache local, se refresca como mucho una vez al día)
+CALENDAR_FILE = os.path.join(BASE_DIR, "data", "calendar", "parque_warner.json")
+HORARIOS_URL = "https://www.parquewarner.com/horarios-y-precios/horarios"
+CALENDAR_API = "https://api.adminos.parquesreunidos.com/availability/calendar/{cart_id}/{start}/{end}"
+HORIZON_DAYS = 45
+# Margen alrededor del horario oficial (colas antes de abrir / al cerrar)
+MARGIN = timedelta(minutes=30)
+# Intervalo del scheduler de ingesta: fuera de horario se deja pasar un tick por franja
+TICK_INTERVAL = timedelta(minutes=15)
+
+
+def _parse_hhmm(value):
+    if not value:
+        return None
+    return datetime.strptime(str(value).strip()[:5], "%H:%M").time()
+
+
+def _day_hours(entry):
+    """(apertura, cierre) de una entrada del calendario, o (None, None)."""
+    for sched in entry.get("schedules") or []:
+        opening, closing = _parse_hhmm(sched.get("openingTime")), _parse_hhmm(sched.get("closingTime"))
+        if opening and closing:
+            return opening, closing
+    if entry.get("openingTime") and entry.get("closingTime"):
+        return _parse_hhmm(entry["openingTime"]), _parse_hhmm(entry["closingTime"])
+    if entry.get("openingHours") and "-" in str(entry["openingHours"]):
+        opening, closing = str(entry["openingHours"]).split("-", 1)
+        return _parse_hhmm(opening), _parse_hhmm(closing)
+    return None, None
+
+
+def parse_calendar(payload):
+    """Normaliza la respuesta del calendario de disponibilidad a {fecha: día}.
+
+    Cada día queda como {"abierto": bool | None, "apertura": "HH:MM" | None,
+    "cierre": "HH:MM" | None}. Acepta la lista de días en la raíz o bajo
+    "calendar"/"days"/"data". Si la entrada no trae ningún campo de estado
+    conocido, "abierto" queda en None (desconocido): un cambio de formato de
+    la API no debe parar la ingesta de todo el día.
+    """
+    entries = payload
+    if isinstance(payload, dict):
+        entries = next((payload[k] for k in ("calendar", "days", "data") if isinstance(payload.get(k), list)), [])
+
+    dias = {}
+    for entry in entries:
+        fecha = entry.get("date") or entry.get("day")
+        if not fecha:
+            continue
+        abierto = entry.get("available", entry.get("isOpen", entry.get("open")))
+        if abierto is None and "status" in entry:
+            abierto = str(entry["status"]).upper() not in ("CLOSED", "CERRADO")
+        apertura, cierre = _day_hours(entry)
+        dias[str(fecha)[:10]] = {
+            "abierto": None if abierto is None else bool(abierto),
+            "apertura": apertura.strftime("%H:%M") if apertura else None,
+            "cierre": cierre.strftime("%H:%M") if cierre else None,
+        }
+    return dias
+
+
+def fetch_parquesreunidos(start, end):
+    """Descarga el calendario real (mismo método que a.py: token de la web + API de disponibilidad)."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        page = context.new_page()
+        page.goto(HORARIOS_URL)
+        page.wait_for_timeout(500)
+        cookies = {c["name"]: c["value"] for c in context.cookies()}
+        browser.close()
+
+    url = CALENDAR_API.format(cart_id=cookies["idCart"], start=start.isoformat(), end=end.isoformat())
+    response = requests.get(url, headers={"Authorization": f"Bearer {cookies['portal']}"}, timeout=(5, 30))
+    response.raise_for_status()
+    return response.json()
+
+
+def fixture_fetcher(path):
+    """Fetcher que devuelve una respuesta grabada (para pruebas y benchmarks)."""
+    def fetch(start, end):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return fetch
+
+
+class ParkCalendar:
+    """Calendario de apertura cacheado en disco.
+
+    ``fetcher(start, end)`` devuelve la respuesta cruda de la API; se puede
+    sustituir por ``fixture_fetcher`` para trabajar sin red. Si el refresco
+    falla se sigue usando la última copia guardada.
+    """
+
+    def __init__(self, path=CALENDAR_FILE, fetcher=fetch_parquesreunidos, today=date.today, log=print):
+        self.path = path
+        self.fetcher = fetcher
+        self.today = today
+        self.log = log
+        self.actualizado = None
+        self.ultimo_intento = None
+        self.dias = {}
+        self._lock = threading.Lock()
+        self._refresco = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.actualizado = data.get("actualizado")
+            self.dias = data.get("dias", {})
+
+    def refresh_if_stale(self):
+        """Refresca el calendario si no se ha intentado hoy. Devuelve True si se refrescó."""
+        hoy = self.today()
+        if self.actualizado == hoy.isoformat() or self.ultimo_intento == hoy:
+            return False
+        self.ultimo_intento = hoy
+        try:
+            dias = parse_calendar(self.fetcher(hoy, hoy + timedelta(days=HORIZON_DAYS)))
+        except Exception as e:
+            self.log(f"⚠️ No se pudo refrescar el calendario del parque: {e}")
+            return False
+
+        # Se sustituye el dict entero: quien consulta desde otro hilo ve el viejo o el nuevo
+        self.dias = {**self.dias, **dias}
+        self.actualizado = hoy.isoformat()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"actualizado": self.actualizado, "dias": self.dias}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.log(f"📅 Calendario del parque actualizado ({len(dias)} días)")
+        return True
+
+    def refresh_in_background(self):
+        """Lanza ``refresh_if_stale`` en un hilo aparte si no hay otro en curso.
+
+        El refresco abre un navegador y llama a la API: no debe bloquear el
+        bucle del scheduler. Mientras tanto se usa la copia que ya hay.
+        Devuelve True si se lanzó un refresco.
+        """
+        hoy = self.today()
+        with self._lock:
+            if self.actualizado == hoy.isoformat() or self.ultimo_intento == hoy:
+                return False
+            if self._refresco is not None and self._refresco.is_alive():
+                return False
+            self._refresco = threading.Thread(target=self.refresh_if_stale, daemon=True)
+            self._refresco.start()
+        return True
+
+    def is_open(self, when):
+        """True/False si el parque está abierto en ``when`` (datetime); None si no se sabe."""
+        dia = self.dias.get(when.date().isoformat())
+        if dia is None or dia["abierto"] is None:
+            return None
+        if not dia["abierto"]:
+            return False
+        if not dia["apertura"] or not dia["cierre"]:
+            return True
+        apertura = datetime.combine(when.date(), _parse_hhmm(dia["apertura"])) - MARGIN
+        cierre = datetime.combine(when.date(), _parse_hhmm(dia["cierre"])) + MARGIN
+        return apertura <= when <= cierre
+
+    def should_tick(self, when, closed_every=timedelta(hours=1), tick_every=TICK_INTERVAL):
+        """Decide si un tick de ingesta merece la pena en ``when``.
+
+        - Parque abierto (o calendario desconocido): siempre.
+        - Día cerrado: nunca.
+        - Día abierto pero fuera de horario: solo un tick por ``closed_every``
+          (p. ej. uno por hora), por si el horario real cambia. ``tick_every``
+          es el intervalo del scheduler: pasa el tick que cae al principio
+          de cada franja.
+        """
+        abierto = self.is_open(when)
+        if abierto is None or abierto:
+            return True
+        dia = self.dias[when.date().isoformat()]
+        if not dia["abierto"]:
+            return False
+        segundos = when.hour * 3600 + when.minute * 60 + when.second
+        return segundos % int(closed_every.total_seconds()) < tick_every.total_seconds()
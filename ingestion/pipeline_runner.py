@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from scripts import preclean_queue_times
+from scripts import combine_queue_times
+from scripts import enrich_queue_times
+from scripts import weather_enrichment
+from scripts import add_temporada
+
+# Punto de entrada único del ETL: lee una vez los snapshots crudos nuevos, calcula
+# todas las columnas derivadas en memoria y escribe de una vez las salidas que
+# usan los consumidores (preclean + manifiesto, histórico particionado, índice de
+# claves, cubo y cache del clima). Los CSV intermedios de la cadena de SCRIPTS
+# (tick de preclean, queue_times_all_enriched.csv, queue_times_enriched.csv)
+# solo los escribe el modo subprocess y contienen solo las filas del tick: quien
+# necesite todo lo ingerido (train_model, climatologia_datos, csv_a_parquet)
+# lee el histórico con history_store.read_history.
+#
+#   python ingestion/pipeline_runner.py [--full-rebuild]
+MAX_WORKERS = 4
+
+
+class Stage:
+    """Etapa del pipeline: función, dependencias y checkpoint opcional en disco.
+
+    La función recibe como argumentos las salidas (DataFrames) de sus
+    dependencias, en el mismo orden en que se declaran.
+    """
+
+    def __init__(self, name, func, deps=(), checkpoint=None, run_if_empty=False):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.checkpoint = checkpoint
+        # Se ejecuta aunque una dependencia no tenga datos nuevos (recibe None en su lugar)
+        self.run_if_empty = run_if_empty
+
+
+def build_stages(full_rebuild=False):
+    """DAG equivalente a la cadena de SCRIPTS, pero pasando DataFrames en memoria.
+
+    Solo se procesan las filas nuevas del tick: combine descarta las claves
+    ya guardadas consultando el índice persistente mientras se precarga el
+    clima en paralelo, y el checkpoint añade las filas al histórico. Con
+    ``full_rebuild`` se releen todos los snapshots crudos (las claves ya
+    guardadas se descartan igualmente en combine).
+    """
+    return [
+        # preclean persiste por sí mismo (append + manifiesto pendiente) y devuelve solo las filas nuevas
+        Stage("preclean", lambda: preclean_queue_times.preclean(full_rebuild=full_rebuild)),
+        Stage("weather_prefetch", weather_enrichment.prefetch_weather, deps=["preclean"]),
+        Stage("combine", combine_queue_times.combine, deps=["preclean"]),
+        Stage("enrich", enrich_queue_times.enrich, deps=["combine"]),
+        Stage("weather", lambda df, _: weather_enrichment.add_weather(df),
+              deps=["enrich", "weather_prefetch"]),
+        Stage("temporada", add_temporada.add_temporada, deps=["weather"],
+              checkpoint=add_temporada.save_history),
+        # Los snapshots del tick solo cuentan como ingeridos si el histórico se guardó
+        # (o no había nada que guardar); si algo falla, el siguiente tick los relee
+        Stage("manifest", lambda *_: preclean_queue_times.commit_manifest(), deps=["temporada"],
+              run_if_empty=True),
+    ]
+
+
+def _run_stage(stage, inputs):
+    start = time.perf_counter()
+    result = stage.func(*inputs)
+    compute_s = time.perf_counter() - start
+
+    checkpoint_s = 0.0
+    if stage.checkpoint is not None and result is not None and not getattr(result, "empty", False):
+        start = time.perf_counter()
+        stage.checkpoint(result)
+        checkpoint_s = time.perf_counter() - start
+    return result, compute_s, checkpoint_s
+
+
+def run_stages(stages, log=print, max_workers=MAX_WORKERS):
+    """Ejecuta las etapas respetando dependencias; las independientes van en paralelo.
+
+    Devuelve un diccionario {etapa: (segundos_calculo, segundos_checkpoint)}.
+    Si una etapa falla o devuelve un DataFrame vacío, las que dependen de
+    ella no se ejecutan (salvo las ``run_if_empty`` cuando solo faltan datos).
+    """
+    by_name = {s.name: s for s in stages}
+    results = {}
+    timings = {}
+    pending = set(by_name)
+    failed = set()
+    empty = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            progress = True
+            while progress:
+                progress = False
+                for name in sorted(pending):
+                    stage = by_name[name]
+                    if any(d in empty for d in stage.deps) and not stage.run_if_empty:
+                        log(f"⏭️ Omitida {name}: sin datos nuevos")
+                        empty.add(name)
+                        pending.discard(name)
+                        progress = True
+                    elif any(d in failed for d in stage.deps):
+                        log(f"⏭️ Omitida {name}: falló una dependencia")
+                        failed.add(name)
+                        pending.discard(name)
+                        progress = True
+                    elif all(d in results or d in empty for d in stage.deps):
+                        inputs = [results.get(d) for d in stage.deps]
+                        running[executor.submit(_run_stage, stage, inputs)] = name
+                        pending.discard(name)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], compute_s, checkpoint_s = future.result()
+                    timings[name] = (compute_s, checkpoint_s)
+                    if getattr(results[name], "empty", False):
+                        empty.add(name)
+                    log(f"✅ {name}: {compute_s:.2f}s (+{checkpoint_s:.2f}s checkpoint)")
+                except Exception as e:
+                    failed.add(name)
+                    log(f"❌ Error en {name}: {e}")
+
+    return timings
+
+
+def run_inprocess(log=print, full_rebuild=False):
+    """Ejecuta el pipeline completo en este proceso y devuelve los tiempos por etapa."""
+    return run_stages(build_stages(full_rebuild=full_rebuild), log=log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL de los snapshots de queue-times en una sola pasada")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="relee todos los snapshots crudos en lugar de solo los nuevos")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    run_inprocess(full_rebuild=args.full_rebuild)
+    print(f"⏱️ ETL completo en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
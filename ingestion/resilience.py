@@ -0,0 +1,159 @@
+import time
+import random
+import threading
+
+# Plazos por defecto de las peticiones HTTP de la ingesta (segundos)
+CONNECT_TIMEOUT_S = 5
+READ_TIMEOUT_S = 15
+# Reintentos con backoff exponencial y jitter
+MAX_RETRIES = 3
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 30.0
+
+
+def backoff_delay(attempt, base_s=None, cap_s=None):
+    """Espera antes del reintento ``attempt`` (0, 1, ...): "full jitter" sobre base * 2^attempt."""
+    base_s = BACKOFF_BASE_S if base_s is None else base_s
+    cap_s = BACKOFF_CAP_S if cap_s is None else cap_s
+    return random.uniform(0, min(cap_s, base_s * 2 ** attempt))
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se intenta la petición."""
+
+
+class CircuitBreaker:
+    """Deja de llamar a un upstream que falla de forma continuada.
+
+    Tras ``failure_threshold`` fallos seguidos el circuito se abre y las
+    llamadas fallan al instante durante ``reset_timeout_s``. Después se
+    deja pasar una única llamada de prueba (semiabierto): si va bien se
+    cierra, si falla se vuelve a abrir. Mientras la prueba está en curso el
+    resto de llamadas se rechazan como con el circuito abierto.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "cerrado", "abierto", "semiabierto"
+
+    def __init__(self, failure_threshold=5, reset_timeout_s=300, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout_s:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """True si se puede intentar la llamada (en semiabierto, solo la de prueba)."""
+        with self._lock:
+            state = self.state
+            if state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.probe_in_flight = False
+
+    def release(self):
+        """Libera la prueba si la llamada acabó sin éxito ni fallo del upstream (p. ej. cancelada)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+
+class TickScheduler:
+    """Planificador de ticks a ritmo fijo que nunca ejecuta dos ticks a la vez.
+
+    Cada tick corre en un hilo aparte, así que un tick lento no bloquea el
+    bucle. Si llega la hora de un tick y el anterior sigue en curso, se
+    omite (``omitidos``); si arranca más de ``late_tolerance_s`` tarde
+    respecto a su hora teórica, cuenta como ``tardios``. Si ``gate()``
+    devuelve False el tick no se lanza (``suprimidos``), p. ej. con el
+    parque cerrado.
+    """
+
+    def __init__(self, interval_s, tick, log=print, late_tolerance_s=60, clock=time.monotonic, gate=None):
+        self.interval_s = interval_s
+        self.tick = tick
+        self.log = log
+        self.late_tolerance_s = late_tolerance_s
+        self.clock = clock
+        self.gate = gate
+        self.stats = {"ejecutados": 0, "omitidos": 0, "tardios": 0, "fallidos": 0, "suprimidos": 0}
+        self._lock = threading.Lock()
+        # Los contadores se actualizan desde el bucle y desde el hilo del tick
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def trigger(self, slot_time):
+        """Lanza el tick de la hora ``slot_time`` salvo que haya otro en curso."""
+        if self.gate is not None and not self.gate():
+            self._count("suprimidos")
+            return False
+        if not self._lock.acquire(blocking=False):
+            self._count("omitidos")
+            self.log("⚠️ Tick omitido: el anterior sigue en curso")
+            return False
+
+        lateness = self.clock() - slot_time
+        if lateness > self.late_tolerance_s:
+            self._count("tardios")
+            self.log(f"⚠️ Tick con {lateness:.0f}s de retraso")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        try:
+            self.tick()
+            self._count("ejecutados")
+        except Exception as e:
+            self._count("fallidos")
+            self.log(f"❌ Error en el tick: {e}")
+        finally:
+            self._lock.release()
+
+    def join(self, timeout=None):
+        """Espera al tick en curso (si lo hay)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_forever(self, poll_s=1.0, max_slots=None):
+        """Bucle principal; ``max_slots`` limita el número de horas de tick (para pruebas)."""
+        next_slot = self.clock()
+        slots = 0
+        while max_slots is None or slots < max_slots:
+            now = self.clock()
+            if now >= next_slot:
+                # Horas de tick que se pasaron enteras (p. ej. el proceso estuvo suspendido)
+                behind = int((now - next_slot) // self.interval_s)
+                if behind:
+                    self._count("omitidos", behind)
+                    self.log(f"⚠️ {behind} ticks perdidos por retraso del planificador")
+                    next_slot += behind * self.interval_s
+                self.trigger(next_slot)
+                next_slot += self.interval_s
+                slots += 1 + behind
+            time.sleep(max(0.0, min(poll_s, next_slot - self.clock())))
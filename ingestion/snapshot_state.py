@@ -0,0 +1,67 @@
+import os
+import json
+
+
+class SnapshotState:
+    """Estado persistente de la ingesta por parque.
+
+    Guarda los validadores HTTP (ETag / Last-Modified) para las peticiones
+    condicionales y el ``last_updated`` visto de cada atracción, para no
+    escribir snapshots idénticos al anterior.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parks = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.parks = json.load(f)
+
+    def _park(self, park_id):
+        return self.parks.setdefault(str(park_id), {"etag": None, "last_modified": None, "rides": {}})
+
+    def request_headers(self, park_id):
+        """Cabeceras condicionales para la próxima petición del parque."""
+        park = self.parks.get(str(park_id), {})
+        headers = {}
+        if park.get("etag"):
+            headers["If-None-Match"] = park["etag"]
+        if park.get("last_modified"):
+            headers["If-Modified-Since"] = park["last_modified"]
+        return headers
+
+    def update_validators(self, park_id, etag=None, last_modified=None):
+        """Guarda los validadores de la respuesta; los que no trae se conservan.
+
+        Un 304 puede devolver solo el ETag (o solo Last-Modified): borrar el
+        otro haría perder la petición condicional que sí lo usa.
+        """
+        park = self._park(park_id)
+        if etag:
+            park["etag"] = etag
+        if last_modified:
+            park["last_modified"] = last_modified
+
+    def filter_changed(self, batch):
+        """Devuelve solo las filas de los parques con algún ``last_updated`` distinto.
+
+        Un parque cambia si alguna atracción actualiza su ``last_updated`` o si
+        cambia el conjunto de atracciones abiertas. Registra los valores nuevos.
+        """
+        if batch.empty:
+            return batch
+        changed = []
+        for park_id, rows in batch.groupby("parque_id"):
+            rides = dict(zip(rows["atraccion"], rows["ultima_actualizacion"].astype(str)))
+            park = self._park(park_id)
+            if rides != park["rides"]:
+                park["rides"] = rides
+                changed.append(park_id)
+        return batch[batch["parque_id"].isin(changed)].copy()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.parks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
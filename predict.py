@@ -6,6 +6,10 @@ import pandas as pd
 import numpy as np
 import joblib
 from datetime import datetime
+from src.data_preprocessing import holiday_calendar
+from src.data_preprocessing.slot_keys import parse_hora, AttractionCodes
+from src.data_preprocessing import trend_features
+from src.data_preprocessing.slot_cube import SlotCube
 
 def load_model_artifacts():
     """Carga todos los artefactos necesarios para hacer predicciones"""
@@ -23,6 +27,11 @@ def load_model_artifacts():
     hist_hora_dia = joblib.load("models/hist_hora_dia.pkl")
     hist_mes_hora = joblib.load("models/hist_mes_hora.pkl")
     
+    # Cubo y códigos de atracción, abiertos una vez para todas las predicciones
+    # (el cubo relee su índice en cada consulta, así que ve los ticks nuevos)
+    cube = SlotCube()
+    codes = AttractionCodes.shared()
+    
     return {
         "model": model,
         "scaler": scaler,
@@ -34,67 +43,11 @@ def load_model_artifacts():
         "hist_dia_semana": hist_dia_semana,
         "hist_mes_dia": hist_mes_dia,
         "hist_hora_dia": hist_hora_dia,
-        "hist_mes_hora": hist_mes_hora
+        "hist_mes_hora": hist_mes_hora,
+        "cube": cube,
+        "codes": codes
     }
 
-def parse_hora(hora_str):
-    """Parsea la hora a formato numérico"""
-    try:
-        if pd.isna(hora_str):
-            return np.nan
-        if isinstance(hora_str, (int, float)):
-            return int(hora_str)
-        s = str(hora_str).strip()
-        if ":" in s:
-            parts = s.split(":")
-            hora = int(float(parts[0]))
-            minuto = int(float(parts[1])) if len(parts) > 1 else 0
-            return hora + minuto / 60.0
-        return int(float(s))
-    except:
-        return np.nan
-
-def get_temporada(mes):
-    """Determina la temporada del año"""
-    if mes in [7, 8]:
-        return 3  # Muy Alta
-    elif mes in [10]:
-        return 3  # Muy Alta
-    elif mes in [4, 5, 6, 12]:
-        return 2  # Alta
-    elif mes in [3, 9, 11]:
-        return 1  # Media
-    else:
-        return 0  # Baja
-
-def es_festivo_espana(fecha):
-    """Detecta festivos en España"""
-    mes = fecha.month
-    dia = fecha.day
-    if mes == 1 and dia == 1: return 1  # Año Nuevo
-    if mes == 1 and dia == 6: return 1  # Reyes
-    if mes == 5 and dia == 1: return 1  # Día del Trabajo
-    if mes == 10 and dia == 12: return 1  # Día de la Hispanidad
-    if mes == 11 and dia == 1: return 1  # Todos los Santos
-    if mes == 12 and dia == 6: return 1  # Constitución
-    if mes == 12 and dia == 8: return 1  # Inmaculada
-    if mes == 12 and dia == 25: return 1  # Navidad
-    return 0
-
-def es_puente(fecha):
-    """Detecta si un día es parte de un puente (festivo + fin de semana cercano)"""
-    if es_festivo_espana(fecha):
-        return 1
-    dia_anterior = fecha - pd.Timedelta(days=1)
-    dia_siguiente = fecha + pd.Timedelta(days=1)
-    if fecha.weekday() == 4 and es_festivo_espana(dia_siguiente):  # Viernes antes de festivo
-        return 1
-    if fecha.weekday() == 0 and es_festivo_espana(dia_anterior):  # Lunes después de festivo
-        return 1
-    if fecha.weekday() == 6 and es_festivo_espana(dia_anterior):  # Domingo después de festivo (sábado)
-        return 1
-    return 0
-
 def prepare_input_for_prediction(input_dict, artifacts):
     """Prepara un input para predicción aplicando todo el feature engineering"""
     df_train = artifacts["df_processed"]
@@ -146,9 +99,11 @@ def prepare_input_for_prediction(input_dict, artifacts):
     es_hora_valle_tarde = 1 if hora_int > 18 else 0
     es_hora_valle = 1 if (es_hora_valle_manana or es_hora_valle_tarde) else 0
     
-    # Features de PUENTES/FESTIVOS
-    es_festivo_val = es_festivo_espana(fecha)
-    es_puente_val = es_puente(fecha)
+    # Features de PUENTES/FESTIVOS (calendario precalculado, consulta O(1))
+    calendario = holiday_calendar.day_flags(fecha)
+    es_festivo_val = calendario["es_festivo"]
+    es_puente_val = calendario["es_puente"]
+    es_vacaciones_escolares = calendario["es_vacaciones_escolares"]
     
     # Interacciones con hora y puentes
     hora_apertura_fin_semana = es_hora_apertura * es_fin_de_semana
@@ -159,7 +114,7 @@ def prepare_input_for_prediction(input_dict, artifacts):
     es_mes_dict = {i: 1 if mes == i else 0 for i in range(1, 13)}
     
     # Temporada
-    temporada = get_temporada(mes)
+    temporada = calendario["temporada"]
     
     # Features cíclicas
     hora_sin = np.sin(2 * np.pi * hora / 24)
@@ -338,6 +293,7 @@ def prepare_input_for_prediction(input_dict, artifacts):
         "es_hora_valle": es_hora_valle,
         "es_festivo": es_festivo_val,
         "es_puente": es_puente_val,
+        "es_vacaciones_escolares": es_vacaciones_escolares,
         "hora_apertura_fin_semana": hora_apertura_fin_semana,
         "hora_pico_puente": hora_pico_puente,
         "puente_fin_semana": puente_fin_semana,
@@ -345,6 +301,13 @@ def prepare_input_for_prediction(input_dict, artifacts):
         "atraccion_enc": atraccion_enc,
     }
     
+    # Tendencia reciente de la atracción desde el cubo. NaN si no hay lecturas previas
+    # ese mismo día: siempre en fechas futuras (el modelo lo ha visto en la primera
+    # lectura de cada día del entrenamiento), así que ahí la predicción se apoya solo
+    # en calendario, clima e históricos
+    feature_dict.update(trend_features.features_at(fecha.normalize() + pd.Timedelta(hours=hora), atraccion,
+                                                   artifacts.get("cube"), artifacts.get("codes")))
+    
     # Añadir frecuencias si existen
     if "zona_freq" in columnas_entrenamiento:
         zona_freq_map = df_train["zona"].value_counts().to_dict() if "zona" in df_train.columns else {}
@@ -495,7 +458,7 @@ def predict_wait_time(input_dict, artifacts=None):
     es_hora_valle = (hora_int < 10 or hora_int > 18)
     
     # Detectar puente/festivo
-    es_puente_val = es_puente(fecha)
+    es_puente_val = holiday_calendar.day_flags(fecha)["es_puente"]
     
     # PRIORIZAR históricos por hora - si tenemos datos específicos por hora, usarlos directamente
     # Si tenemos histórico por hora específica, usarlo como base principal
@@ -1,34 +1,53 @@
 import os
+import sys
 import pandas as pd
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing import slot_keys
+from src.data_preprocessing import holiday_calendar
+from src.data_preprocessing.key_index import KeyIndex, KEY_INDEX_FILE
+from src.data_preprocessing.slot_cube import SlotCube, CUBE_DIR
+from scripts import preclean_queue_times
+
 PROCESSED_DIR = "data/processed"
 ENRICHED_FILE = os.path.join(PROCESSED_DIR, "queue_times_enriched.csv")
-FINAL_CSV = os.path.join("data", "clean", "tiempos_final.csv")
-os.makedirs(os.path.dirname(FINAL_CSV), exist_ok=True)
 
-df_pipeline = pd.read_csv(ENRICHED_FILE)
+def add_temporada(df_pipeline):
+    """Añade el calendario (temporada, festivo, puente, vacaciones) y descarta filas sin los campos obligatorios.
+
+    La temporada es la misma que usan train_model.py y predict.py
+    (``holiday_calendar.TEMPORADA_MES``: 0 baja → 3 muy alta).
+    """
+    df_pipeline = holiday_calendar.attach(df_pipeline)
+
+    # Limpiar duplicados y nulos
+    df_pipeline = df_pipeline.dropna(subset=["zona","atraccion","tiempo_espera","fecha","hora"])
+    df_pipeline = slot_keys.dedupe(df_pipeline, keep="last")
+    return df_pipeline
+
 
-# Asignar temporada según mes
-def get_temporada(mes):
-    if mes in [7,8]:
-        return "alta"
-    elif mes in [12,1,2]:
-        return "media"
+def save_history(df_final):
+    """Añade las filas al histórico y, una vez escritas, registra sus claves en el índice y el cubo."""
+    fechas = history_store.append_rows(df_final)
+    KeyIndex(KEY_INDEX_FILE).add(df_final)
+    cube = SlotCube(CUBE_DIR)
+    if cube.created:
+        # Primera vez: el cubo se construye con todo el histórico (que ya incluye este lote)
+        cube.rebuild_from_store()
     else:
-        return "baja"
+        cube.update(df_final)
+    print(f"✅ Histórico actualizado → {history_store.HISTORY_DIR} ({len(df_final)} filas en {len(fechas)} particiones)")
+    return fechas
 
-df_pipeline['temporada'] = df_pipeline['mes'].apply(get_temporada)
 
-# Combinar con CSV final histórico
-if os.path.exists(FINAL_CSV):
-    df_final_hist = pd.read_csv(FINAL_CSV)
-    df_combined = pd.concat([df_final_hist, df_pipeline], ignore_index=True)
-else:
-    df_combined = df_pipeline
+def main():
+    save_history(add_temporada(pd.read_csv(ENRICHED_FILE)))
+    # Modo subprocess: el histórico ya está guardado, los snapshots del tick cuentan como ingeridos
+    preclean_queue_times.commit_manifest()
 
-# Limpiar duplicados y nulos
-df_combined = df_combined.drop_duplicates(subset=["fecha","hora","atraccion"], keep="last")
-df_combined = df_combined.dropna(subset=["zona","atraccion","tiempo_espera","fecha","hora"])
 
-df_combined.to_csv(FINAL_CSV, index=False, encoding="utf-8-sig")
-print(f"✅ CSV final actualizado → {FINAL_CSV} ({len(df_combined)} filas)")
+if __name__ == "__main__":
+    main()
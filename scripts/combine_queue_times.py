@@ -1,28 +1,45 @@
 import os
+import sys
 import pandas as pd
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing.key_index import KeyIndex, KEY_INDEX_FILE
+
 PROCESSED_DIR = "data/processed"
-PRECLEAN_FILE = os.path.join(PROCESSED_DIR, "queue_times_preclean.csv")
+PRECLEAN_TICK_FILE = os.path.join(PROCESSED_DIR, "queue_times_preclean_tick.csv")
 COMBINED_FILE = os.path.join(PROCESSED_DIR, "queue_times_all_enriched.csv")
 TIEMPOS_FINAL = os.path.join("data", "clean", "tiempos_final.csv")
-os.makedirs(os.path.dirname(TIEMPOS_FINAL), exist_ok=True)
 
-df_new = pd.read_csv(PRECLEAN_FILE)
 
-# Combinar con histórico del pipeline
-if os.path.exists(COMBINED_FILE):
-    df_existing = pd.read_csv(COMBINED_FILE)
-    df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-else:
-    df_combined = df_new
+def open_key_index():
+    """Índice de claves del histórico; si no existe se reconstruye desde el almacén."""
+    # Primera ejecución: migrar tiempos_final.csv al almacén particionado
+    history_store.ensure_bootstrapped(TIEMPOS_FINAL)
+    index = KeyIndex(KEY_INDEX_FILE)
+    if index.created:
+        index.rebuild_from_store()
+    return index
+
+
+def combine(df_new, index=None):
+    """Descarta los registros cuya clave (fecha, hora, atraccion) ya está en el histórico."""
+    if index is None:
+        index = open_key_index()
+    df_combined, n_dup = index.filter_new(df_new)
+    print(f"🔁 Combine: {len(df_combined)} filas nuevas, {n_dup} duplicados rechazados")
+    return df_combined
+
+
+def main():
+    df_combined = combine(pd.read_csv(PRECLEAN_TICK_FILE))
 
-df_combined = df_combined.drop_duplicates(subset=["fecha","hora","atraccion"], keep="last")
+    # Fichero de paso para enrich: solo las filas nuevas de este tick
+    df_combined.to_csv(COMBINED_FILE, index=False, encoding="utf-8-sig")
+    print(f"✅ Combine finalizado ({len(df_combined)} filas) → {COMBINED_FILE}")
 
-# Combinar con tiempos_final.csv para mantener histórico real
-if os.path.exists(TIEMPOS_FINAL):
-    df_final_hist = pd.read_csv(TIEMPOS_FINAL)
-    df_combined = pd.concat([df_final_hist, df_combined], ignore_index=True)
-    df_combined = df_combined.drop_duplicates(subset=["fecha","hora","atraccion"], keep="last")
 
-df_combined.to_csv(COMBINED_FILE, index=False, encoding="utf-8-sig")
-print(f"✅ Combine finalizado ({len(df_combined)} filas) → {COMBINED_FILE}")
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,35 @@
 import os
+import sys
 import pandas as pd
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import slot_keys
+
 PROCESSED_DIR = "data/processed"
 COMBINED_FILE = os.path.join(PROCESSED_DIR, "queue_times_all_enriched.csv")
 ENRICHED_FILE = os.path.join(PROCESSED_DIR, "queue_times_enriched.csv")
 
-df = pd.read_csv(COMBINED_FILE)
 
-# Añadir columnas de tiempo derivadas
-df['hora'] = df['hora'].astype(str)
-df['dia_semana'] = pd.to_datetime(df['fecha']).dt.day_name()
-df['mes'] = pd.to_datetime(df['fecha']).dt.month
-df['fin_de_semana'] = df['dia_semana'].isin(['Saturday','Sunday'])
+def enrich(df):
+    """Añade columnas de tiempo derivadas (día de la semana, mes, fin de semana)."""
+    df = df.copy()
+    df['hora'] = df['hora'].astype(str)
+    df['dia_semana'] = pd.to_datetime(df['fecha']).dt.day_name()
+    df['mes'] = pd.to_datetime(df['fecha']).dt.month
+    df['fin_de_semana'] = df['dia_semana'].isin(['Saturday','Sunday'])
+
+    df = slot_keys.dedupe(df, keep="last")
+    return df
+
+
+def main():
+    df = enrich(pd.read_csv(COMBINED_FILE))
+
+    df.to_csv(ENRICHED_FILE, index=False, encoding='utf-8-sig')
+    print(f"✅ Enrich finalizado ({len(df)} filas) → {ENRICHED_FILE}")
 
-df = df.drop_duplicates(subset=["fecha","hora","atraccion"], keep="last")
 
-df.to_csv(ENRICHED_FILE, index=False, encoding='utf-8-sig')
-print(f"✅ Enrich finalizado ({len(df)} filas) → {ENRICHED_FILE}")
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,157 @@
 import os
+import sys
+import argparse
 import pandas as pd
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_manifest import RawManifest, commit_pending, PENDING_SUFFIX
+from src.data_preprocessing.key_index import KeyIndex, KEY_INDEX_FILE
+from src.data_preprocessing import raw_compaction
+from src.data_preprocessing import raw_loader
+from src.data_preprocessing import slot_keys
+
 RAW_DIR = os.path.join("data", "raw", "queue_times")
 PROCESSED_DIR = os.path.join("data", "processed")
-os.makedirs(PROCESSED_DIR, exist_ok=True)
 PRECLEAN_FILE = os.path.join(PROCESSED_DIR, "queue_times_preclean.csv")
+# Filas nuevas del último tick: fichero de paso para combine en modo subprocess
+PRECLEAN_TICK_FILE = os.path.join(PROCESSED_DIR, "queue_times_preclean_tick.csv")
+MANIFEST_FILE = os.path.join(PROCESSED_DIR, "preclean_manifest.json")
+
+
+def clean_snapshots(df):
+    """Elimina filas incompletas y duplicadas de un lote de snapshots.
+
+    Aquí se asigna la clave canónica (slot de 15 min, atraccion_id) que usa
+    el resto del pipeline para deduplicar y cruzar.
+    """
+    df = df.dropna(subset=["fecha","hora","atraccion"])
+    # df = df[df["abierta"] == True]  # solo abiertas
+    df = df.drop(columns=["timestamp"], errors='ignore')
+    df = slot_keys.add_keys(df, overwrite=True, add=True).dropna(subset=slot_keys.KEY_COLS)
+    df = df.drop_duplicates(subset=slot_keys.KEY_COLS)
+    return df
+
+
+def _not_stored(df, key_index_file=KEY_INDEX_FILE):
+    """Filas de ``df`` cuya clave aún no está en el índice de claves del histórico.
+
+    Un snapshot releído (cambió su mtime) o un tick repetido tras un fallo ya
+    tiene sus filas en el histórico si llegó a guardarse: se descartan con el
+    índice persistente, sin leer el preclean. Si el índice aún no existe no se
+    crea aquí (combine lo reconstruye desde el histórico).
+    """
+    if df.empty or not os.path.exists(key_index_file):
+        return df
+    nuevas, _ = KeyIndex(key_index_file).filter_new(df)
+    return nuevas
+
+
+def append_preclean(df, path=PRECLEAN_FILE):
+    """Añade filas al CSV de preclean respetando la cabecera existente."""
+    if not os.path.exists(path):
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        return
+
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    if set(df.columns) - set(header):
+        # Columnas nuevas: hay que reescribir el fichero con el esquema ampliado
+        df_all = pd.concat([pd.read_csv(path), df], ignore_index=True)
+        df_all.to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        df.reindex(columns=header).to_csv(path, mode="a", header=False, index=False, encoding="utf-8-sig")
+
+
+def preclean(raw_dir=RAW_DIR, full_rebuild=False, preclean_file=PRECLEAN_FILE, manifest_file=MANIFEST_FILE,
+             key_index_file=KEY_INDEX_FILE):
+    """Lee solo los snapshots nuevos o modificados y prepara sus filas para el CSV de preclean.
+
+    Devuelve las filas nuevas de este tick. Con ``full_rebuild`` se ignora el
+    manifiesto y se regenera el preclean completo desde los días compactados
+    más los CSV sueltos del directorio crudo.
+
+    Los ficheros leídos se anotan en el manifiesto pendiente y sus filas (las
+    que no están ya en el histórico) en ``<preclean>.pending``; ambos se
+    promueven con ``commit_manifest``, una vez guardado el histórico. Si una
+    etapa posterior falla, el siguiente tick vuelve a leerlos y sobrescribe
+    el pendiente, así que el preclean no recibe filas repetidas. El coste del
+    tick no depende del tamaño del preclean: nunca se vuelve a leer.
+    """
+    csvs = raw_compaction.loose_files(raw_dir)
+
+    manifest = RawManifest(manifest_file)
+    if full_rebuild or not os.path.exists(preclean_file) or not os.path.exists(manifest_file):
+        manifest.clear()
+        full_rebuild = True
+    manifest.prune(csvs)
+
+    if full_rebuild:
+        pending = csvs
+        df = raw_compaction.read_raw(raw_dir)
+    else:
+        pending = manifest.pending(csvs)
+        if not pending:
+            manifest.save()
+            print("✅ Preclean: no hay snapshots nuevos")
+            return pd.DataFrame()
+        df = raw_loader.read_csv_files(pending)
+
+    if df.empty:
+        print("❌ No hay CSVs para preclean")
+        return pd.DataFrame()
+    df = clean_snapshots(df)
+
+    os.makedirs(os.path.dirname(preclean_file) or ".", exist_ok=True)
+    pending_file = preclean_file + PENDING_SUFFIX
+    if full_rebuild:
+        df.to_csv(preclean_file, index=False, encoding="utf-8-sig")
+        if os.path.exists(pending_file):
+            os.remove(pending_file)
+    else:
+        _not_stored(df, key_index_file).to_csv(pending_file, index=False, encoding="utf-8-sig")
+
+    manifest.mark_ingested(pending)
+    manifest.save(pending=True)
+    if full_rebuild:
+        print(f"✅ Preclean completo ({len(df)} filas) → {preclean_file}")
+    else:
+        print(f"✅ Preclean: {len(pending)} snapshots nuevos ({len(df)} filas) → {preclean_file}")
+    return df
+
+
+def commit_manifest(manifest_file=MANIFEST_FILE, preclean_file=PRECLEAN_FILE):
+    """Da por ingeridos los snapshots del tick: llamar solo cuando el histórico ya está guardado.
+
+    Añade al preclean las filas pendientes del tick y promueve el manifiesto.
+    Si se cae entre los dos pasos, el siguiente tick relee esos snapshots y
+    el índice de claves descarta las filas que ya se añadieron.
+    """
+    pending_file = preclean_file + PENDING_SUFFIX
+    if os.path.exists(pending_file):
+        df = pd.read_csv(pending_file)
+        if not df.empty:
+            append_preclean(df, preclean_file)
+        os.remove(pending_file)
+    return commit_pending(manifest_file)
+
+
+def write_tick_file(df, path=PRECLEAN_TICK_FILE, preclean_file=PRECLEAN_FILE):
+    """Guarda las filas nuevas del tick (con cabecera aunque no haya filas)."""
+    if df.empty and os.path.exists(preclean_file):
+        df = pd.read_csv(preclean_file, nrows=0)
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preclean incremental de los snapshots de queue-times")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="ignora el manifiesto y regenera el preclean desde todos los CSV crudos")
+    args = parser.parse_args()
 
-csvs = [os.path.join(RAW_DIR, f) for f in os.listdir(RAW_DIR) if f.endswith(".csv")]
-if not csvs:
-    print("❌ No hay CSVs para preclean")
-    exit()
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    write_tick_file(preclean(full_rebuild=args.full_rebuild))
 
-df = pd.concat([pd.read_csv(f) for f in csvs], ignore_index=True)
-df = df.dropna(subset=["fecha","hora","atraccion"])
-# df = df[df["abierta"] == True]  # solo abiertas
-df = df.drop(columns=["timestamp"], errors='ignore')
-df = df.drop_duplicates(subset=["fecha","hora","atraccion"])
 
-df.to_csv(PRECLEAN_FILE, index=False, encoding="utf-8-sig")
-print(f"✅ Preclean completado ({len(df)} filas) → {PRECLEAN_FILE}")
+if __name__ == "__main__":
+    main()
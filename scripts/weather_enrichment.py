@@ -1,60 +1,125 @@
 import os
+import sys
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime
-import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.weather_store import WeatherStore
+from src.data_preprocessing import slot_keys
 
 PROCESSED_DIR = "data/processed"
 ENRICHED_FILE = os.path.join(PROCESSED_DIR, "queue_times_enriched.csv")
 LAT, LON = 40.2068, -3.6128
+# Configurable para apuntar a un servidor local (p. ej. benchmarks/replay_server.py)
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+WEATHER_COLS = ["temperatura", "humedad", "sensacion_termica", "codigo_clima"]
 
-df = pd.read_csv(ENRICHED_FILE)
+# Cache en memoria de la ejecución: (fecha "YYYY-MM-DD", hora entera) → (temperatura, humedad, sensación, código).
+# La copia persistente (con TTL para la previsión) está en weather_store.
+weather_cache = {}
+# Peticiones HTTP a open-meteo desde el arranque (para detectar regresiones)
+http_requests = 0
+# La precarga (hilo del runner) y las etapas de enriquecimiento escriben a la vez en ambos
+_cache_lock = threading.Lock()
+SIN_DATOS = (None, None, None, None)
 
-# Crear columnas si no existen
-for col in ["temperatura", "humedad", "sensacion_termica", "codigo_clima"]:
-    if col not in df.columns:
-        df[col] = pd.NA
 
-# Filtrar solo filas que faltan datos de clima
-df_missing = df[df["temperatura"].isna()]
+def _hour_of(hora_str):
+    return int(float(str(hora_str).split(":")[0]))
 
-# Cache interna
-weather_cache = {}
 
-def get_weather_for_hour(date_str, hour_str):
-    """Devuelve clima (temperatura, humedad, sensación, código) usando cache y solicitudes por hora"""
-    key = (date_str, hour_str)
-    if key in weather_cache:
-        return weather_cache[key]
+def ensure_weather(fechas):
+    """Carga en la cache el clima de los días indicados desde la cache en disco.
+
+    Los días que faltan o han caducado se descargan en una única petición.
+    Devuelve el WeatherStore usado (con sus aciertos/fallos/peticiones).
+    """
+    global http_requests
+    store = WeatherStore(lat=LAT, lon=LON)
+    dias = {pd.Timestamp(f).strftime("%Y-%m-%d") for f in fechas if pd.notna(f)}
+    horas = store.hourly(dias, url=OPEN_METEO_URL)
+    with _cache_lock:
+        weather_cache.update(horas)
+        http_requests += store.stats["peticiones"]
+    return store
+
 
+def get_weather_for_hour(date_str, hour_str):
+    """Devuelve clima (temperatura, humedad, sensación, código) de una hora, descargando el día si falta"""
     try:
-        date = datetime.strptime(str(date_str), "%Y-%m-%d").date()
-        hour = int(str(hour_str).split(":")[0])
-        url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={LAT}&longitude={LON}"
-            f"&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,weathercode"
-            f"&start_date={date}&end_date={date}&timezone=Europe/Madrid"
-        )
-        response = requests.get(url)
-        data = response.json()
-        temps = data["hourly"]["temperature_2m"]
-        hums = data["hourly"]["relative_humidity_2m"]
-        feels = data["hourly"]["apparent_temperature"]
-        codes = data["hourly"]["weathercode"]
-        hours = data["hourly"]["time"]
-
-        for i, t in enumerate(hours):
-            if f"T{hour:02d}:00" in t:
-                weather_cache[key] = (temps[i], hums[i], feels[i], codes[i])
-                return weather_cache[key]
-    except:
-        weather_cache[key] = (None, None, None, None)
-        return weather_cache[key]
-
-# Asignar clima solo a filas faltantes
-for idx, row in df_missing.iterrows():
-    fecha, hora = row["fecha"], row["hora"]
-    df.loc[idx, ["temperatura","humedad","sensacion_termica","codigo_clima"]] = get_weather_for_hour(fecha, hora)
-
-df.to_csv(ENRICHED_FILE, index=False, encoding="utf-8-sig")
-print(f"✅ Weather enrichment completado → {ENRICHED_FILE}")
+        fecha = pd.Timestamp(date_str).strftime("%Y-%m-%d")
+        key = (fecha, _hour_of(hour_str))
+    except (ValueError, TypeError):
+        return SIN_DATOS
+    if key not in weather_cache:
+        ensure_weather([fecha])
+    return weather_cache.get(key, SIN_DATOS)
+
+
+def prefetch_weather(df):
+    """Precarga en la cache el clima de todos los días de ``df`` (una petición como mucho).
+
+    Permite solapar la llamada HTTP con la lectura del histórico.
+    """
+    store = ensure_weather(df["fecha"].unique() if not df.empty else [])
+    print(f"🌐 Clima precargado: {store.summary()} ({http_requests} peticiones desde el arranque)")
+
+
+def weather_table(fechas, horas):
+    """Tabla de clima para pares (fecha, hora entera) distintos, leída de la cache."""
+    valores = [weather_cache.get((f, int(h)), SIN_DATOS) for f, h in zip(fechas, horas)]
+    table = pd.DataFrame(valores, columns=WEATHER_COLS, dtype="float64")
+    table.insert(0, "fecha", list(fechas))
+    table.insert(1, "hora_clima", list(horas))
+    return table
+
+
+def add_weather(df):
+    """Rellena las columnas de clima de las filas que todavía no las tienen.
+
+    Se construye la tabla de clima solo para las (fecha, hora) distintas y se
+    une con un único merge, en lugar de escribir fila a fila.
+    """
+    df = df.copy()
+
+    # Crear columnas si no existen
+    for col in WEATHER_COLS:
+        if col not in df.columns:
+            df[col] = np.nan
+        elif not pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    # Filtrar solo filas que faltan datos de clima
+    missing = df["temperatura"].isna().to_numpy()
+    if not missing.any():
+        return df
+    # Fechas normalizadas a "YYYY-MM-DD" parseando solo los valores distintos (-1 = nulo → None)
+    codigos, distintas = pd.factorize(df.loc[missing, "fecha"])
+    fechas = np.append(pd.to_datetime(pd.Series(distintas)).dt.strftime("%Y-%m-%d").to_numpy(), None)[codigos]
+    claves = pd.DataFrame({"fecha": fechas,
+                           "hora_clima": (slot_keys.hora_minutes(df.loc[missing, "hora"]) // 60).to_numpy()})
+    store = ensure_weather(distintas)
+
+    # Asignar clima solo a filas faltantes: una tabla por (fecha, hora) distinta y un merge
+    unicas = claves.dropna().drop_duplicates()
+    table = weather_table(unicas["fecha"], unicas["hora_clima"])
+    unidas = claves.merge(table, on=["fecha", "hora_clima"], how="left")
+    df.loc[missing, WEATHER_COLS] = unidas[WEATHER_COLS].to_numpy()
+
+    print(f"🌦️ Clima: {int(missing.sum())} filas ({len(unicas)} horas distintas), {store.summary()} "
+          f"({http_requests} peticiones desde el arranque)")
+    return df
+
+
+def main():
+    df = add_weather(pd.read_csv(ENRICHED_FILE))
+
+    df.to_csv(ENRICHED_FILE, index=False, encoding="utf-8-sig")
+    print(f"✅ Weather enrichment completado → {ENRICHED_FILE}")
+
+
+if __name__ == "__main__":
+    main()
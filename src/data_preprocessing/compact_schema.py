@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+# Esquema compacto de los DataFrames de tiempos de espera:
+#   - textos repetidos (zona, atracción, día, temporada) → category
+#   - indicadores 0/1 (abierta, fin_de_semana, es_*, is_*) → int8
+#   - tiempo de espera (minutos) → int16, siempre, para que no cambie de un lote a otro
+#   - otros enteros (códigos, mes, hora...) → el entero más pequeño que los contiene
+#   - medidas en coma flotante (clima, estadísticas) → float32
+CATEGORY_COLS = ["zona", "atraccion", "dia_semana", "temporada"]
+FLAG_COLS = ["abierta", "fin_de_semana"]
+FLAG_PREFIXES = ("es_", "is_")
+INT16_COLS = ["tiempo_espera"]
+_FLAG_VALUES = {True: 1, False: 0, "True": 1, "False": 0, "true": 1, "false": 0}
+
+
+def is_flag(col):
+    return col in FLAG_COLS or col.startswith(FLAG_PREFIXES)
+
+
+def _flag(s):
+    """Indicador como int8; si tiene nulos o valores raros se deja como está."""
+    if pd.api.types.is_bool_dtype(s):
+        return s.astype("int8") if not s.isna().any() else s
+    if s.dtype == object:
+        valores = s.map(_FLAG_VALUES)
+        return valores.astype("int8") if valores.notna().all() else s
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iu":
+        return pd.to_numeric(s, downcast="integer")
+    return s
+
+
+def compact(df, flags=True):
+    """Devuelve ``df`` con el esquema compacto (el original no se modifica).
+
+    Solo se cambian columnas de tipos conocidos; las columnas de tipo
+    extensión (``Int32``, ``string``...) y los textos libres (fecha,
+    hora) se dejan igual. Con ``flags=False`` los indicadores conservan
+    su tipo (p. ej. para CSV que ya tienen True/False escritos).
+    """
+    # Copia superficial: cada columna convertida cambia de tipo, así que se
+    # sustituye en la copia sin tocar los bloques del original
+    df = df.copy(deep=False)
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORY_COLS and not pd.api.types.is_numeric_dtype(s):
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                df[col] = s.astype("category")
+        elif is_flag(col):
+            if flags:
+                df[col] = _flag(s)
+        elif isinstance(s.dtype, np.dtype) and s.dtype.kind in "iu":
+            df[col] = s.astype("int16") if col in INT16_COLS else pd.to_numeric(s, downcast="integer")
+        elif s.dtype == np.float64:
+            df[col] = s.astype("float32")
+    return df
+
+
+def memory_mb(df):
+    """Memoria del DataFrame (incluidos los textos) en MB."""
+    return df.memory_usage(deep=True).sum() / 1e6
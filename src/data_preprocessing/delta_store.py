@@ -0,0 +1,350 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import raw_snapshots
+
+# Snapshots codificados por diferencias:
+#   rides.parquet                      código → (zona, atraccion)
+#   ticks/part-<fecha>-<n>.parquet     tick, timestamp, ultima_actualizacion, keyframe
+#   deltas/part-<fecha>-<n>.parquet    tick, ride, tiempo_espera, abierta, ultima_actualizacion
+#                                      (solo lo que cambia)
+#   estado.npz                         último tick guardado y estado de cada atracción
+# Cada append escribe un part por día; compact_parts funde los días cerrados en un
+# part por mes (part-<mes>-<n>.parquet).
+DELTA_DIR = os.path.join("data", "history", "snapshots_delta")
+STATE_FILE = "estado.npz"
+# Cada KEYFRAME_EVERY ticks se guarda el estado completo (≈ un día a 15 min)
+KEYFRAME_EVERY = 96
+
+# Columnas enteras casi monótonas: codificación por diferencias de Parquet + zstd
+TICKS_ENCODING = {"tick": "DELTA_BINARY_PACKED", "timestamp": "DELTA_BINARY_PACKED",
+                  "ultima_actualizacion": "DELTA_BINARY_PACKED", "keyframe": "PLAIN"}
+DELTAS_ENCODING = {"tick": "DELTA_BINARY_PACKED", "ride": "PLAIN",
+                   "tiempo_espera": "PLAIN", "abierta": "PLAIN",
+                   "ultima_actualizacion": "DELTA_BINARY_PACKED"}
+
+# Valores especiales en la matriz de estado
+AUSENTE = -1       # abierta = -1: la atracción no aparece en el snapshot
+SIN_ESPERA = -1    # tiempo_espera nulo
+
+
+def _part_files(path):
+    return sorted(f for f in os.listdir(path) if f.endswith(".parquet")) if os.path.isdir(path) else []
+
+
+def _read_dir(path):
+    dfs = [pd.read_parquet(os.path.join(path, f)) for f in _part_files(path)]
+    return pd.concat(dfs, ignore_index=True) if dfs else None
+
+
+def read_store(root=DELTA_DIR):
+    """Devuelve (rides, ticks, deltas); None si el almacén está vacío."""
+    rides_path = os.path.join(root, "rides.parquet")
+    if not os.path.exists(rides_path):
+        return None
+    # Sin duplicados por si una compactación se interrumpió antes de borrar los parts fundidos
+    ticks = _read_dir(os.path.join(root, "ticks")).drop_duplicates(subset=["tick"])
+    deltas = _read_dir(os.path.join(root, "deltas")).drop_duplicates(subset=["tick", "ride"], ignore_index=True)
+    if "ultima_actualizacion" not in deltas.columns:
+        # Almacenes anteriores: solo el valor del tick
+        deltas["ultima_actualizacion"] = pd.Series(pd.NaT, index=deltas.index, dtype="datetime64[ns, UTC]")
+    return pd.read_parquet(rides_path), ticks.sort_values("tick", ignore_index=True), deltas
+
+
+def _save_state(root, tick, timestamp, wait, open_):
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, tick=np.int64(tick), timestamp=np.datetime64(timestamp, "ns"), wait=wait, open=open_)
+    os.replace(path + ".tmp", path)
+
+
+def _load_state(root, rides):
+    """Último tick guardado: (tick, timestamp, espera, abierta) por código de atracción.
+
+    Se lee de ``estado.npz``; si no existe (almacenes anteriores) se decodifica
+    el último tick una sola vez.
+    """
+    path = os.path.join(root, STATE_FILE)
+    if os.path.exists(path):
+        with np.load(path) as state:
+            return int(state["tick"]), pd.Timestamp(state["timestamp"][()]), state["wait"], state["open"]
+    store = read_store(root)
+    _, ticks, deltas = store
+    last_ts = ticks["timestamp"].max()
+    last = decode(root=root, start=last_ts, store=(rides, ticks, deltas))
+    code_of = pd.Series(rides["ride"].to_numpy(), index=pd.MultiIndex.from_frame(rides[["zona", "atraccion"]]))
+    wait = np.full(len(rides), SIN_ESPERA, dtype=np.int16)
+    open_ = np.full(len(rides), AUSENTE, dtype=np.int8)
+    idx = code_of.reindex(pd.MultiIndex.from_frame(last[["zona", "atraccion"]])).to_numpy()
+    wait[idx] = last["tiempo_espera"].fillna(SIN_ESPERA).to_numpy(dtype=np.int16)
+    open_[idx] = last["abierta"].to_numpy(dtype=np.int8)
+    return int(ticks["tick"].max()), last_ts, wait, open_
+
+
+def _state_matrices(snapshots, ride_codes, tick_of_ts, n_ticks, n_rides):
+    """Matrices densas (ticks × atracciones) de espera y apertura."""
+    wait = np.full((n_ticks, n_rides), SIN_ESPERA, dtype=np.int16)
+    open_ = np.full((n_ticks, n_rides), AUSENTE, dtype=np.int8)
+    rows = tick_of_ts.reindex(snapshots["timestamp"]).to_numpy()
+    cols = ride_codes
+    wait[rows, cols] = snapshots["tiempo_espera"].fillna(SIN_ESPERA).to_numpy(dtype=np.int16)
+    open_[rows, cols] = snapshots["abierta"].astype(str).str.lower().eq("true").to_numpy(dtype=np.int8)
+    return wait, open_
+
+
+def _write_part(root, sub, df, fecha, first_tick, encoding):
+    path = os.path.join(root, sub)
+    os.makedirs(path, exist_ok=True)
+    out = os.path.join(path, f"part-{fecha}-{first_tick:09d}.parquet")
+    # Un part por día: sin metadatos de pandas/arrow ni estadísticas el pie
+    # pasa de ~3 KB a <1 KB, que es lo que pesa un día de deltas
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    pq.write_table(table, out + ".tmp", compression="zstd", use_dictionary=False,
+                   column_encoding=encoding, store_schema=False, write_statistics=False)
+    os.replace(out + ".tmp", out)
+
+
+def append_snapshots(snapshots, root=DELTA_DIR, keyframe_every=KEYFRAME_EVERY):
+    """Codifica y añade snapshots (tabla larga con ``timestamp``) al almacén.
+
+    Solo se guardan las tuplas (atracción, espera, abierta) que cambian
+    respecto al tick anterior, salvo en los keyframes, que guardan el estado
+    completo. ``ultima_actualizacion`` se guarda por tick (la más reciente) y,
+    en la fila de la atracción, solo cuando difiere de la del tick. El estado
+    previo sale de ``estado.npz``: no se relee el almacén. Los instantes ya
+    guardados se ignoran. Devuelve el nº de ticks añadidos.
+    """
+    rides_path = os.path.join(root, "rides.parquet")
+    if os.path.exists(rides_path):
+        rides = pd.read_parquet(rides_path)
+        last_tick, last_ts, prev_wait, prev_open = _load_state(root, rides)
+        snapshots = snapshots[snapshots["timestamp"] > last_ts]
+        first_tick = last_tick + 1
+    else:
+        rides = pd.DataFrame({"ride": pd.Series(dtype=np.int16), "zona": pd.Series(dtype=object),
+                              "atraccion": pd.Series(dtype=object)})
+        prev_wait = np.empty(0, dtype=np.int16)
+        prev_open = np.empty(0, dtype=np.int8)
+        first_tick = 0
+    if snapshots.empty:
+        return 0
+    snapshots = snapshots.drop_duplicates(subset=["timestamp", "atraccion"], keep="last")
+
+    # Atracciones nuevas: códigos a continuación de los existentes
+    known = set(zip(rides["zona"], rides["atraccion"]))
+    nuevas = snapshots[["zona", "atraccion"]].drop_duplicates()
+    nuevas = nuevas[[k not in known for k in zip(nuevas["zona"], nuevas["atraccion"])]]
+    if not nuevas.empty:
+        nuevas = nuevas.assign(ride=np.arange(len(rides), len(rides) + len(nuevas), dtype=np.int16))
+        rides = pd.concat([rides, nuevas[["ride", "zona", "atraccion"]]], ignore_index=True)
+    code_of = pd.Series(rides["ride"].to_numpy(), index=pd.MultiIndex.from_frame(rides[["zona", "atraccion"]]))
+    ride_codes = code_of.reindex(pd.MultiIndex.from_frame(snapshots[["zona", "atraccion"]])).to_numpy()
+
+    timestamps = np.sort(snapshots["timestamp"].unique())
+    n_ticks, n_rides = len(timestamps), len(rides)
+    tick_of_ts = pd.Series(np.arange(n_ticks), index=timestamps)
+    wait, open_ = _state_matrices(snapshots, ride_codes, tick_of_ts, n_ticks, n_rides)
+
+    # Estado previo: último tick guardado (o todo ausente), ampliado con las atracciones nuevas
+    prev_wait = np.concatenate([prev_wait, np.full(n_rides - len(prev_wait), SIN_ESPERA, dtype=np.int16)])
+    prev_open = np.concatenate([prev_open, np.full(n_rides - len(prev_open), AUSENTE, dtype=np.int8)])
+
+    # ultima_actualizacion: la del tick y las atracciones que no coinciden con ella
+    if "ultima_actualizacion" in snapshots.columns:
+        ultima = pd.to_datetime(snapshots["ultima_actualizacion"], utc=True, errors="coerce")
+    else:
+        ultima = pd.Series(pd.NaT, index=snapshots.index, dtype="datetime64[ns, UTC]")
+    ultima_tick = ultima.groupby(snapshots["timestamp"]).max().reindex(timestamps)
+    rows = tick_of_ts.reindex(snapshots["timestamp"]).to_numpy()
+    ultima_ride = np.full((n_ticks, n_rides), np.datetime64("NaT"), dtype="datetime64[ns]")
+    ultima_ride[rows, ride_codes] = ultima.dt.tz_localize(None).to_numpy()
+    tick_value = ultima_tick.dt.tz_localize(None).to_numpy()[:, None]
+    distinta = ~np.isnat(ultima_ride) & (ultima_ride != tick_value) & (open_ != AUSENTE)
+
+    tick_ids = first_tick + np.arange(n_ticks)
+    keyframe = tick_ids % keyframe_every == 0
+    before_wait = np.vstack([prev_wait, wait[:-1]])
+    before_open = np.vstack([prev_open, open_[:-1]])
+    changed = (wait != before_wait) | (open_ != before_open) | distinta
+    changed |= keyframe[:, None] & (open_ != AUSENTE)
+    t_idx, r_idx = np.nonzero(changed)
+
+    deltas = pd.DataFrame({
+        "tick": tick_ids[t_idx].astype(np.int32),
+        "ride": r_idx.astype(np.int16),
+        "tiempo_espera": wait[t_idx, r_idx],
+        "abierta": open_[t_idx, r_idx],
+        "ultima_actualizacion": pd.to_datetime(
+            np.where(distinta[t_idx, r_idx], ultima_ride[t_idx, r_idx], np.datetime64("NaT"))).tz_localize("UTC"),
+    })
+    new_ticks = pd.DataFrame({
+        "tick": tick_ids.astype(np.int32),
+        "timestamp": timestamps,
+        "ultima_actualizacion": ultima_tick.to_numpy(),
+        "keyframe": keyframe,
+    })
+
+    # Un part por día; el estado se guarda al final, cuando los parts ya están escritos
+    os.makedirs(root, exist_ok=True)
+    dia_tick = pd.DatetimeIndex(timestamps).strftime("%Y-%m-%d").to_numpy()
+    dia_delta = dia_tick[t_idx]
+    for fecha in np.unique(dia_tick):
+        en_dia = dia_tick == fecha
+        _write_part(root, "deltas", deltas[dia_delta == fecha], fecha, int(tick_ids[en_dia][0]), DELTAS_ENCODING)
+        _write_part(root, "ticks", new_ticks[en_dia], fecha, int(tick_ids[en_dia][0]), TICKS_ENCODING)
+    rides.to_parquet(rides_path + ".tmp", index=False)
+    os.replace(rides_path + ".tmp", rides_path)
+    _save_state(root, tick_ids[-1], timestamps[-1], wait[-1], open_[-1])
+    return n_ticks
+
+
+def compact_parts(root=DELTA_DIR, hoy=None):
+    """Funde los parts de los días cerrados (anteriores a ``hoy``) en uno por mes.
+
+    Los ticks de hoy siguen en sus parts diarios; al cerrarse el día se suman
+    al part del mes. Como ``history_store.compact_partitions``, no debe
+    coincidir con un ``append_snapshots`` sobre el mismo almacén. Devuelve los
+    meses compactados.
+    """
+    hoy = (hoy or pd.Timestamp.today()).strftime("%Y-%m-%d")
+    compactados = set()
+    for sub, encoding in (("ticks", TICKS_ENCODING), ("deltas", DELTAS_ENCODING)):
+        path = os.path.join(root, sub)
+        por_mes = {}
+        for f in _part_files(path):
+            # part-<fecha>-<tick> (día) o part-<mes>-<tick> (ya compactado); los parts
+            # sin fecha de almacenes anteriores se dejan tal cual
+            partes = f[len("part-"):-len(".parquet")].rsplit("-", 1)
+            if len(partes) != 2 or len(partes[0]) not in (7, 10):
+                continue
+            if len(partes[0]) == 10 and partes[0] >= hoy:
+                continue
+            por_mes.setdefault(partes[0][:7], []).append(f)
+        for mes, files in por_mes.items():
+            if len(files) < 2:
+                continue
+            df = pd.concat([pd.read_parquet(os.path.join(path, f)) for f in files], ignore_index=True)
+            df = df.sort_values("tick", kind="stable", ignore_index=True)
+            first_tick = int(df["tick"].iloc[0])
+            _write_part(root, sub, df, mes, first_tick, encoding)
+            for f in files:
+                if f != f"part-{mes}-{first_tick:09d}.parquet":
+                    os.remove(os.path.join(path, f))
+            compactados.add(mes)
+    return sorted(compactados)
+
+
+def decode(root=DELTA_DIR, start=None, end=None, store=None):
+    """Reconstruye los snapshots completos entre ``start`` y ``end`` (incluidos).
+
+    Parte del último keyframe anterior a ``start`` y propaga hacia delante
+    el último valor de cada atracción (ffill vectorizado sobre la matriz
+    ticks × atracciones). Con solo ``start`` devuelve el snapshot vigente
+    en ese instante. ``ultima_actualizacion`` es la del tick salvo en las
+    atracciones que guardan la suya en ese mismo tick.
+    """
+    store = store or read_store(root)
+    if store is None:
+        return pd.DataFrame()
+    rides, ticks, deltas = store
+    ts = ticks["timestamp"].to_numpy()
+
+    if start is None:
+        t0 = 0
+    else:
+        # Tick vigente en ``start``: el último con timestamp <= start
+        t0 = max(int(np.searchsorted(ts, np.datetime64(pd.Timestamp(start)), side="right")) - 1, 0)
+    if end is None:
+        t1 = len(ticks) - 1 if start is None else t0
+    else:
+        t1 = int(np.searchsorted(ts, np.datetime64(pd.Timestamp(end)), side="right")) - 1
+    if t1 < t0:
+        return pd.DataFrame()
+
+    tick_ids = ticks["tick"].to_numpy()
+    keyframes = np.nonzero(ticks["keyframe"].to_numpy()[:t0 + 1])[0]
+    k0 = keyframes[-1] if len(keyframes) else 0
+    lo, hi = tick_ids[k0], tick_ids[t1]
+
+    sel = deltas[(deltas["tick"] >= lo) & (deltas["tick"] <= hi)]
+    n_rows, n_rides = hi - lo + 1, len(rides)
+    rows = sel["tick"].to_numpy() - lo
+    cols = sel["ride"].to_numpy()
+
+    # Posición de la última entrada de cada atracción hasta cada tick
+    last_row = np.full((n_rows, n_rides), -1, dtype=np.int64)
+    last_row[rows, cols] = rows
+    last_row = np.maximum.accumulate(last_row, axis=0)
+    wait_at = np.full((n_rows, n_rides), SIN_ESPERA, dtype=np.int16)
+    open_at = np.full((n_rows, n_rides), AUSENTE, dtype=np.int8)
+    wait_at[rows, cols] = sel["tiempo_espera"].to_numpy()
+    open_at[rows, cols] = sel["abierta"].to_numpy()
+
+    col_idx = np.broadcast_to(np.arange(n_rides), (n_rows, n_rides))
+    has = last_row >= 0
+    wait = np.where(has, wait_at[np.where(has, last_row, 0), col_idx], SIN_ESPERA)
+    open_ = np.where(has, open_at[np.where(has, last_row, 0), col_idx], AUSENTE)
+
+    # Solo los ticks pedidos y las atracciones presentes
+    first = tick_ids[t0] - lo
+    wait, open_ = wait[first:], open_[first:]
+    t_idx, r_idx = np.nonzero(open_ != AUSENTE)
+    tick_rows = ticks.set_index("tick").loc[tick_ids[t0:t1 + 1]]
+    ultima = pd.Series(tick_rows["ultima_actualizacion"].array.take(t_idx))
+    propia = sel[sel["ultima_actualizacion"].notna() & (sel["tick"] >= tick_ids[t0])]
+    if not propia.empty:
+        clave = pd.Series(t_idx * n_rides + r_idx)
+        propia_clave = (propia["tick"].to_numpy() - tick_ids[t0]).astype(np.int64) * n_rides + propia["ride"].to_numpy()
+        valor = pd.Series(propia["ultima_actualizacion"].array, index=propia_clave)
+        ultima = clave.map(valor).fillna(ultima)
+    out = pd.DataFrame({
+        "zona": rides["zona"].to_numpy()[r_idx],
+        "atraccion": rides["atraccion"].to_numpy()[r_idx],
+        "tiempo_espera": pd.array(wait[t_idx, r_idx], dtype="Int16"),
+        "abierta": open_[t_idx, r_idx] == 1,
+        "ultima_actualizacion": ultima.array,
+        "timestamp": tick_rows["timestamp"].array.take(t_idx),
+    })
+    out.loc[out["tiempo_espera"] == SIN_ESPERA, "tiempo_espera"] = pd.NA
+    return out
+
+
+def store_size(root=DELTA_DIR):
+    """Bytes ocupados por el almacén en disco."""
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén de snapshots codificados por diferencias")
+    parser.add_argument("--root", default=DELTA_DIR)
+    parser.add_argument("--encode", dest="raw_dir", help="codifica los snapshots crudos de este directorio")
+    parser.add_argument("--at", help="muestra el snapshot vigente en este instante")
+    args = parser.parse_args()
+
+    if args.raw_dir:
+        start = time.perf_counter()
+        n = append_snapshots(raw_snapshots.load_snapshots(args.raw_dir), args.root)
+        print(f"✅ {n} ticks codificados en {time.perf_counter() - start:.2f}s → {args.root} "
+              f"({store_size(args.root) / 1024:.1f} KB)")
+    elif args.at:
+        print(decode(args.root, start=args.at).to_string())
+    else:
+        store = read_store(args.root)
+        if store is None:
+            print(f"📂 Almacén vacío: {args.root}")
+        else:
+            rides, ticks, deltas = store
+            print(f"📂 {len(ticks)} ticks, {len(rides)} atracciones, {len(deltas)} deltas en {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import argparse
+from datetime import date, datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.weather_store import WeatherStore, WEATHER_STORE_FILE, fetch_open_meteo, HOURLY_VARS
+
+# Previsión horaria de open-meteo para autocompletar el clima del formulario de app.py.
+# open-meteo da hasta 16 días de previsión (hoy incluido).
+HORIZON_DAYS = 16
+# Cache en memoria del proceso: las interacciones con la página no tocan ni el disco
+MEMO_TTL_S = 30 * 60
+
+
+def categoria_clima(codigo):
+    """Código WMO de open-meteo → escala 1-5 del formulario y de predict.py."""
+    codigo = int(codigo)
+    if codigo <= 1:
+        return 1  # despejado
+    if codigo == 2:
+        return 2  # parcialmente nublado
+    if codigo in (3, 45, 48):
+        return 3  # nublado / niebla
+    if codigo in (65, 67, 75, 82, 86) or codigo >= 95:
+        return 5  # lluvia o nieve fuerte, tormenta
+    return 4  # llovizna, lluvia o nieve ligera
+
+
+def synthetic_fetcher(temperatura=22.0, humedad=60.0, sensacion_termica=22.0, codigo=2):
+    """Fetcher sin red con valores fijos para cada hora (pruebas y demos)."""
+    def fetch(start, end, url=None, lat=None, lon=None):
+        dias = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+        horas = [datetime.fromisoformat(start) + timedelta(hours=h) for h in range(24 * dias)]
+        valores = [temperatura, humedad, sensacion_termica, codigo]
+        hourly = {"time": [h.strftime("%Y-%m-%dT%H:00") for h in horas]}
+        hourly.update({var: [valor] * len(horas) for var, valor in zip(HOURLY_VARS, valores)})
+        return hourly
+    return fetch
+
+
+class ForecastProvider:
+    """Clima previsto para una fecha y hora, con dos niveles de cache.
+
+    - Memoria (``memo_ttl_s``): repetir la consulta no cuesta nada.
+    - Disco (``WeatherStore``, con el TTL de la previsión): sobrevive a
+      reinicios de la app.
+
+    La primera consulta de un día dentro del horizonte trae los 16 días
+    de previsión en una sola petición. ``fetcher``/``url`` permiten
+    usar un stub local (``synthetic_fetcher`` o benchmarks/replay_server.py).
+    """
+
+    def __init__(self, store_path=WEATHER_STORE_FILE, url=None, fetcher=fetch_open_meteo,
+                 memo_ttl_s=MEMO_TTL_S, today=date.today, clock=time.monotonic):
+        self.store = WeatherStore(store_path, fetcher=fetcher)
+        self.url = url
+        self.memo_ttl_s = memo_ttl_s
+        self.today = today
+        self.clock = clock
+        self.memo = {}
+        self.stats = {"memoria": 0, "disco_o_red": 0}
+
+    def _load(self, fecha):
+        hoy = self.today()
+        if hoy <= fecha < hoy + timedelta(days=HORIZON_DAYS):
+            dias = [(hoy + timedelta(days=i)).isoformat() for i in range(HORIZON_DAYS)]
+        else:
+            dias = [fecha.isoformat()]
+        horas = self.store.hourly(dias, url=self.url)
+        caduca = self.clock() + self.memo_ttl_s
+        for dia in dias:
+            self.memo[dia] = (caduca, {h: v for (d, h), v in horas.items() if d == dia})
+
+    def for_hour(self, fecha, hora):
+        """Clima previsto para ``fecha`` (date) a la hora ``hora`` (0-23).
+
+        Devuelve {"temperatura", "humedad", "sensacion_termica", "codigo_clima"}
+        con ``codigo_clima`` en la escala 1-5, o None si no hay previsión
+        (fecha más allá del horizonte o fallo de red sin copia en disco).
+        """
+        if fecha >= self.today() + timedelta(days=HORIZON_DAYS):
+            return None
+        memo = self.memo.get(fecha.isoformat())
+        if memo is not None and memo[0] > self.clock():
+            self.stats["memoria"] += 1
+        else:
+            self.stats["disco_o_red"] += 1
+            self._load(fecha)
+        valores = self.memo[fecha.isoformat()][1].get(int(hora))
+        if valores is None or any(v is None for v in valores):
+            return None
+        temperatura, humedad, sensacion, codigo = valores
+        return {"temperatura": temperatura, "humedad": humedad,
+                "sensacion_termica": sensacion, "codigo_clima": categoria_clima(codigo)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Previsión del clima para una fecha y hora")
+    parser.add_argument("fecha", help="YYYY-MM-DD")
+    parser.add_argument("hora", type=int, help="0-23")
+    parser.add_argument("--url", help="open-meteo o un servidor local")
+    args = parser.parse_args()
+
+    provider = ForecastProvider(url=args.url)
+    prevision = provider.for_hour(date.fromisoformat(args.fecha), args.hora)
+    print(f"🌤️ {prevision}" if prevision else "❌ Sin previsión para esa fecha y hora")
+    print(f"   {provider.store.summary()}")
+
+
+if __name__ == "__main__":
+    main()
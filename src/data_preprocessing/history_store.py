@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import slot_keys
+from src.data_preprocessing import compact_schema
+from src.data_preprocessing import holiday_calendar
+
+# Histórico de tiempos de espera particionado por fecha (estilo Hive):
+#   data/history/tiempos/fecha=2025-10-16/part-0.parquet
+HISTORY_DIR = os.path.join("data", "history", "tiempos")
+PARTITION_COL = "fecha"
+# Columnas obligatorias de cada fila; la deduplicación usa las claves enteras (slot, atraccion_id)
+REQUIRED_COLS = ["fecha", "hora", "atraccion"]
+KEY_COLS = slot_keys.KEY_COLS
+
+
+def _partition_dir(root, fecha):
+    return os.path.join(root, f"{PARTITION_COL}={fecha}")
+
+
+def list_partitions(root=HISTORY_DIR):
+    """Fechas (YYYY-MM-DD) presentes en el histórico, ordenadas."""
+    if not os.path.isdir(root):
+        return []
+    prefix = f"{PARTITION_COL}="
+    return sorted(d[len(prefix):] for d in os.listdir(root) if d.startswith(prefix))
+
+
+def _normalize(df):
+    df = slot_keys.add_keys(df, add=True)
+    df[PARTITION_COL] = pd.to_datetime(df[PARTITION_COL]).dt.strftime("%Y-%m-%d")
+    df["hora"] = df["hora"].astype(str)
+    return df
+
+
+def _write_partition(root, fecha, df):
+    """Escribe ``df`` como único fichero (part-0) de la partición."""
+    part_dir = _partition_dir(root, fecha)
+    os.makedirs(part_dir, exist_ok=True)
+    path = os.path.join(part_dir, "part-0.parquet")
+    tmp_path = path + ".tmp"
+    compact_schema.compact(df.drop(columns=[PARTITION_COL])).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    # Restos de escrituras anteriores con otro nombre de fichero
+    for f in os.listdir(part_dir):
+        if f.endswith(".parquet") and f != "part-0.parquet":
+            os.remove(os.path.join(part_dir, f))
+
+
+def _read_partition(root, fecha, columns=None):
+    part_dir = _partition_dir(root, fecha)
+    files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+    if columns is not None:
+        columns = [c for c in columns if c != PARTITION_COL]
+    dfs = [pd.read_parquet(os.path.join(part_dir, f), columns=columns) for f in files]
+    df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=columns)
+    df.insert(0, PARTITION_COL, fecha)
+    return df
+
+
+def read_history(root=HISTORY_DIR, start=None, end=None, columns=None):
+    """Lee el histórico entre ``start`` y ``end`` (incluidos) sin abrir el resto de particiones.
+
+    ``start``/``end`` aceptan cualquier valor que entienda ``pd.Timestamp``.
+    ``columns`` limita las columnas leídas de cada fichero. El resultado
+    sigue el esquema compacto de ``compact_schema``.
+    """
+    fechas = list_partitions(root)
+    if start is not None:
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        fechas = [f for f in fechas if f >= start]
+    if end is not None:
+        end = pd.Timestamp(end).strftime("%Y-%m-%d")
+        fechas = [f for f in fechas if f <= end]
+    if not fechas:
+        return pd.DataFrame(columns=columns)
+    return compact_schema.compact(pd.concat([_read_partition(root, f, columns) for f in fechas], ignore_index=True))
+
+
+def read_partitions(fechas, root=HISTORY_DIR):
+    """Lee solo las particiones indicadas (las que no existen se ignoran)."""
+    existentes = set(list_partitions(root))
+    dfs = [_read_partition(root, f) for f in sorted(set(fechas)) if f in existentes]
+    return pd.concat(dfs, ignore_index=True) if dfs else None
+
+
+def write_partitions(df, root=HISTORY_DIR):
+    """Fusiona ``df`` con las particiones que toca y reescribe solo esas particiones.
+
+    Ante claves repetidas (slot, atraccion_id) gana la fila de ``df``.
+    Devuelve la lista de fechas escritas.
+    """
+    if df is None or df.empty:
+        return []
+    df = _normalize(df)
+    fechas = sorted(df[PARTITION_COL].unique())
+
+    for fecha in fechas:
+        nuevas = df[df[PARTITION_COL] == fecha]
+        if os.path.isdir(_partition_dir(root, fecha)):
+            nuevas = pd.concat([_read_partition(root, fecha), nuevas], ignore_index=True)
+        _write_partition(root, fecha, slot_keys.dedupe(nuevas))
+
+    return fechas
+
+
+def replace_partition(df, fecha, root=HISTORY_DIR):
+    """Sustituye por completo el contenido de una partición (p. ej. en migraciones)."""
+    _write_partition(root, fecha, _normalize(df))
+
+
+def append_rows(df, root=HISTORY_DIR):
+    """Añade ``df`` como un fichero nuevo en cada partición, sin leer lo ya guardado.
+
+    Pensado para filas ya filtradas por el índice de claves (sin duplicados
+    con el histórico). Cada tick deja un fichero pequeño por partición;
+    ``compact_partitions`` (una vez al día) los vuelve a fundir en part-0.
+    Devuelve la lista de fechas escritas.
+    """
+    if df is None or df.empty:
+        return []
+    df = _normalize(df)
+    fechas = sorted(df[PARTITION_COL].unique())
+    sufijo = time.time_ns()
+
+    for fecha in fechas:
+        part_dir = _partition_dir(root, fecha)
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"part-{sufijo}.parquet")
+        tmp_path = path + ".tmp"
+        filas = df[df[PARTITION_COL] == fecha].drop(columns=[PARTITION_COL])
+        compact_schema.compact(filas).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    return fechas
+
+
+def compact_partitions(root=HISTORY_DIR):
+    """Funde en un único part-0 las particiones con varios ficheros de ``append_rows``.
+
+    No debe coincidir con una escritura en el mismo histórico (el scheduler
+    la ejecuta en el propio job, después del pipeline). Devuelve las fechas
+    compactadas.
+    """
+    compactadas = []
+    for fecha in list_partitions(root):
+        part_dir = _partition_dir(root, fecha)
+        if sum(f.endswith(".parquet") for f in os.listdir(part_dir)) > 1:
+            _write_partition(root, fecha, slot_keys.dedupe(_read_partition(root, fecha)))
+            compactadas.append(fecha)
+    return compactadas
+
+
+def import_csv(csv_path, root=HISTORY_DIR):
+    """Migración única: vuelca un CSV histórico completo al almacén particionado."""
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=REQUIRED_COLS)
+    # Los CSV antiguos traen la temporada como texto ("alta"/"media"/"baja"): se
+    # recalcula con el mismo calendario que la ingesta
+    df = holiday_calendar.attach(df)
+    fechas = write_partitions(df, root)
+    print(f"✅ Importadas {len(df)} filas de {csv_path} en {len(fechas)} particiones → {root}")
+    return fechas
+
+
+def ensure_bootstrapped(csv_path, root=HISTORY_DIR):
+    """Si el almacén está vacío y existe el CSV histórico, lo importa."""
+    if not list_partitions(root) and os.path.exists(csv_path):
+        import_csv(csv_path, root)
+
+
+def export_csv(csv_path, root=HISTORY_DIR, start=None, end=None):
+    """Exporta el histórico (o un rango de fechas) a un único CSV."""
+    df = read_history(root, start=start, end=end)
+    df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    print(f"✅ Exportadas {len(df)} filas → {csv_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén histórico particionado por fecha")
+    parser.add_argument("--root", default=HISTORY_DIR)
+    parser.add_argument("--import", dest="import_path", help="CSV a importar al almacén")
+    parser.add_argument("--export", dest="export_path", help="CSV de salida con el histórico")
+    parser.add_argument("--compact", action="store_true", help="funde los ficheros de cada partición en uno")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    args = parser.parse_args()
+
+    if args.import_path:
+        import_csv(args.import_path, args.root)
+    elif args.export_path:
+        export_csv(args.export_path, args.root, args.start, args.end)
+    elif args.compact:
+        fechas = compact_partitions(args.root)
+        print(f"🗜️ {len(fechas)} particiones compactadas en {args.root}")
+    else:
+        fechas = list_partitions(args.root)
+        print(f"📂 {len(fechas)} particiones en {args.root}" + (f" ({fechas[0]} → {fechas[-1]})" if fechas else ""))
+
+
+if __name__ == "__main__":
+    main()
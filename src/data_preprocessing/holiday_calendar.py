@@ -0,0 +1,163 @@
+import argparse
+import datetime as dt
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Calendario de días del parque (Parque Warner, Comunidad de Madrid):
+# festivos, puentes, vacaciones escolares y temporada. Se calcula una vez
+# por año con operaciones vectorizadas y queda en cache; el entrenamiento
+# lo une a las filas por fecha y la predicción consulta un diccionario.
+#
+# Festivos nacionales fijos (mes, día)
+FESTIVOS_NACIONALES = [
+    (1, 1),    # Año Nuevo
+    (1, 6),    # Reyes
+    (5, 1),    # Día del Trabajo
+    (8, 15),   # Asunción
+    (10, 12),  # Día de la Hispanidad
+    (11, 1),   # Todos los Santos
+    (12, 6),   # Constitución
+    (12, 8),   # Inmaculada
+    (12, 25),  # Navidad
+]
+# Festivos autonómicos de Madrid (mes, día); Jueves Santo se añade aparte
+FESTIVOS_MADRID = [
+    (5, 2),    # Día de la Comunidad de Madrid
+]
+# Festivos móviles: días respecto al Domingo de Resurrección
+FESTIVOS_PASCUA = [
+    -3,  # Jueves Santo (Madrid)
+    -2,  # Viernes Santo
+]
+# Vacaciones escolares aproximadas de la Comunidad de Madrid: verano,
+# Navidad y Semana Santa (del viernes anterior al Domingo de Ramos al
+# Lunes de Pascua)
+VERANO_ESCOLAR = ((6, 21), (9, 7))
+NAVIDAD_ESCOLAR = ((12, 21), (1, 7))
+SEMANA_SANTA_ESCOLAR = (-9, 1)
+# Temporada por mes: 3 muy alta (verano, Halloween), 2 alta (primavera,
+# Navidad), 1 media, 0 baja
+TEMPORADA_MES = np.array([0, 0, 0, 1, 2, 2, 2, 3, 3, 1, 3, 1, 2], dtype=np.int8)  # índice = mes
+CALENDAR_COLS = ["es_festivo", "es_puente", "es_vacaciones_escolares", "temporada"]
+
+
+def easter(year):
+    """Domingo de Resurrección (algoritmo gregoriano anónimo)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return dt.date(year, mes, dia + 1)
+
+
+def _festivos(year):
+    pascua = pd.Timestamp(easter(year))
+    fijos = [pd.Timestamp(year, mes, dia) for mes, dia in FESTIVOS_NACIONALES + FESTIVOS_MADRID]
+    return pd.DatetimeIndex(fijos + [pascua + pd.Timedelta(days=d) for d in FESTIVOS_PASCUA])
+
+
+@lru_cache(maxsize=None)
+def year_table(year):
+    """Calendario de un año: una fila por día con CALENDAR_COLS (int8), indexado por fecha."""
+    # Un día de margen a cada lado para los puentes de principio y fin de año
+    dias = pd.date_range(f"{year - 1}-12-31", f"{year + 1}-01-01", freq="D")
+    festivos = np.zeros(len(dias), dtype=bool)
+    for y in (year - 1, year, year + 1):
+        festivos |= dias.isin(_festivos(y))
+    ayer = np.r_[False, festivos[:-1]]
+    manana = np.r_[festivos[1:], False]
+    dow = dias.dayofweek.to_numpy()
+
+    puente = (festivos
+              | ((dow == 4) & (manana | ayer))   # viernes antes de festivo o tras jueves festivo
+              | ((dow == 0) & (ayer | manana))   # lunes tras festivo o antes de martes festivo
+              | ((dow == 6) & ayer))             # domingo tras sábado festivo
+
+    md = dias.month * 100 + dias.day
+    (v_ini, v_fin), (n_ini, n_fin) = VERANO_ESCOLAR, NAVIDAD_ESCOLAR
+    vacaciones = ((md >= v_ini[0] * 100 + v_ini[1]) & (md <= v_fin[0] * 100 + v_fin[1])) \
+        | (md >= n_ini[0] * 100 + n_ini[1]) | (md <= n_fin[0] * 100 + n_fin[1])
+    vacaciones = np.asarray(vacaciones)
+    for y in (year - 1, year, year + 1):
+        pascua = pd.Timestamp(easter(y))
+        ini, fin = (pascua + pd.Timedelta(days=d) for d in SEMANA_SANTA_ESCOLAR)
+        vacaciones |= (dias >= ini) & (dias <= fin)
+
+    table = pd.DataFrame({
+        "es_festivo": festivos.astype(np.int8),
+        "es_puente": puente.astype(np.int8),
+        "es_vacaciones_escolares": vacaciones.astype(np.int8),
+        "temporada": TEMPORADA_MES[dias.month],
+    }, index=pd.DatetimeIndex(dias, name="fecha"))
+    return table.loc[str(year)]
+
+
+def calendar_table(start, end):
+    """Calendario de todos los días entre ``start`` y ``end`` (incluidos)."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    table = pd.concat([year_table(y) for y in range(start.year, end.year + 1)])
+    return table.loc[start:end]
+
+
+def attach(df, fecha_col="fecha"):
+    """Añade (o sustituye) CALENDAR_COLS en ``df`` uniendo por fecha, sin recorrer filas.
+
+    Las fechas nulas o no válidas quedan con todos los indicadores a 0.
+    """
+    fechas = pd.to_datetime(df[fecha_col], errors="coerce").dt.normalize()
+    df = df.copy(deep=False)
+    validas = fechas.dropna()
+    if validas.empty:
+        for col in CALENDAR_COLS:
+            df[col] = np.zeros(len(df), dtype=np.int8)
+        return df
+    table = calendar_table(validas.min(), validas.max())
+    # Posición de cada fecha en la tabla (un día por fila) → indexado de arrays
+    pos = ((fechas - table.index[0]) // pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+    ok = ~np.isnan(pos)
+    idx = np.where(ok, pos, 0).astype(np.int64)
+    for col in CALENDAR_COLS:
+        values = table[col].to_numpy()[idx]
+        values[~ok] = 0
+        df[col] = values
+    return df
+
+
+@lru_cache(maxsize=None)
+def _year_lookup(year):
+    table = year_table(year)
+    return dict(zip(table.index.date, table.itertuples(index=False, name=None)))
+
+
+def day_flags(fecha):
+    """CALENDAR_COLS de un día como diccionario (consulta O(1) en el año en cache)."""
+    fecha = pd.Timestamp(fecha).date()
+    return dict(zip(CALENDAR_COLS, _year_lookup(fecha.year)[fecha]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calendario de festivos, puentes, vacaciones y temporada")
+    parser.add_argument("start", help="primer día (YYYY-MM-DD)")
+    parser.add_argument("end", help="último día (YYYY-MM-DD)")
+    parser.add_argument("--only-flagged", action="store_true", help="solo días festivos, puente o de vacaciones")
+    args = parser.parse_args()
+
+    table = calendar_table(args.start, args.end)
+    if args.only_flagged:
+        table = table[table[["es_festivo", "es_puente", "es_vacaciones_escolares"]].any(axis=1)]
+    with pd.option_context("display.max_rows", None):
+        print(table)
+    print(f"📅 {len(table)} días; festivos: {int(table['es_festivo'].sum())}, "
+          f"puente: {int(table['es_puente'].sum())}, vacaciones: {int(table['es_vacaciones_escolares'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from ingestion import pipeline_runner
+from scripts import preclean_queue_times
+
 RAW_INPUT = "data/raw/queue_times_new.csv"  # Aquí llegan los nuevos datos (cada 15 min)
-PROCESSED_PATH = "data/processed/queue_times_all_enriched.csv"
 
 def load_new_data():
     """Carga los nuevos registros obtenidos desde la API."""
@@ -20,20 +26,17 @@ def load_new_data():
     return df_new
 
 def append_unique_records(df_new):
-    """Agrega los nuevos registros al CSV procesado, evitando duplicados."""
-    if os.path.exists(PROCESSED_PATH):
-        df_existing = pd.read_csv(PROCESSED_PATH)
-        combined = pd.concat([df_existing, df_new], ignore_index=True)
-
-        # 🔍 Eliminar duplicados por fecha, hora, atraccion
-        combined = combined.drop_duplicates(subset=["fecha", "hora", "atraccion"], keep="last")
-    else:
-        combined = df_new.drop_duplicates(subset=["fecha", "hora", "atraccion"], keep="last")
-
-    # Guardar CSV limpio
-    os.makedirs(os.path.dirname(PROCESSED_PATH), exist_ok=True)
-    combined.to_csv(PROCESSED_PATH, index=False)
-    print(f"✅ Archivo actualizado: {len(combined)} registros guardados en {PROCESSED_PATH}")
+    """Agrega los nuevos registros al histórico, evitando duplicados.
+
+    Siguen el mismo camino que un tick de ingestion/pipeline_runner.py
+    (combine con el índice de claves → enrich → clima → temporada →
+    histórico), así que acaban donde leen los consumidores.
+    """
+    stages = {s.name: s for s in pipeline_runner.build_stages()}
+    # Estos registros no vienen de snapshots crudos: ni preclean incremental ni manifiesto
+    stages["preclean"] = pipeline_runner.Stage("preclean", lambda: preclean_queue_times.clean_snapshots(df_new))
+    del stages["manifest"]
+    pipeline_runner.run_stages(list(stages.values()))
 
 def main():
     df_new = load_new_data()
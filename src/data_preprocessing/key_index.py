@@ -0,0 +1,124 @@
+import os
+import sys
+import sqlite3
+import argparse
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing import slot_keys
+
+KEY_INDEX_FILE = os.path.join("data", "history", "claves.sqlite")
+KEY_COLS = slot_keys.KEY_COLS
+
+
+def _key_rows(df):
+    """Claves enteras (slot, atraccion_id) de las filas, calculándolas si faltan."""
+    df = slot_keys.add_keys(df).dropna(subset=KEY_COLS)
+    return list(zip(df[slot_keys.SLOT_COL].astype("int64").tolist(),
+                    df[slot_keys.ATTRACTION_COL].astype("int64").tolist()))
+
+
+class KeyIndex:
+    """Índice persistente de claves (slot, atraccion_id) ya guardadas en el histórico.
+
+    Permite descartar duplicados de un lote en O(filas nuevas) sin cargar el
+    histórico. Cada operación abre su propia conexión, así que se puede usar
+    desde los hilos del runner.
+    """
+
+    def __init__(self, path=KEY_INDEX_FILE):
+        self.path = path
+        self.created = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            columnas = [row[1] for row in conn.execute("PRAGMA table_info(claves)")]
+            if columnas and columnas != KEY_COLS:
+                # Índice antiguo con claves de texto (fecha, hora, atraccion): se rehace
+                conn.execute("DROP TABLE claves")
+                self.created = True
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS claves ("
+                " slot INTEGER NOT NULL, atraccion_id INTEGER NOT NULL,"
+                " PRIMARY KEY (slot, atraccion_id)) WITHOUT ROWID"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM claves").fetchone()[0]
+
+    def filter_new(self, df):
+        """Devuelve (filas cuya clave no está en el índice, nº de duplicados rechazados).
+
+        Dentro del propio lote se conserva la última aparición de cada clave.
+        No modifica el índice: las claves se añaden con ``add`` una vez
+        guardadas las filas.
+        """
+        if df.empty:
+            return df, 0
+        lote = slot_keys.dedupe(df.dropna(subset=history_store.REQUIRED_COLS), keep="last").dropna(subset=KEY_COLS)
+        rows = [(pos,) + key for pos, key in enumerate(_key_rows(lote))]
+
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TEMP TABLE lote (pos INTEGER, slot INTEGER, atraccion_id INTEGER)")
+            conn.executemany("INSERT INTO lote VALUES (?, ?, ?)", rows)
+            existentes = {pos for (pos,) in conn.execute(
+                "SELECT l.pos FROM lote l JOIN claves c"
+                " ON c.slot = l.slot AND c.atraccion_id = l.atraccion_id"
+            )}
+        finally:
+            conn.close()
+
+        mask = [pos not in existentes for pos in range(len(lote))]
+        nuevas = lote[mask]
+        return nuevas, len(df) - len(nuevas)
+
+    def add(self, df):
+        """Registra las claves de filas ya persistidas en el histórico."""
+        if df.empty:
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO claves VALUES (?, ?)", _key_rows(df))
+
+    def rebuild(self, frames):
+        """Reconstruye el índice desde cero a partir de lotes de filas."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM claves")
+        for df in frames:
+            self.add(df.dropna(subset=history_store.REQUIRED_COLS))
+        print(f"✅ Índice de claves reconstruido ({len(self)} claves) → {self.path}")
+
+    def rebuild_from_store(self, root=history_store.HISTORY_DIR):
+        """Reconstruye el índice leyendo solo las columnas clave, partición a partición.
+
+        Se leen fecha, hora y atracción: las particiones anteriores a las
+        claves enteras también sirven.
+        """
+        self.rebuild(
+            history_store.read_history(root, start=fecha, end=fecha, columns=history_store.REQUIRED_COLS)
+            for fecha in history_store.list_partitions(root)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice persistente de claves del histórico")
+    parser.add_argument("--rebuild", action="store_true", help="reconstruye el índice desde el almacén histórico")
+    parser.add_argument("--path", default=KEY_INDEX_FILE)
+    parser.add_argument("--root", default=history_store.HISTORY_DIR)
+    args = parser.parse_args()
+
+    index = KeyIndex(args.path)
+    if args.rebuild:
+        index.rebuild_from_store(args.root)
+    else:
+        print(f"🔑 {len(index)} claves en {args.path}")
+
+
+if __name__ == "__main__":
+    main()
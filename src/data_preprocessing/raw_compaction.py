@@ -0,0 +1,234 @@
+import os
+import sys
+import argparse
+from datetime import date
+import pandas as pd
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_snapshots import RAW_DIR, timestamp_from_filename
+from src.data_preprocessing.raw_manifest import RawManifest
+from src.data_preprocessing import raw_loader
+
+
+def compact_dir_for(raw_dir):
+    """Directorio de días compactados de ``raw_dir`` (hermano, con sufijo ``_compactado``)."""
+    return os.path.normpath(raw_dir) + "_compactado"
+
+
+# Un Parquet por día cerrado: data/raw/queue_times_compactado/2025-10-30.parquet
+COMPACT_DIR = compact_dir_for(RAW_DIR)
+# Manifiesto de preclean: no se compactan días con snapshots aún sin procesar
+PRECLEAN_MANIFEST = os.path.join("data", "processed", "preclean_manifest.json")
+SOURCE_COL = "fichero"
+
+
+def _typed(df):
+    """Tipos explícitos para el fichero compactado."""
+    df = df.copy()
+    for col in ["zona", "atraccion", "fecha", "hora", "dia_semana"]:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    if "tiempo_espera" in df.columns:
+        df["tiempo_espera"] = pd.to_numeric(df["tiempo_espera"], errors="coerce").astype("Int16")
+    if "abierta" in df.columns:
+        df["abierta"] = df["abierta"].map({True: True, False: False, "True": True, "False": False}).astype("boolean")
+    if "ultima_actualizacion" in df.columns:
+        df["ultima_actualizacion"] = pd.to_datetime(df["ultima_actualizacion"], errors="coerce", utc=True)
+    return df
+
+
+def loose_files(raw_dir=RAW_DIR):
+    """CSV sueltos del directorio crudo, ordenados por nombre."""
+    if not os.path.isdir(raw_dir):
+        return []
+    return sorted(os.path.join(raw_dir, f) for f in os.listdir(raw_dir) if f.endswith(".csv"))
+
+
+def compacted_sources(compact_dir=COMPACT_DIR):
+    """Nombres de los CSV ya incluidos en algún día compactado."""
+    sources = set()
+    for day in compacted_days(compact_dir):
+        path = os.path.join(compact_dir, f"{day.isoformat()}.parquet")
+        sources.update(pd.read_parquet(path, columns=[SOURCE_COL])[SOURCE_COL])
+    return sources
+
+
+def uncompacted_files(raw_dir=RAW_DIR, compact_dir=None):
+    """CSV sueltos que aún no están en ningún día compactado.
+
+    Los CSV de data/raw/queue_times están versionados en git y la
+    compactación no los borra: los que ya están en un Parquet se leen de ahí.
+    """
+    compact_dir = compact_dir or compact_dir_for(raw_dir)
+    sources = compacted_sources(compact_dir)
+    return [p for p in loose_files(raw_dir) if os.path.basename(p) not in sources]
+
+
+def files_by_day(raw_dir=RAW_DIR, compact_dir=None):
+    """{fecha: [ficheros]} de los snapshots sin compactar con fecha reconocible en el nombre."""
+    days = {}
+    for path in uncompacted_files(raw_dir, compact_dir):
+        ts = timestamp_from_filename(path)
+        if ts is not None:
+            days.setdefault(ts.date(), []).append(path)
+    return days
+
+
+def compacted_days(compact_dir=COMPACT_DIR):
+    """Días (date) ya compactados, ordenados."""
+    if not os.path.isdir(compact_dir):
+        return []
+    return sorted(date.fromisoformat(f[:-len(".parquet")]) for f in os.listdir(compact_dir) if f.endswith(".parquet"))
+
+
+def compact_day(day, files, compact_dir=COMPACT_DIR, delete_sources=False):
+    """Une los CSV de un día en un Parquet (zstd).
+
+    Si el día ya estaba compactado (p. ej. llegaron ficheros rezagados), se
+    fusiona con lo existente. Los CSV originales se conservan (los de ejemplo
+    están versionados) salvo con ``delete_sources``, para directorios crudos
+    fuera de git. Devuelve el nº de filas del fichero del día.
+    """
+    dfs = []
+    for path in files:
+        df = pd.read_csv(path)
+        df[SOURCE_COL] = os.path.basename(path)
+        dfs.append(df)
+    df_day = _typed(pd.concat(dfs, ignore_index=True))
+
+    os.makedirs(compact_dir, exist_ok=True)
+    out = os.path.join(compact_dir, f"{day.isoformat()}.parquet")
+    if os.path.exists(out):
+        previo = pd.read_parquet(out)
+        previo = previo[~previo[SOURCE_COL].isin(df_day[SOURCE_COL])]
+        df_day = pd.concat([previo, df_day], ignore_index=True)
+
+    df_day.to_parquet(out + ".tmp", index=False, compression="zstd")
+    os.replace(out + ".tmp", out)
+    # Los CSV solo se borran cuando el Parquet ya está en su sitio
+    if delete_sources:
+        for path in files:
+            os.remove(path)
+    return len(df_day)
+
+
+def compact_closed_days(raw_dir=RAW_DIR, compact_dir=None, today=None,
+                        manifest_file=PRECLEAN_MANIFEST, delete_sources=False):
+    """Compacta los snapshots sin compactar de los días anteriores a ``today``
+    que ya pasaron por preclean.
+
+    Devuelve la lista de días compactados.
+    """
+    compact_dir = compact_dir or compact_dir_for(raw_dir)
+    today = today or date.today()
+    manifest = RawManifest(manifest_file) if manifest_file and os.path.exists(manifest_file) else None
+    done = []
+    for day, files in sorted(files_by_day(raw_dir, compact_dir).items()):
+        if day >= today:
+            continue
+        if manifest is not None and manifest.pending(files):
+            print(f"⏭️ {day}: hay snapshots sin preclean, no se compacta todavía")
+            continue
+        n = compact_day(day, files, compact_dir, delete_sources=delete_sources)
+        done.append(day)
+        print(f"🗜️ {day}: {len(files)} CSV → {n} filas en {compact_dir}")
+    return done
+
+
+def _in_range(day, start, end):
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def _as_date(value):
+    return pd.Timestamp(value).date() if value is not None else None
+
+
+def iter_raw_frames(raw_dir=RAW_DIR, compact_dir=None, start=None, end=None):
+    """Recorre (nombre_fichero, DataFrame) de todos los snapshots, compactados o sueltos.
+
+    Permite a quien procesa fichero a fichero seguir haciéndolo sin abrir
+    cada CSV: los días compactados se leen de una vez y se reparten por
+    fichero de origen. ``start``/``end`` filtran por día (incluidos).
+    """
+    compact_dir = compact_dir or compact_dir_for(raw_dir)
+    start, end = _as_date(start), _as_date(end)
+    sources = set()
+    for day in compacted_days(compact_dir):
+        if _in_range(day, start, end):
+            df = pd.read_parquet(os.path.join(compact_dir, f"{day.isoformat()}.parquet"))
+            for name, group in df.groupby(SOURCE_COL, sort=True):
+                sources.add(name)
+                # Cada fichero recupera solo las columnas que tenía
+                yield name, group.drop(columns=[SOURCE_COL]).dropna(axis=1, how="all").reset_index(drop=True)
+
+    # Los CSV ya compactados se leen del Parquet (solo los de días del rango pueden estarlo)
+    for path in loose_files(raw_dir):
+        if os.path.basename(path) in sources:
+            continue
+        ts = timestamp_from_filename(path)
+        if ts is None or _in_range(ts.date(), start, end):
+            yield os.path.basename(path), pd.read_csv(path)
+
+
+def read_raw(raw_dir=RAW_DIR, compact_dir=None, start=None, end=None, columns=None, with_source=False,
+             skip_errors=False):
+    """Unión de los días compactados y los CSV sin compactar, como si fueran un solo fichero.
+
+    ``columns`` limita las columnas leídas; ``with_source`` conserva la
+    columna con el nombre del fichero de origen. Con ``skip_errors`` los
+    CSV sueltos que no se pueden leer se avisan y se descartan.
+    """
+    compact_dir = compact_dir or compact_dir_for(raw_dir)
+    start, end = _as_date(start), _as_date(end)
+    dfs = []
+    for day in compacted_days(compact_dir):
+        if not _in_range(day, start, end):
+            continue
+        path = os.path.join(compact_dir, f"{day.isoformat()}.parquet")
+        if columns is not None:
+            # Solo las columnas pedidas que existen en ese día
+            names = pq.ParquetFile(path).schema_arrow.names
+            dfs.append(pd.read_parquet(path, columns=[c for c in names if c in columns or c == SOURCE_COL]))
+        else:
+            dfs.append(pd.read_parquet(path))
+
+    # Los CSV ya compactados se leen del Parquet (solo los de días del rango pueden estarlo)
+    sources = set().union(*(df[SOURCE_COL].unique() for df in dfs))
+    paths = []
+    for path in loose_files(raw_dir):
+        if os.path.basename(path) in sources:
+            continue
+        ts = timestamp_from_filename(path)
+        if ts is None or _in_range(ts.date(), start, end):
+            paths.append(path)
+    if paths:
+        # Los CSV sueltos se leen en paralelo y con tipos explícitos
+        dfs.append(raw_loader.read_csv_files(paths, columns=columns, with_source=True, skip_errors=skip_errors))
+
+    if not dfs:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(dfs, ignore_index=True)
+    return df if with_source else df.drop(columns=[SOURCE_COL])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta los snapshots crudos de días cerrados en Parquet")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--compact-dir", help="por defecto, <raw-dir>_compactado")
+    parser.add_argument("--force", action="store_true", help="no comprueba el manifiesto de preclean")
+    parser.add_argument("--delete-sources", action="store_true",
+                        help="borra los CSV ya compactados (solo para directorios crudos fuera de git)")
+    args = parser.parse_args()
+
+    days = compact_closed_days(args.raw_dir, args.compact_dir,
+                               manifest_file=None if args.force else PRECLEAN_MANIFEST,
+                               delete_sources=args.delete_sources)
+    print(f"✅ {len(days)} días compactados; quedan {len(uncompacted_files(args.raw_dir, args.compact_dir))} "
+          "CSV sin compactar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_snapshots import RAW_DIR
+from src.data_preprocessing import compact_schema
+
+# Lectura en paralelo de muchos CSV de snapshots con un esquema explícito.
+# Cada fichero se lee con el lector CSV de Arrow (sin inferir tipos en las
+# columnas conocidas) y las tablas se unen sin copiar; solo hay una
+# conversión a pandas al final.
+RAW_SCHEMA = {
+    "zona": pa.string(),
+    "atraccion": pa.string(),
+    "tiempo_espera": pa.int16(),
+    "abierta": pa.bool_(),
+    "ultima_actualizacion": pa.string(),
+    "fecha": pa.string(),
+    "hora": pa.string(),
+    "dia_semana": pa.string(),
+}
+SOURCE_COL = "fichero"
+# "thread" (por defecto), "process" o "serial"
+LOADER_EXECUTOR = os.environ.get("RAW_LOADER_EXECUTOR", "thread")
+LOADER_WORKERS = int(os.environ.get("RAW_LOADER_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def _coerce(df, schema):
+    """Conversión tolerante (valores inválidos → nulo) para ficheros que Arrow rechaza."""
+    for col, tipo in schema.items():
+        if col not in df.columns:
+            continue
+        if pa.types.is_integer(tipo):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif pa.types.is_boolean(tipo):
+            df[col] = df[col].map({True: True, False: False, "True": True, "False": False})
+        else:
+            df[col] = df[col].astype("string")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for col, tipo in schema.items():
+        if col in table.column_names:
+            i = table.column_names.index(col)
+            table = table.set_column(i, col, table.column(col).cast(tipo, safe=False))
+    return table
+
+
+def read_table(path, columns=None, schema=RAW_SCHEMA, with_source=False):
+    """Lee un CSV como tabla Arrow con los tipos de ``schema``.
+
+    ``columns`` proyecta las columnas (las que falten salen nulas). Si el
+    fichero tiene valores que no encajan en el esquema, se lee con pandas
+    y esos valores quedan nulos, como con ``errors="coerce"``.
+    """
+    convert = pa_csv.ConvertOptions(column_types=schema, include_columns=columns,
+                                    include_missing_columns=columns is not None)
+    try:
+        # Un hilo por fichero: el paralelismo está en el pool, no dentro de cada lectura
+        table = pa_csv.read_csv(path, read_options=pa_csv.ReadOptions(use_threads=False),
+                                convert_options=convert)
+    except pa.ArrowInvalid:
+        df = pd.read_csv(path, usecols=lambda c: columns is None or c in columns)
+        table = _coerce(df, schema)
+    if with_source:
+        table = table.append_column(SOURCE_COL, pa.array([os.path.basename(path)] * table.num_rows, pa.string()))
+    return table
+
+
+def _read_or_error(path, columns=None, schema=RAW_SCHEMA, with_source=False):
+    """Como ``read_table``, pero devuelve (tabla, None) o (None, error) en lugar de lanzar la excepción."""
+    try:
+        return read_table(path, columns, schema, with_source), None
+    except Exception as e:
+        return None, e
+
+
+def _concat(tables):
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except TypeError:
+        # pyarrow < 14
+        return pa.concat_tables(tables, promote=True)
+
+
+def read_tables(paths, columns=None, schema=RAW_SCHEMA, with_source=False,
+                executor=LOADER_EXECUTOR, max_workers=LOADER_WORKERS, skip_errors=False):
+    """Une en una sola tabla Arrow los CSV de ``paths``, leídos en paralelo (None si no hay ficheros).
+
+    ``executor`` elige entre hilos ("thread"), procesos ("process") o un
+    bucle ("serial"). El orden de las filas es el de ``paths``. Con
+    ``skip_errors`` un fichero que no se puede leer se avisa y se descarta
+    en lugar de hacer fallar todo el lote.
+    """
+    paths = list(paths)
+    if not paths:
+        return None
+    read = _read_or_error if skip_errors else read_table
+    args = ([columns] * len(paths), [schema] * len(paths), [with_source] * len(paths))
+    if executor == "serial" or max_workers <= 1 or len(paths) == 1:
+        tables = list(map(read, paths, *args))
+    elif executor == "process":
+        # Lotes grandes: cada tarea paga el envío de la tabla de vuelta
+        chunksize = max(1, len(paths) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            tables = list(pool.map(read, paths, *args, chunksize=chunksize))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            tables = list(pool.map(read, paths, *args))
+
+    if skip_errors:
+        leidas = []
+        for path, (table, error) in zip(paths, tables):
+            if error is not None:
+                print(f"⚠️ Error leyendo {os.path.basename(path)}: {error}")
+            else:
+                leidas.append(table)
+        tables = leidas
+        if not tables:
+            return None
+    return _concat(tables)
+
+
+def read_csv_files(paths, columns=None, schema=RAW_SCHEMA, with_source=False,
+                   executor=LOADER_EXECUTOR, max_workers=LOADER_WORKERS, skip_errors=False):
+    """Como ``read_tables``, pero devuelve un único DataFrame (textos repetidos como category)."""
+    table = read_tables(paths, columns, schema, with_source, executor, max_workers, skip_errors)
+    if table is None:
+        return pd.DataFrame(columns=columns)
+    # abierta se queda en bool: el preclean la escribe como True/False
+    return compact_schema.compact(table.to_pandas(), flags=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lectura en paralelo de los CSV de snapshots")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--executor", default=LOADER_EXECUTOR, choices=["thread", "process", "serial"])
+    parser.add_argument("--workers", type=int, default=LOADER_WORKERS)
+    parser.add_argument("--columns", nargs="+")
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.raw_dir, f) for f in os.listdir(args.raw_dir) if f.endswith(".csv"))
+    start = time.perf_counter()
+    df = read_csv_files(paths, columns=args.columns, executor=args.executor, max_workers=args.workers)
+    print(f"📂 {len(paths)} ficheros, {len(df)} filas en {time.perf_counter() - start:.2f}s "
+          f"({args.executor}, {args.workers} workers)")
+    print(df.dtypes)
+
+
+if __name__ == "__main__":
+    main()
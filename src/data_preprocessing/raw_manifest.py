@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+
+# Manifiesto del tick en curso: se promueve al definitivo cuando el histórico ya está guardado
+PENDING_SUFFIX = ".pending"
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    """Hash SHA-1 del contenido de un fichero."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RawManifest:
+    """Registro de los snapshots crudos ya ingeridos.
+
+    Cada fichero se identifica por su ruta, tamaño, mtime y hash del contenido.
+    Si tamaño y mtime no cambian no se vuelve a leer el fichero; si cambian,
+    se compara el hash para distinguir un ``touch`` de un cambio real.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def clear(self):
+        self.files = {}
+
+    def _key(self, file_path):
+        return os.path.basename(file_path)
+
+    def pending(self, file_paths):
+        """Devuelve los ficheros nuevos o modificados desde la última ingesta."""
+        pending = []
+        for file_path in file_paths:
+            entry = self.files.get(self._key(file_path))
+            st = os.stat(file_path)
+            if entry is None:
+                pending.append(file_path)
+            elif entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                continue
+            elif entry["sha1"] == file_sha1(file_path):
+                # Mismo contenido con otro mtime: solo actualizamos la firma
+                entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+            else:
+                pending.append(file_path)
+        return pending
+
+    def mark_ingested(self, file_paths):
+        for file_path in file_paths:
+            st = os.stat(file_path)
+            self.files[self._key(file_path)] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha1": file_sha1(file_path),
+            }
+
+    def prune(self, file_paths):
+        """Olvida los ficheros que ya no existen en el directorio crudo."""
+        keep = {self._key(p) for p in file_paths}
+        self.files = {k: v for k, v in self.files.items() if k in keep}
+
+    def save(self, pending=False):
+        """Guarda el manifiesto; con ``pending`` queda a la espera de ``commit_pending``."""
+        path = self.path + PENDING_SUFFIX if pending else self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # Sin sangría: json usa el codificador en C (el manifiesto se guarda en cada tick)
+            json.dump({"files": self.files}, f, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        if not pending and os.path.exists(self.path + PENDING_SUFFIX):
+            # Un tick anterior que no llegó a guardar el histórico: sus ficheros siguen pendientes
+            os.remove(self.path + PENDING_SUFFIX)
+
+
+def commit_pending(path):
+    """Promueve el manifiesto pendiente del tick al definitivo. Devuelve True si había uno."""
+    pending_path = path + PENDING_SUFFIX
+    if not os.path.exists(pending_path):
+        return False
+    os.replace(pending_path, path)
+    return True
@@ -0,0 +1,79 @@
+import os
+import re
+import glob
+import pandas as pd
+
+RAW_DIR = os.path.join("data", "raw", "queue_times")
+
+# Dos generaciones de nombres de fichero en data/raw/queue_times:
+#   queue_times_2025-10-30_16-26.csv         (ingesta actual)
+#   queue_times_clean_20251022_155424.csv    (ingesta antigua, sin fecha/hora dentro)
+_NEW_NAME = re.compile(r"queue_times_(\d{4}-\d{2}-\d{2})_(\d{2})-(\d{2})\.csv$")
+_OLD_NAME = re.compile(r"queue_times_clean_(\d{8})_(\d{6})\.csv$")
+
+
+def timestamp_from_filename(path):
+    """Instante del snapshot según el nombre del fichero (None si no encaja)."""
+    name = os.path.basename(path)
+    match = _NEW_NAME.search(name)
+    if match:
+        return pd.Timestamp(f"{match.group(1)} {match.group(2)}:{match.group(3)}")
+    match = _OLD_NAME.search(name)
+    if match:
+        return pd.to_datetime(match.group(1) + match.group(2), format="%Y%m%d%H%M%S")
+    return None
+
+
+def list_snapshot_files(raw_dir=RAW_DIR):
+    """CSV de snapshot sueltos del directorio crudo, ordenados por instante.
+
+    No incluye los días compactados: para leerlo todo, ``iter_snapshot_frames``.
+    """
+    files = [f for f in glob.glob(os.path.join(raw_dir, "*.csv")) if timestamp_from_filename(f) is not None]
+    return sorted(files, key=timestamp_from_filename)
+
+
+def add_timestamp(df, name):
+    """Añade ``timestamp`` (y ``abierta`` si falta) a un snapshot crudo.
+
+    Si el snapshot trae fecha/hora se usan (tienen segundos); si no, el
+    instante del nombre del fichero. Los ficheros sin ``abierta`` solo
+    contienen atracciones abiertas.
+    """
+    df = df.copy()
+    if "fecha" in df.columns and "hora" in df.columns and not df.empty:
+        df["timestamp"] = pd.to_datetime(df["fecha"].astype(str) + " " + df["hora"].astype(str))
+    else:
+        df["timestamp"] = timestamp_from_filename(name)
+    if "abierta" not in df.columns:
+        df["abierta"] = True
+    return df
+
+
+def read_snapshot(path):
+    """Lee un snapshot crudo y le añade la columna ``timestamp``."""
+    return add_timestamp(pd.read_csv(path), path)
+
+
+def iter_snapshot_frames(raw_dir=RAW_DIR):
+    """(nombre, DataFrame) de cada snapshot, suelto o de un día compactado, ordenados por instante."""
+    # Import local: raw_compaction importa este módulo
+    from src.data_preprocessing import raw_compaction
+    frames = [(name, df.astype({c: "str" for c in df.select_dtypes("string").columns}))
+              for name, df in raw_compaction.iter_raw_frames(raw_dir)
+              if timestamp_from_filename(name) is not None]
+    return sorted(frames, key=lambda frame: timestamp_from_filename(frame[0]))
+
+
+def load_snapshots(raw_dir=RAW_DIR, files=None):
+    """Todos los snapshots crudos en una tabla larga (una fila por atracción y tick).
+
+    Sin ``files`` se incluyen los días ya compactados en Parquet, además de
+    los CSV sueltos.
+    """
+    if files is None:
+        frames = iter_snapshot_frames(raw_dir)
+    else:
+        frames = [(f, pd.read_csv(f)) for f in files]
+    dfs = [add_timestamp(df, name) for name, df in frames]
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
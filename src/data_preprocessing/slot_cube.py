@@ -0,0 +1,350 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing import slot_keys
+
+# Cubo denso del histórico: atracciones × slots de 15 min, en ficheros .npy
+# que cualquier proceso abre como memoria mapeada (np.load(mmap_mode="r")):
+#   data/history/cubo/index.json            generación vigente, códigos de atracción (fila) y
+#                                           slot inicial / nº de slots (columna)
+#   data/history/cubo/gen-N/observado.npy   bool  [atracción, slot]: hay lectura (máscara de huecos)
+#   data/history/cubo/gen-N/espera.npy      int16 [atracción, slot]: minutos de espera
+#   data/history/cubo/gen-N/abierta.npy     int8  [atracción, slot]: 1/0, -1 sin dato
+#   data/history/cubo/gen-N/<clima>.npy     float32 [slot]: el clima es del parque, NaN sin dato
+# La columna j es el slot slot_inicio + j * 15 (minutos desde 1970, hora local,
+# como slot_keys.slot_ids). Se reserva espacio por bloques para que añadir
+# un tick no obligue a reescribir los ficheros; cuando hay que ampliar, los
+# arrays se copian a una generación nueva y el índice cambia de generación y de
+# slot_inicio a la vez, así que un lector (o un fallo a medias) nunca mezcla
+# arrays desplazados con el slot_inicio anterior.
+CUBE_DIR = os.path.join("data", "history", "cubo")
+INDEX_FILE = "index.json"
+GEN_PREFIX = "gen-"
+MASK_VAR = "observado"
+RIDE_VARS = {"espera": ("tiempo_espera", np.int16), "abierta": ("abierta", np.int8)}
+WEATHER_VARS = ["temperatura", "humedad", "sensacion_termica", "codigo_clima"]
+SLOTS_PER_DAY = 24 * 60 // slot_keys.SLOT_MINUTES
+SLOT_CHUNK = SLOTS_PER_DAY * 28
+ROW_CHUNK = 16
+_FLAG_VALUES = {"true": 1, "false": 0, "1": 1, "0": 0, "1.0": 1, "0.0": 0}
+
+
+def _round_up(n, chunk):
+    return max(chunk, -(-n // chunk) * chunk)
+
+
+def _as_flag(s):
+    """abierta como int8 (1/0); lo que no se reconoce, -1."""
+    return s.astype(str).str.strip().str.lower().map(_FLAG_VALUES).fillna(-1).astype(np.int8).to_numpy()
+
+
+def slot_of(ts):
+    """Slot (minutos desde 1970, múltiplo de 15) que contiene el instante ``ts``."""
+    minutos = (pd.Timestamp(ts) - pd.Timestamp("1970-01-01")) // pd.Timedelta(minutes=1)
+    return minutos // slot_keys.SLOT_MINUTES * slot_keys.SLOT_MINUTES
+
+
+class SlotCube:
+    """Series regulares de 15 min por atracción, persistidas como arrays mapeados en memoria.
+
+    La ingesta lo amplía con ``update`` (solo escribe las celdas del lote);
+    los consumidores leen rangos con ``slice``/``read_frame`` sin tocar
+    ningún CSV ni Parquet.
+    """
+
+    def __init__(self, root=CUBE_DIR):
+        self.root = root
+        self.created = not os.path.exists(os.path.join(root, INDEX_FILE))
+        self._load_index()
+
+    def _load_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        index = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        self.slot_inicio = index.get("slot_inicio")
+        self.n_slots = index.get("n_slots", 0)
+        self.atracciones = index.get("atracciones", [])
+        # None: cubos anteriores a las generaciones, con los .npy en la raíz
+        self.generacion = index.get("generacion")
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"slot_minutes": slot_keys.SLOT_MINUTES, "generacion": self.generacion,
+                       "slot_inicio": self.slot_inicio, "n_slots": self.n_slots,
+                       "atracciones": self.atracciones}, f)
+        # El índice se publica después de los datos: un lector nunca ve slots sin escribir
+        os.replace(path + ".tmp", path)
+        self._prune_generations()
+
+    def _gen_dir(self, generacion):
+        return self.root if generacion is None else os.path.join(self.root, f"{GEN_PREFIX}{generacion}")
+
+    def _path(self, var, generacion=False):
+        """Fichero de ``var`` en la generación vigente (o en ``generacion``)."""
+        if generacion is False:
+            generacion = self.generacion
+        return os.path.join(self._gen_dir(generacion), f"{var}.npy")
+
+    def _prune_generations(self):
+        """Borra las generaciones anteriores a la previa (la previa queda para los
+        lectores que acaban de leer el índice viejo)."""
+        if self.generacion is None:
+            return
+        for nombre in os.listdir(self.root):
+            if nombre.startswith(GEN_PREFIX) and nombre[len(GEN_PREFIX):].isdigit():
+                if int(nombre[len(GEN_PREFIX):]) < self.generacion - 1:
+                    shutil.rmtree(os.path.join(self.root, nombre), ignore_errors=True)
+            elif nombre.endswith(".npy") and self.generacion > 1:
+                os.remove(os.path.join(self.root, nombre))
+
+    def _open(self, var, mode="r"):
+        return np.load(self._path(var), mmap_mode=mode)
+
+    def _layout(self):
+        """Capacidad reservada (filas, slots); (0, 0) si aún no hay ficheros."""
+        if not os.path.exists(self._path(MASK_VAR)):
+            return 0, 0
+        return self._open(MASK_VAR).shape
+
+    def _reallocate(self, slot_inicio, filas, slots):
+        """Reserva en una generación nueva ficheros de (filas, slots) y copia lo ya guardado en su sitio.
+
+        La generación nueva no es visible hasta que ``update`` publica el índice.
+        """
+        nueva = (self.generacion or 0) + 1
+        # Restos de una ampliación que falló antes de publicar el índice
+        shutil.rmtree(self._gen_dir(nueva), ignore_errors=True)
+        os.makedirs(self._gen_dir(nueva))
+        desplazamiento = 0 if self.slot_inicio is None else (self.slot_inicio - slot_inicio) // slot_keys.SLOT_MINUTES
+        old_filas, old_slots = self._layout()
+        variables = [(MASK_VAR, np.bool_, 2)] + [(v, t, 2) for v, (_, t) in RIDE_VARS.items()] \
+            + [(v, np.float32, 1) for v in WEATHER_VARS]
+        for var, dtype, ndim in variables:
+            shape = (filas, slots) if ndim == 2 else (slots,)
+            nuevo = np.lib.format.open_memmap(self._path(var, nueva), mode="w+", dtype=dtype, shape=shape)
+            if ndim == 1:
+                nuevo[:] = np.nan
+            if old_slots:
+                viejo = self._open(var)
+                if ndim == 2:
+                    nuevo[:old_filas, desplazamiento:desplazamiento + old_slots] = viejo
+                else:
+                    nuevo[desplazamiento:desplazamiento + old_slots] = viejo
+                del viejo
+            nuevo.flush()
+            del nuevo
+        if self.slot_inicio is not None:
+            self.n_slots += desplazamiento
+        self.slot_inicio = slot_inicio
+        self.generacion = nueva
+
+    def _ensure(self, slot_min, slot_max, codigos):
+        """Amplía la reserva si el lote cae fuera (antes, después o con atracciones nuevas)."""
+        dia = SLOTS_PER_DAY * slot_keys.SLOT_MINUTES
+        inicio = slot_min // dia * dia
+        if self.slot_inicio is not None:
+            inicio = min(inicio, self.slot_inicio)
+        conocidas = set(self.atracciones)
+        nuevas = [int(c) for c in codigos if int(c) not in conocidas]
+        filas, slots = self._layout()
+        desplazamiento = 0 if self.slot_inicio is None else (self.slot_inicio - inicio) // slot_keys.SLOT_MINUTES
+        slots_necesarios = max((slot_max - inicio) // slot_keys.SLOT_MINUTES + 1, desplazamiento + slots)
+        filas_necesarias = len(self.atracciones) + len(nuevas)
+        if desplazamiento or self.slot_inicio is None or slots_necesarios > slots or filas_necesarias > filas:
+            self._reallocate(inicio, _round_up(max(filas_necesarias, filas), ROW_CHUNK),
+                             _round_up(slots_necesarios, SLOT_CHUNK))
+        self.atracciones = self.atracciones + nuevas
+
+    def update(self, df):
+        """Escribe en el cubo las filas de ``df`` (histórico); ante claves repetidas gana la última."""
+        if df is None or df.empty:
+            return 0
+        df = slot_keys.dedupe(df.dropna(subset=["tiempo_espera"]), keep="last").dropna(subset=slot_keys.KEY_COLS)
+        if df.empty:
+            return 0
+        slots = df[slot_keys.SLOT_COL].astype("int64").to_numpy()
+        codigos = df[slot_keys.ATTRACTION_COL].astype("int64").to_numpy()
+        self._ensure(int(slots.min()), int(slots.max()), np.unique(codigos))
+
+        filas = pd.Index(self.atracciones).get_indexer(codigos)
+        cols = (slots - self.slot_inicio) // slot_keys.SLOT_MINUTES
+        for var, (col, dtype) in RIDE_VARS.items():
+            arr = self._open(var, "r+")
+            if col not in df.columns:
+                valores = -1
+            elif col == "abierta":
+                valores = _as_flag(df[col])
+            else:
+                valores = df[col].astype(dtype).to_numpy()
+            arr[filas, cols] = valores
+            arr.flush()
+        for var in WEATHER_VARS:
+            if var not in df.columns:
+                continue
+            # Un valor por slot: el último no nulo del lote
+            clima = pd.Series(pd.to_numeric(df[var], errors="coerce").to_numpy(), index=cols).groupby(level=0).last()
+            clima = clima.dropna()
+            arr = self._open(var, "r+")
+            arr[clima.index.to_numpy()] = clima.to_numpy(dtype=np.float32)
+            arr.flush()
+        # La máscara, al final: una celda marcada como observada ya tiene sus valores
+        observado = self._open(MASK_VAR, "r+")
+        observado[filas, cols] = True
+        observado.flush()
+
+        self.n_slots = max(self.n_slots, int(cols.max()) + 1)
+        self._save_index()
+        return len(df)
+
+    def rebuild_from_store(self, root=history_store.HISTORY_DIR):
+        """Reconstruye el cubo desde cero leyendo el histórico partición a partición.
+
+        Se construye aparte y se publica como una generación nueva: los lectores
+        siguen con la vigente hasta que el índice cambia, y las anteriores se
+        borran después del cambio.
+        """
+        temporal = os.path.join(self.root, "reconstruccion")
+        shutil.rmtree(temporal, ignore_errors=True)
+        nuevo = SlotCube(temporal)
+        filas = sum(nuevo.update(history_store.read_history(root, start=fecha, end=fecha))
+                    for fecha in history_store.list_partitions(root))
+
+        # La generación siguiente a la publicada (por si otro proceso la ha cambiado)
+        self._load_index()
+        generacion = (self.generacion or 0) + 1
+        # Restos de una ampliación o reconstrucción que falló antes de publicar el índice
+        shutil.rmtree(self._gen_dir(generacion), ignore_errors=True)
+        if nuevo.generacion is not None:
+            os.replace(nuevo._gen_dir(nuevo.generacion), self._gen_dir(generacion))
+        else:
+            # Histórico vacío: una generación sin ficheros, como un cubo recién creado
+            os.makedirs(self._gen_dir(generacion))
+        self.slot_inicio, self.n_slots, self.atracciones = nuevo.slot_inicio, nuevo.n_slots, nuevo.atracciones
+        self.generacion = generacion
+        self._save_index()
+        shutil.rmtree(temporal, ignore_errors=True)
+        # Estado desde el índice publicado
+        self._load_index()
+        print(f"✅ Cubo reconstruido ({filas} lecturas, {len(self.atracciones)} atracciones, "
+              f"{self.n_slots} slots) → {self.root} ({GEN_PREFIX}{self.generacion})")
+
+    def _columns(self, start, end):
+        """Rango de columnas [c0, c1) de ``start``–``end`` (días incluidos, como ``read_history``)."""
+        c0, c1 = 0, self.n_slots
+        if start is not None:
+            c0 = max(c0, (slot_of(start) - self.slot_inicio) // slot_keys.SLOT_MINUTES)
+        if end is not None:
+            end = pd.Timestamp(end)
+            if end == end.normalize():
+                end += pd.Timedelta(days=1) - pd.Timedelta(minutes=1)
+            c1 = min(c1, (slot_of(end) - self.slot_inicio) // slot_keys.SLOT_MINUTES + 1)
+        return c0, max(c0, c1)
+
+    def _rows(self, atracciones):
+        if atracciones is None:
+            return slice(0, len(self.atracciones)), np.asarray(self.atracciones, dtype=np.int64)
+        if isinstance(atracciones, (str, int, np.integer)):
+            atracciones = [atracciones]
+        atracciones = list(atracciones)
+        if any(isinstance(a, str) for a in atracciones):
+            atracciones = slot_keys.AttractionCodes.shared().encode(atracciones).tolist()
+        codigos = np.asarray([a for a in atracciones if not pd.isna(a)], dtype=np.int64)
+        filas = pd.Index(self.atracciones).get_indexer(codigos)
+        return filas[filas >= 0], codigos[filas >= 0]
+
+    def slice(self, start=None, end=None, atracciones=None):
+        """Rango de fechas para una, varias (nombres o códigos) o todas las atracciones.
+
+        Devuelve un diccionario con ``slot`` y ``tiempo`` (inicio de cada slot),
+        ``atraccion_id`` y un ``np.ma.MaskedArray`` por variable: las de
+        atracción con forma (atracciones, slots) y el clima (slots,). Los
+        huecos salen enmascarados. Con todas las atracciones los datos son
+        vistas de los ficheros mapeados, sin copias.
+        """
+        self._load_index()
+        filas, codigos = self._rows(atracciones)
+        if self.slot_inicio is None:
+            c0 = c1 = 0
+        else:
+            c0, c1 = self._columns(start, end)
+        inicio = self.slot_inicio or 0
+        slots = (inicio + slot_keys.SLOT_MINUTES * np.arange(c0, c1)).astype(np.int32)
+        resultado = {"slot": slots, "tiempo": pd.DatetimeIndex(slot_keys.slot_to_timestamp(slots)),
+                     "atraccion_id": codigos}
+        if self.slot_inicio is None:
+            vacio = np.ma.masked_all((len(codigos), 0))
+            resultado.update({var: vacio for var in RIDE_VARS}, **{var: np.ma.masked_all(0) for var in WEATHER_VARS})
+            return resultado
+
+        huecos = ~self._open(MASK_VAR)[filas, c0:c1]
+        for var in RIDE_VARS:
+            datos = self._open(var)[filas, c0:c1]
+            mascara = huecos | (datos < 0) if var == "abierta" else huecos
+            resultado[var] = np.ma.MaskedArray(datos, mask=mascara)
+        for var in WEATHER_VARS:
+            resultado[var] = np.ma.masked_invalid(self._open(var)[c0:c1], copy=False)
+        return resultado
+
+    def read_frame(self, start=None, end=None, atracciones=None):
+        """Las celdas observadas de ``slice`` en formato largo (una fila por atracción y slot)."""
+        cubo = self.slice(start, end, atracciones)
+        observado = ~np.ma.getmaskarray(cubo["espera"])
+        fila, col = np.nonzero(observado)
+        tiempo = cubo["tiempo"][col]
+        df = pd.DataFrame({
+            slot_keys.SLOT_COL: cubo["slot"][col],
+            slot_keys.ATTRACTION_COL: cubo["atraccion_id"][fila].astype(np.int16),
+            "fecha": tiempo.strftime("%Y-%m-%d"),
+            "hora": tiempo.strftime("%H:%M"),
+            "tiempo_espera": cubo["espera"].data[fila, col],
+            "abierta": cubo["abierta"].data[fila, col],
+        })
+        for var in WEATHER_VARS:
+            df[var] = cubo[var].filled(np.nan)[col]
+        return df
+
+    def info(self):
+        self._load_index()
+        filas, slots = self._layout()
+        if self.slot_inicio is None:
+            return f"🧊 Cubo vacío en {self.root}"
+        desde = slot_keys.slot_to_timestamp([self.slot_inicio]).iloc[0]
+        hasta = desde + pd.Timedelta(minutes=slot_keys.SLOT_MINUTES * (self.n_slots - 1))
+        observadas = int(self._open(MASK_VAR)[:, :self.n_slots].sum())
+        return (f"🧊 {len(self.atracciones)} atracciones × {self.n_slots} slots ({desde} → {hasta}), "
+                f"{observadas} lecturas; reservado {filas} × {slots} → {self.root}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cubo atracciones × slots de 15 min en memoria mapeada")
+    parser.add_argument("--rebuild", action="store_true", help="reconstruye el cubo desde el almacén histórico")
+    parser.add_argument("--root", default=CUBE_DIR)
+    parser.add_argument("--history-root", default=history_store.HISTORY_DIR)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--atraccion", nargs="*", help="nombres de atracción para mostrar su serie")
+    args = parser.parse_args()
+
+    cube = SlotCube(args.root)
+    if args.rebuild:
+        cube.rebuild_from_store(args.history_root)
+    print(cube.info())
+    if args.start or args.end or args.atraccion:
+        print(cube.read_frame(args.start, args.end, args.atraccion or None))
+
+
+if __name__ == "__main__":
+    main()
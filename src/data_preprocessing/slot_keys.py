@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Clave canónica de cada fila del histórico, asignada en la ingesta:
+#   slot         int32: minutos desde 1970-01-01 (hora local) redondeados hacia abajo a 15 min
+#   atraccion_id int16: código estable de la atracción (data/history/atracciones.json)
+# "11:40", "11:40:09" y "11:44" caen en el mismo slot: ya no se cuelan casi-duplicados.
+SLOT_MINUTES = 15
+SLOT_COL = "slot"
+ATTRACTION_COL = "atraccion_id"
+KEY_COLS = [SLOT_COL, ATTRACTION_COL]
+# Junto al histórico al que da códigos (relativo al directorio de datos, como HISTORY_DIR)
+ATTRACTION_CODES_FILE = os.path.join("data", "history", "atracciones.json")
+
+
+def _py_float(texto):
+    try:
+        return float(texto)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_float(textos):
+    """``float(texto)`` de cada elemento (NaN si no es un número).
+
+    El parser numérico de pandas resuelve casi todo; lo que rechaza y no
+    es nulo (p. ej. "1_0") se reintenta con ``float`` para dar lo mismo
+    que el parser por fila.
+    """
+    valores = pd.to_numeric(textos, errors="coerce").astype("float64")
+    dudosos = (valores.isna() & textos.notna()).to_numpy()
+    if dudosos.any():
+        valores[dudosos] = [_py_float(t) for t in textos[dudosos]]
+    return valores.to_numpy()
+
+
+def _hhmm(textos):
+    """Horas y minutos de los textos "HH:MM" / "HH:MM:SS" exactos, con aritmética
+    sobre los códigos de los caracteres. Devuelve (horas, minutos, encaja)."""
+    u = np.asarray(textos, dtype="U")
+    ancho = u.dtype.itemsize // 4
+    c = np.zeros((len(u), 9), dtype=np.int64)
+    if ancho:
+        c[:, :min(ancho, 9)] = u.view(np.uint32).reshape(len(u), ancho)[:, :9]
+    d = c - ord("0")
+    digito = (d >= 0) & (d <= 9)
+    dos_puntos = c[:, 2] == ord(":")
+    encaja = dos_puntos & digito[:, [0, 1, 3, 4]].all(axis=1) & (
+        (c[:, 5] == 0)
+        | ((c[:, 5] == ord(":")) & digito[:, 6] & digito[:, 7] & (c[:, 8] == 0))
+    )
+    horas = (d[:, 0] * 10 + d[:, 1]).astype("float64")
+    minutos = (d[:, 3] * 10 + d[:, 4]).astype("float64")
+    return horas, minutos, encaja
+
+
+def _trunc(valores):
+    """``int(x)`` en coma flotante: trunca hacia cero; infinitos y NaN → NaN."""
+    valores = np.asarray(valores, dtype="float64")
+    return np.where(np.isfinite(valores), np.trunc(valores), np.nan)
+
+
+def _horas_minutos(hora):
+    """Parser común de la columna ``hora``: arrays (horas, minutos), uno por fila.
+
+    "HH:MM" y "HH:MM:SS" → (HH, MM) (los segundos se ignoran); números y
+    textos sin ":" → (valor, 0), con sus decimales; lo no interpretable →
+    NaN. Solo se parsean los valores distintos (hay pocos) y se reparten a
+    las filas.
+    """
+    hora = pd.Series(hora)
+    if pd.api.types.is_numeric_dtype(hora) and not isinstance(hora.dtype, pd.CategoricalDtype):
+        return hora.to_numpy(dtype="float64", na_value=np.nan), np.zeros(len(hora))
+
+    codigos, distintos = pd.factorize(hora)
+    valores = pd.Series(distintos, dtype="object")
+    numericos = valores.map(lambda v: isinstance(v, (int, float))).to_numpy(dtype=bool)
+    horas = np.full(len(valores), np.nan)
+    minutos = np.zeros(len(valores))
+    if numericos.any():
+        horas[numericos] = valores[numericos].astype("float64")
+    if not numericos.all():
+        # Formato habitual con NumPy; el resto (espacios, decimales...) con .str
+        h, m, encaja = _hhmm(valores[~numericos].to_numpy())
+        if not encaja.all():
+            s = valores[~numericos][~encaja].astype(str).str.strip()
+            partes = s.str.split(":", n=2, expand=True)
+            h[~encaja] = _to_float(partes[0])
+            m[~encaja] = 0.0
+            if partes.shape[1] > 1:
+                # Sin ":" el valor son horas (posiblemente con decimales)
+                con_minutos = partes[1].notna().to_numpy()
+                m[~encaja] = np.where(con_minutos, _to_float(partes[1]), 0.0)
+        horas[~numericos] = h
+        minutos[~numericos] = m
+    # El código -1 (nulos) apunta al NaN añadido al final
+    return np.append(horas, np.nan)[codigos], np.append(minutos, np.nan)[codigos]
+
+
+def hora_minutes(hora):
+    """Minutos desde medianoche de una columna ``hora`` en cualquiera de sus formatos.
+
+    Acepta "HH:MM", "HH:MM:SS" y números (horas, p. ej. 11 o 11.5). Lo que
+    no se puede interpretar queda como NaN.
+    """
+    horas, minutos = _horas_minutos(hora)
+    total = horas * 60 + minutos
+    return pd.Series(np.where(np.isfinite(total), total, np.nan), index=pd.Series(hora).index)
+
+
+def hora_decimal(hora):
+    """Hora en horas decimales (11:30 → 11.5), igual que el antiguo ``parse_hora`` fila a fila.
+
+    "HH:MM" y "HH:MM:SS" → horas + minutos / 60 (los segundos se ignoran);
+    números → parte entera (11.5 → 11); lo no interpretable → NaN.
+    """
+    horas, minutos = _horas_minutos(hora)
+    return pd.Series(_trunc(horas) + _trunc(minutos) / 60.0, index=pd.Series(hora).index)
+
+
+def parse_hora(valor):
+    """Versión de un solo valor de ``hora_decimal`` (formulario, API)."""
+    return float(hora_decimal(pd.Series([valor], dtype="object")).iloc[0])
+
+
+def slot_ids(fecha, hora):
+    """Slot de 15 min (Int32, nulo si fecha u hora no son válidas)."""
+    dias = pd.to_datetime(pd.Series(fecha), errors="coerce").dt.normalize()
+    dias = (dias - pd.Timestamp("1970-01-01")) // pd.Timedelta(minutes=1)
+    minutos = dias.astype("float64").to_numpy() + np.floor(hora_minutes(hora).to_numpy())
+    slot = np.floor(minutos / SLOT_MINUTES) * SLOT_MINUTES
+    return pd.Series(slot, index=pd.Series(fecha).index).astype("Int32")
+
+
+def slot_to_timestamp(slot):
+    """Inicio del slot como ``Timestamp`` (hora local, sin zona)."""
+    return pd.to_datetime(pd.Series(slot).astype("int64"), unit="m")
+
+
+class AttractionCodes:
+    """Mapa persistente nombre de atracción → código int16.
+
+    Los códigos no se reutilizan nunca: una atracción nueva recibe el
+    siguiente libre y el fichero se reescribe de forma atómica. Solo la
+    ingesta registra atracciones (``encode(add=True)``); las consultas no
+    escriben nunca. Cada proceso comparte una instancia por fichero
+    (``shared``), que solo vuelve a leer el fichero si otro proceso lo ha
+    cambiado y aparece un nombre desconocido.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path=ATTRACTION_CODES_FILE):
+        self.path = path
+        self.codes = {}
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def shared(cls, path=ATTRACTION_CODES_FILE):
+        """Instancia del proceso para ``path`` (cacheada por ruta absoluta)."""
+        path = os.path.abspath(path)
+        with cls._shared_lock:
+            if path not in cls._shared:
+                cls._shared[path] = cls(path)
+            return cls._shared[path]
+
+    def _load(self):
+        """Lee el fichero si cambió desde la última lectura."""
+        if not os.path.exists(self.path):
+            return
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns != self._mtime_ns:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.codes = json.load(f)
+            self._mtime_ns = mtime_ns
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.codes, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime_ns = os.stat(self.path).st_mtime_ns
+
+    def encode(self, nombres, add=False):
+        """Códigos (Int16) de una columna de nombres; los desconocidos quedan nulos.
+
+        Con ``add`` (solo desde la ingesta) los nombres nuevos se registran.
+        """
+        nombres = pd.Series(nombres).astype("string").str.strip()
+        distintos = nombres.dropna().unique()
+        with self._lock:
+            nuevos = [n for n in distintos if n not in self.codes]
+            if nuevos:
+                # Otro proceso (la ingesta) puede haber añadido atracciones desde que leímos el fichero
+                self._load()
+                nuevos = [n for n in nuevos if n not in self.codes]
+            if nuevos and add:
+                siguiente = max(self.codes.values(), default=-1) + 1
+                if siguiente + len(nuevos) > np.iinfo(np.int16).max:
+                    raise OverflowError("❌ No quedan códigos int16 libres para atracciones")
+                for i, nombre in enumerate(sorted(nuevos)):
+                    self.codes[nombre] = siguiente + i
+                self._save()
+            return nombres.map(self.codes).astype("Int16")
+
+    def decode(self, codigos):
+        """Nombres de una columna de códigos."""
+        nombres = {v: k for k, v in self.codes.items()}
+        return pd.Series(codigos).map(nombres)
+
+
+def add_keys(df, codes=None, overwrite=False, add=False):
+    """Devuelve una copia de ``df`` con ``slot`` y ``atraccion_id``.
+
+    Si ya las trae solo se completan las filas que no las tienen (salvo
+    ``overwrite``). ``add`` registra las atracciones nuevas: solo para
+    quien escribe datos (ingesta, histórico, migraciones).
+    """
+    df = df.copy()
+    if df.empty:
+        df[SLOT_COL] = pd.Series(dtype="Int32")
+        df[ATTRACTION_COL] = pd.Series(dtype="Int16")
+        return df
+    codes = codes or AttractionCodes.shared()
+    slot = slot_ids(df["fecha"], df["hora"])
+    atraccion = codes.encode(df["atraccion"], add=add)
+    if not overwrite and SLOT_COL in df.columns:
+        slot = pd.to_numeric(df[SLOT_COL], errors="coerce").astype("Int32").fillna(slot)
+    if not overwrite and ATTRACTION_COL in df.columns:
+        atraccion = pd.to_numeric(df[ATTRACTION_COL], errors="coerce").astype("Int16").fillna(atraccion)
+    df[SLOT_COL] = slot.to_numpy()
+    df[ATTRACTION_COL] = atraccion.to_numpy()
+    return df
+
+
+def dedupe(df, keep="last"):
+    """Quita duplicados por clave entera (añadiéndola si falta)."""
+    if SLOT_COL not in df.columns or ATTRACTION_COL not in df.columns or df[KEY_COLS].isna().any().any():
+        df = add_keys(df)
+    return df.drop_duplicates(subset=KEY_COLS, keep=keep)
+
+
+def key_array(df):
+    """Clave combinada int64 (slot << 16 | atraccion_id) para cruces rápidos en memoria."""
+    return (df[SLOT_COL].astype("int64").to_numpy() << 16) | df[ATTRACTION_COL].astype("int64").to_numpy()
+
+
+def migrate_csv(path, codes=None):
+    """Añade las claves enteras a un CSV y quita los casi-duplicados. Devuelve (filas, eliminadas)."""
+    df = pd.read_csv(path)
+    antes = len(df)
+    df = add_keys(df.dropna(subset=["fecha", "hora", "atraccion"]), codes, overwrite=True, add=True)
+    df = df.dropna(subset=KEY_COLS).drop_duplicates(subset=KEY_COLS, keep="last")
+    df.to_csv(path + ".tmp", index=False, encoding="utf-8-sig")
+    os.replace(path + ".tmp", path)
+    return len(df), antes - len(df)
+
+
+def migrate(root=None, csv_paths=(), index_path=None):
+    """Migración única: claves enteras en el histórico particionado, los CSV indicados y el índice."""
+    from src.data_preprocessing import history_store
+    from src.data_preprocessing.key_index import KeyIndex, KEY_INDEX_FILE
+
+    root = root or history_store.HISTORY_DIR
+    codes = AttractionCodes.shared()
+    for path in csv_paths:
+        if os.path.exists(path):
+            filas, eliminadas = migrate_csv(path, codes)
+            print(f"🔑 {path}: {filas} filas, {eliminadas} casi-duplicados eliminados")
+
+    total = eliminadas = 0
+    for fecha in history_store.list_partitions(root):
+        df = history_store.read_history(root, start=fecha, end=fecha)
+        n = len(df)
+        df = add_keys(df, codes, overwrite=True, add=True).dropna(subset=KEY_COLS)
+        df = df.drop_duplicates(subset=KEY_COLS, keep="last")
+        history_store.replace_partition(df, fecha, root)
+        total += len(df)
+        eliminadas += n - len(df)
+    print(f"🔑 Histórico: {total} filas, {eliminadas} casi-duplicados eliminados → {root}")
+
+    KeyIndex(index_path or KEY_INDEX_FILE).rebuild_from_store(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claves enteras (slot de 15 min + código de atracción)")
+    parser.add_argument("--migrate", action="store_true",
+                        help="añade las claves al histórico, a los CSV de --csv y reconstruye el índice")
+    parser.add_argument("--root", help="raíz del histórico particionado")
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV a migrar además del histórico")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate(args.root, args.csv)
+    else:
+        codes = AttractionCodes()
+        print(f"🎢 {len(codes.codes)} atracciones codificadas en {codes.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import slot_keys
+from src.data_preprocessing.slot_cube import SlotCube, SLOTS_PER_DAY, slot_of
+
+# Tendencia reciente de cada atracción sobre la rejilla regular del cubo
+# (atracciones × slots de 15 min). La feature del slot t solo usa lecturas
+# de slots anteriores a t, así que vale igual para entrenar (filas del
+# histórico) que para puntuar en vivo (el slot que viene). Todo se calcula
+# sobre los arrays 2D de una vez: cada fila es una atracción y las ventanas
+# se desplazan por el eje del tiempo, sin bucles por atracción.
+#
+# Sin ninguna lectura previa de la atracción en el mismo día, todas las
+# features son NaN. Es lo que ocurre siempre al predecir un día futuro (el
+# cubo aún no tiene lecturas de ese día), así que el entrenamiento incluye
+# también ese caso (la primera lectura de cada día) en lugar de arrastrar
+# las del día anterior.
+LAGS = {"espera_lag_15": 1, "espera_lag_30": 2, "espera_lag_60": 4}
+WINDOWS = {"60": 4, "120": 8}  # minutos → slots
+SLOPE_WINDOW = 4               # pendiente por mínimos cuadrados de la última hora
+FEATURE_COLS = list(LAGS) \
+    + [f"espera_media_{m}" for m in WINDOWS] + [f"espera_max_{m}" for m in WINDOWS] \
+    + ["espera_pendiente_60", "minutos_desde_apertura"]
+# Slots anteriores de los que depende la feature del slot t
+LOOKBACK = max(max(LAGS.values()), max(WINDOWS.values()) + 1, SLOPE_WINDOW + 1)
+
+
+def _shift(a, k):
+    """Desplaza ``k`` slots hacia la derecha (el slot t recibe el valor de t - k); NaN por la izquierda."""
+    out = np.full_like(a, np.nan)
+    if k < a.shape[1]:
+        out[:, k:] = a[:, :a.shape[1] - k]
+    return out
+
+
+def _rolling_mean(a, w):
+    """Media de los valores no nulos de la ventana [t - w + 1, t], con sumas acumuladas: O(n)."""
+    valido = ~np.isnan(a)
+    suma = np.cumsum(np.where(valido, a, 0.0), axis=1)
+    cuenta = np.cumsum(valido, axis=1, dtype=np.int64)
+    suma[:, w:] -= suma[:, :-w].copy()
+    cuenta[:, w:] -= cuenta[:, :-w].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cuenta > 0, suma / cuenta, np.nan)
+
+
+def _rolling_max(a, w):
+    """Máximo de la ventana [t - w + 1, t] ignorando nulos, duplicando el ancho: O(n log w)."""
+    resultado, ancho = a, 1
+    while ancho * 2 <= w:
+        resultado = np.fmax(resultado, _shift(resultado, ancho))
+        ancho *= 2
+    if ancho < w:
+        resultado = np.fmax(resultado, _shift(resultado, w - ancho))
+    return resultado
+
+
+def _rolling_slope(a, w):
+    """Pendiente (minutos de espera por hora) de la recta de mínimos cuadrados de la ventana."""
+    n = sx = sxx = sy = sxy = 0.0
+    for j in range(w):
+        y = _shift(a, j)
+        valido = ~np.isnan(y)
+        x = -j * slot_keys.SLOT_MINUTES / 60.0
+        y = np.where(valido, y, 0.0)
+        n = n + valido
+        sx = sx + valido * x
+        sxx = sxx + valido * x * x
+        sy = sy + y
+        sxy = sxy + y * x
+    den = n * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((n >= 2) & (den > 0), (n * sxy - sx * sy) / den, np.nan)
+
+
+def _minutes_since_open(abierta_previa):
+    """Minutos desde la primera lectura abierta del día hasta t (la rejilla empieza a medianoche)."""
+    filas, slots = abierta_previa.shape
+    dias = abierta_previa.reshape(filas, slots // SLOTS_PER_DAY, SLOTS_PER_DAY)
+    pos = np.arange(SLOTS_PER_DAY)
+    primera = np.minimum.accumulate(np.where(dias, pos, SLOTS_PER_DAY), axis=2)
+    minutos = np.where(primera < SLOTS_PER_DAY, (pos - primera) * slot_keys.SLOT_MINUTES, np.nan)
+    return minutos.reshape(filas, slots)
+
+
+def _sin_lecturas_hoy(espera):
+    """True en los slots sin ninguna lectura anterior de la atracción en el mismo día."""
+    filas, slots = espera.shape
+    dias = ~np.isnan(espera).reshape(filas, slots // SLOTS_PER_DAY, SLOTS_PER_DAY)
+    previas = np.cumsum(dias, axis=2) - dias
+    return (previas == 0).reshape(filas, slots)
+
+
+def compute(espera, abierta):
+    """Features de tendencia de una rejilla atracciones × slots que empieza a medianoche.
+
+    ``espera`` es float con NaN en los huecos y ``abierta`` 1/0 (otros
+    valores cuentan como cerrada o sin dato). Devuelve {feature: array
+    float32 de la misma forma}; la columna t solo depende de las columnas < t,
+    y es NaN si ninguna de las de ese día tiene lectura.
+    """
+    espera = np.asarray(espera, dtype=np.float64)
+    filas, slots = espera.shape
+    # Días completos para el cálculo de la apertura; el relleno se recorta al final
+    relleno = -slots % SLOTS_PER_DAY
+    espera = np.pad(espera, ((0, 0), (0, relleno)), constant_values=np.nan)
+    abierta = np.pad(np.asarray(abierta) == 1, ((0, 0), (0, relleno)))
+
+    previa = _shift(espera, 1)
+    features = {nombre: _shift(espera, k) for nombre, k in LAGS.items()}
+    for minutos, w in WINDOWS.items():
+        features[f"espera_media_{minutos}"] = _rolling_mean(previa, w)
+        features[f"espera_max_{minutos}"] = _rolling_max(previa, w)
+    features["espera_pendiente_60"] = _rolling_slope(previa, SLOPE_WINDOW)
+    abierta_previa = np.zeros_like(abierta)
+    abierta_previa[:, 1:] = abierta[:, :-1]
+    # A medianoche la lectura anterior es del día antes: no cuenta como apertura de hoy
+    abierta_previa[:, ::SLOTS_PER_DAY] = False
+    features["minutos_desde_apertura"] = _minutes_since_open(abierta_previa)
+    # Como en un día futuro: sin lecturas de hoy no se usan las del día anterior
+    sin_lecturas = _sin_lecturas_hoy(espera)
+    for nombre in FEATURE_COLS:
+        features[nombre][sin_lecturas] = np.nan
+    return {nombre: features[nombre][:, :slots].astype(np.float32) for nombre in FEATURE_COLS}
+
+
+def grid_features(cube, start, end, atracciones=None):
+    """Features de los días ``start``–``end`` (incluidos) leídos del cubo: (features, rejilla)."""
+    rejilla = cube.slice(pd.Timestamp(start).normalize(), end, atracciones)
+    espera = rejilla["espera"].astype(np.float64).filled(np.nan)
+    abierta = rejilla["abierta"].filled(-1)
+    return compute(espera, abierta), rejilla
+
+
+def _nan_features(n):
+    return {col: np.full(n, np.nan, dtype=np.float32) for col in FEATURE_COLS}
+
+
+def attach(df, cube=None):
+    """Añade FEATURE_COLS a las filas de ``df`` (una por atracción y slot) uniendo por clave entera.
+
+    Se calculan las features de todas las atracciones en el rango de días
+    de ``df`` y se recogen por (atraccion_id, slot) con indexado de arrays.
+    Las filas sin datos previos en el cubo quedan con NaN.
+    """
+    if not set(slot_keys.KEY_COLS) <= set(df.columns) or df[slot_keys.KEY_COLS].isna().any().any():
+        df = slot_keys.add_keys(df)
+    else:
+        df = df.copy(deep=False)
+    cube = cube or SlotCube()
+    valores = _nan_features(len(df))
+    validas = df[slot_keys.KEY_COLS].notna().all(axis=1).to_numpy()
+    if validas.any() and cube.slot_inicio is not None:
+        slots = df[slot_keys.SLOT_COL].to_numpy(dtype="float64")[validas].astype(np.int64)
+        codigos = df[slot_keys.ATTRACTION_COL].to_numpy(dtype="float64")[validas].astype(np.int64)
+        inicio = slot_keys.slot_to_timestamp([slots.min()]).iloc[0]
+        fin = slot_keys.slot_to_timestamp([slots.max()]).iloc[0].normalize()
+        features, rejilla = grid_features(cube, inicio, fin)
+        if len(rejilla["slot"]):
+            filas = pd.Index(rejilla["atraccion_id"]).get_indexer(codigos)
+            cols = (slots - rejilla["slot"][0]) // slot_keys.SLOT_MINUTES
+            ok = (filas >= 0) & (cols >= 0) & (cols < len(rejilla["slot"]))
+            destino = np.flatnonzero(validas)[ok]
+            for col in FEATURE_COLS:
+                valores[col][destino] = features[col][filas[ok], cols[ok]]
+    for col in FEATURE_COLS:
+        df[col] = valores[col]
+    return df
+
+
+def features_at(instante, atraccion, cube=None, codes=None):
+    """Features de una atracción para el slot que contiene ``instante`` (predicción en vivo).
+
+    Solo se leen del cubo esa atracción y los slots de los que dependen (desde
+    la medianoche del día, o la anterior si las ventanas la cruzan). Si el
+    slot aún no está en el cubo (el que viene), se calcula con las lecturas
+    anteriores. predict.py pasa el cubo y los códigos cargados con el modelo.
+    """
+    codes = codes or slot_keys.AttractionCodes.shared()
+    # Un solo nombre: consulta directa al mapa (encode solo si no está, por si cambió el fichero)
+    codigo = codes.codes.get(str(atraccion).strip())
+    if codigo is None:
+        codigo = codes.encode([atraccion]).iloc[0]
+    vacio = {col: np.nan for col in FEATURE_COLS}
+    if pd.isna(codigo):
+        return vacio
+    cube = cube or SlotCube()
+    slot = slot_of(instante)
+    fin = pd.Timestamp("1970-01-01") + pd.Timedelta(minutes=slot)
+    inicio = (fin - pd.Timedelta(minutes=LOOKBACK * slot_keys.SLOT_MINUTES)).normalize()
+    rejilla = cube.slice(inicio, fin, [int(codigo)])
+    if not len(rejilla["atraccion_id"]) or not len(rejilla["slot"]):
+        return vacio
+    col = (slot - int(rejilla["slot"][0])) // slot_keys.SLOT_MINUTES
+    espera = rejilla["espera"].astype(np.float64).filled(np.nan)
+    abierta = rejilla["abierta"].filled(-1)
+    falta = col + 1 - espera.shape[1]
+    if falta > 0:
+        espera = np.pad(espera, ((0, 0), (0, falta)), constant_values=np.nan)
+        abierta = np.pad(abierta, ((0, 0), (0, falta)), constant_values=-1)
+    features = compute(espera, abierta)
+    return {nombre: float(features[nombre][0, col]) for nombre in FEATURE_COLS}
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import argparse
+from datetime import date, timedelta
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing.weather_store import WeatherStore, RateLimiter, day_chunks, WEATHER_STORE_FILE
+
+# Relleno del clima de fechas pasadas con la API de archivo de open-meteo
+# (/v1/forecast solo cubre unos meses hacia atrás). Escribe en la misma
+# cache en disco que usa el enriquecimiento.
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+BACKFILL_PROGRESS_FILE = os.path.join("data", "history", "clima_backfill.json")
+# El archivo tarda unos días en tener datos: lo más reciente se deja a la previsión
+ARCHIVE_DELAY_DAYS = 5
+BACKFILL_CHUNK_DAYS = 90
+BACKFILL_MAX_WORKERS = 2
+BACKFILL_REQUESTS_PER_S = 1.0
+
+
+class BackfillProgress:
+    """Rangos ya descargados, guardados tras cada rango para poder reanudar."""
+
+    def __init__(self, path=BACKFILL_PROGRESS_FILE):
+        self.path = path
+        self.hechos = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.hechos = [tuple(r) for r in json.load(f).get("hechos", [])]
+
+    def days_done(self):
+        dias = set()
+        for inicio, fin in self.hechos:
+            dias.update(pd.date_range(inicio, fin).strftime("%Y-%m-%d"))
+        return dias
+
+    def mark_done(self, rango):
+        self.hechos.append(tuple(rango))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"hechos": sorted(self.hechos)}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.hechos = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def history_span(root=history_store.HISTORY_DIR):
+    """(primera, última) fecha del histórico particionado, o None si está vacío."""
+    fechas = history_store.list_partitions(root)
+    return (fechas[0], fechas[-1]) if fechas else None
+
+
+def backfill(start, end, store_path=WEATHER_STORE_FILE, progress_file=BACKFILL_PROGRESS_FILE, url=None,
+             chunk_days=BACKFILL_CHUNK_DAYS, max_workers=BACKFILL_MAX_WORKERS,
+             requests_per_s=BACKFILL_REQUESTS_PER_S, today=None):
+    """Descarga del archivo los días de ``start`` a ``end`` que faltan en la cache.
+
+    Los días que ya están en la cache o en el fichero de progreso no se
+    piden. Devuelve (rangos pedidos, rangos fallidos).
+    """
+    today = today or date.today()
+    end = min(pd.Timestamp(end).date(), today - timedelta(days=ARCHIVE_DELAY_DAYS))
+    dias = pd.date_range(start, end).strftime("%Y-%m-%d").tolist()
+    if not dias:
+        print("✅ Nada que rellenar en ese rango")
+        return [], []
+
+    store = WeatherStore(store_path)
+    progress = BackfillProgress(progress_file)
+    _, _, faltan = store.load(dias)
+    hechos = progress.days_done()
+    faltan = [d for d in faltan if d not in hechos]
+    rangos = day_chunks(faltan, chunk_days)
+    print(f"🗄️ {len(dias)} días en {dias[0]} → {dias[-1]}: {len(dias) - len(faltan)} ya guardados, "
+          f"{len(faltan)} por descargar en {len(rangos)} peticiones")
+    if not rangos:
+        return [], []
+
+    def on_saved(rango):
+        progress.mark_done(rango)
+        print(f"   ✅ {rango[0]} → {rango[1]}")
+
+    fallidos = store.fetch_ranges(rangos, url=url or ARCHIVE_URL, max_workers=max_workers,
+                                  limiter=RateLimiter(requests_per_s), on_saved=on_saved)
+    print(f"🌦️ Relleno terminado: {len(rangos) - len(fallidos)}/{len(rangos)} rangos; {store.summary()}")
+    if fallidos:
+        print("⚠️ Vuelve a ejecutar para reintentar los rangos fallidos")
+    return rangos, fallidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relleno del clima histórico con la API de archivo de open-meteo")
+    parser.add_argument("--start", help="por defecto, la primera fecha del histórico")
+    parser.add_argument("--end", help="por defecto, la última fecha del histórico")
+    parser.add_argument("--url", help=f"por defecto {ARCHIVE_URL}")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS)
+    parser.add_argument("--workers", type=int, default=BACKFILL_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=BACKFILL_REQUESTS_PER_S, help="peticiones por segundo")
+    parser.add_argument("--reset", action="store_true", help="olvida el progreso guardado")
+    args = parser.parse_args()
+
+    if args.reset:
+        BackfillProgress().clear()
+    span = history_span()
+    start = args.start or (span and span[0])
+    end = args.end or (span and span[1])
+    if not start or not end:
+        raise SystemExit("❌ El histórico está vacío: indica --start y --end")
+    backfill(start, end, url=args.url, chunk_days=args.chunk_days, max_workers=args.workers,
+             requests_per_s=args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import requests
+import pandas as pd
+
+# Clima horario de open-meteo persistido en disco, compartido por
+# scripts/weather_enrichment.py, src/processing/climatologia_datos.py y
+# cualquier relleno histórico. Clave: (lat, lon, fecha, hora entera).
+WEATHER_STORE_FILE = os.path.join("data", "history", "clima.sqlite")
+LAT, LON = 40.2068, -3.6128
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+HOURLY_VARS = ["temperature_2m", "relative_humidity_2m", "apparent_temperature", "weathercode"]
+HTTP_TIMEOUT = (5, 15)
+# Una hora descargada cuando ya habían pasado HISTORICO_TRAS desde ella es
+# definitiva y no se vuelve a pedir; las demás (previsión) caducan a los FORECAST_TTL.
+HISTORICO_TRAS = timedelta(hours=2)
+FORECAST_TTL = timedelta(hours=3)
+# Descargas grandes (rellenos, climatología): días por petición, hilos y ritmo máximo
+CHUNK_DAYS = 7
+MAX_WORKERS = 4
+MAX_REQUESTS_PER_S = 5.0
+
+
+def fetch_open_meteo(start, end, url=None, lat=LAT, lon=LON):
+    """Una petición a open-meteo con el clima horario de ``start`` a ``end`` (incluidos).
+
+    Devuelve el bloque ``hourly`` de la respuesta; lanza excepción si falla.
+    """
+    url = (
+        f"{url or OPEN_METEO_URL}?"
+        f"latitude={lat}&longitude={lon}"
+        f"&hourly={','.join(HOURLY_VARS)}"
+        f"&start_date={start}&end_date={end}&timezone=Europe/Madrid"
+    )
+    response = requests.get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["hourly"]
+
+
+class RateLimiter:
+    """Espaciado mínimo entre peticiones, compartido por todos los hilos."""
+
+    def __init__(self, per_second=MAX_REQUESTS_PER_S, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / per_second
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = self.clock()
+            turno = max(now, self.next_slot)
+            self.next_slot = turno + self.interval
+        if turno > now:
+            self.sleep(turno - now)
+
+
+def day_chunks(fechas, chunk_days=CHUNK_DAYS):
+    """Agrupa días ("YYYY-MM-DD") en rangos (inicio, fin) de días seguidos de como mucho ``chunk_days``."""
+    rangos = []
+    for dia in sorted(date.fromisoformat(f) for f in set(fechas)):
+        if rangos and dia - rangos[-1][1] == timedelta(days=1) and (dia - rangos[-1][0]).days < chunk_days:
+            rangos[-1][1] = dia
+        else:
+            rangos.append([dia, dia])
+    return [(inicio.isoformat(), fin.isoformat()) for inicio, fin in rangos]
+
+
+class WeatherStore:
+    """Cache persistente (SQLite) del clima horario con TTL para la previsión.
+
+    ``hourly(fechas)`` devuelve el clima de todas las horas de esos días,
+    descargando en una sola petición solo los días que faltan o han
+    caducado. Lleva la cuenta de aciertos, fallos y peticiones HTTP.
+    """
+
+    def __init__(self, path=WEATHER_STORE_FILE, lat=LAT, lon=LON, forecast_ttl=FORECAST_TTL,
+                 clock=datetime.now, fetcher=fetch_open_meteo):
+        self.path = path
+        self.lat = lat
+        self.lon = lon
+        self.forecast_ttl = forecast_ttl
+        self.clock = clock
+        self.fetcher = fetcher
+        self.stats = {"aciertos": 0, "fallos": 0, "peticiones": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS clima ("
+                " lat REAL NOT NULL, lon REAL NOT NULL, fecha TEXT NOT NULL, hora INTEGER NOT NULL,"
+                " temperatura REAL, humedad REAL, sensacion_termica REAL, codigo_clima REAL,"
+                " descargado TEXT NOT NULL, definitivo INTEGER NOT NULL,"
+                " PRIMARY KEY (lat, lon, fecha, hora)) WITHOUT ROWID"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _read(self, fechas):
+        fechas = sorted(set(fechas))
+        if not fechas:
+            return {}, {}, []
+        limite = (self.clock() - self.forecast_ttl).isoformat(timespec="seconds")
+        vigentes, caducadas = {}, {}
+        with self._connect() as conn:
+            filas = conn.execute(
+                "SELECT fecha, hora, temperatura, humedad, sensacion_termica, codigo_clima,"
+                " definitivo OR descargado >= ? FROM clima"
+                f" WHERE lat = ? AND lon = ? AND fecha IN ({','.join('?' * len(fechas))})",
+                [limite, self.lat, self.lon] + fechas,
+            ).fetchall()
+        for fecha, hora, temp, hum, feel, code, vigente in filas:
+            (vigentes if vigente else caducadas)[(fecha, hora)] = (temp, hum, feel, code)
+        faltan = [f for f in fechas if any((f, h) not in vigentes for h in range(24))]
+        return vigentes, caducadas, faltan
+
+    def load(self, fechas):
+        """Lee del disco las horas de ``fechas`` y cuenta aciertos/fallos.
+
+        Devuelve (vigentes, caducadas, dias_a_descargar): dos dicts
+        {(fecha, hora): (temperatura, humedad, sensación, código)} y la lista
+        ordenada de días con alguna hora que falta o ha caducado.
+        """
+        vigentes, caducadas, faltan = self._read(fechas)
+        self.stats["aciertos"] += len(set(fechas)) * 24 - len(faltan) * 24
+        self.stats["fallos"] += len(faltan) * 24
+        return vigentes, caducadas, faltan
+
+    def save(self, hourly):
+        """Guarda el bloque ``hourly`` de una respuesta de open-meteo.
+
+        Las horas sin dato (el archivo tarda unos días en tenerlas) nunca se
+        dan por definitivas.
+        """
+        ahora = self.clock()
+        filas = []
+        for t, temp, hum, feel, code in zip(hourly["time"], *(hourly[v] for v in HOURLY_VARS)):
+            instante = datetime.fromisoformat(t)
+            filas.append((self.lat, self.lon, t[:10], instante.hour, temp, hum, feel, code,
+                          ahora.isoformat(timespec="seconds"),
+                          int(ahora - instante >= HISTORICO_TRAS and temp is not None)))
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO clima VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", filas)
+        return len(filas)
+
+    def fetch_ranges(self, rangos, url=None, max_workers=1, limiter=None, on_saved=None):
+        """Descarga y guarda rangos (inicio, fin) en paralelo (``max_workers`` hilos).
+
+        ``limiter`` marca el ritmo de las peticiones y ``on_saved(rango)`` se
+        llama tras guardar cada rango. Devuelve los rangos que fallaron.
+        """
+        def fetch(rango):
+            if limiter is not None:
+                limiter.wait()
+            return self.fetcher(*rango, url=url, lat=self.lat, lon=self.lon)
+
+        fallidos = []
+        self.stats["peticiones"] += len(rangos)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rangos)))) as pool:
+            futuros = {pool.submit(fetch, rango): rango for rango in rangos}
+            # Las escrituras en SQLite se hacen desde este hilo, según llegan las respuestas
+            for futuro in as_completed(futuros):
+                rango = futuros[futuro]
+                try:
+                    self.save(futuro.result())
+                except Exception as e:
+                    print(f"⚠️ Error descargando clima {rango[0]} → {rango[1]}: {e}")
+                    fallidos.append(rango)
+                    continue
+                if on_saved is not None:
+                    on_saved(rango)
+        return fallidos
+
+    def hourly(self, fechas, url=None, chunk_days=None, max_workers=1, limiter=None):
+        """Clima de todas las horas de ``fechas`` ("YYYY-MM-DD"), descargando lo que falte.
+
+        Por defecto los días que faltan se piden en una sola petición. Con
+        ``chunk_days`` se piden por rangos de días seguidos, en paralelo
+        (``max_workers`` hilos) y al ritmo que marque ``limiter``. Si una
+        descarga falla se usan las horas caducadas que hubiera.
+        """
+        vigentes, caducadas, faltan = self.load(fechas)
+        if not faltan:
+            return {**caducadas, **vigentes}
+        rangos = day_chunks(faltan, chunk_days) if chunk_days else [(faltan[0], faltan[-1])]
+        self.fetch_ranges(rangos, url=url, max_workers=max_workers, limiter=limiter)
+        vigentes, caducadas, _ = self._read(fechas)
+        return {**caducadas, **vigentes}
+
+    def summary(self):
+        s = self.stats
+        return f"{s['aciertos']} horas en cache, {s['fallos']} sin cache, {s['peticiones']} peticiones HTTP"
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM clima").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache persistente del clima horario de open-meteo")
+    parser.add_argument("--path", default=WEATHER_STORE_FILE)
+    parser.add_argument("--fetch", nargs=2, metavar=("INICIO", "FIN"), help="descarga y guarda un rango de días")
+    args = parser.parse_args()
+
+    store = WeatherStore(args.path)
+    if args.fetch:
+        store.hourly(pd.date_range(*args.fetch).strftime("%Y-%m-%d").tolist())
+        print(f"🌦️ {store.summary()}")
+    print(f"🗄️ {len(store)} horas guardadas en {args.path}")
+
+
+if __name__ == "__main__":
+    main()
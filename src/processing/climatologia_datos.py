@@ -1,71 +1,56 @@
 import pandas as pd
-import requests
-from datetime import datetime
 import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.weather_store import (
+    WeatherStore, RateLimiter, CHUNK_DAYS, MAX_WORKERS, MAX_REQUESTS_PER_S
+)
+from src.data_preprocessing import slot_keys
+from src.data_preprocessing import history_store
 
 # Coordenadas del Parque Warner Madrid
 LAT, LON = 40.2068, -3.6128
+# Configurable para apuntar a un servidor local (p. ej. benchmarks/replay_server.py)
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
 
-INPUT_PATH = "data/processed/queue_times_all_enriched.csv"
 OUTPUT_PATH = "data/clean/queue_times_weather.csv"
-
-def get_weather_for_time(date_str, hour_str):
-    """
-    Consulta la API de Open-Meteo para obtener datos de clima por hora.
-    Devuelve un diccionario con temperatura, humedad, etc.
-    """
-    try:
-        date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        hour = int(hour_str.split(":")[0])
-
-        url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={LAT}&longitude={LON}"
-            f"&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,weathercode"
-            f"&start_date={date}&end_date={date}&timezone=Europe/Madrid"
-        )
-
-        response = requests.get(url)
-        data = response.json()
-
-        temps = data["hourly"]["temperature_2m"]
-        hums = data["hourly"]["relative_humidity_2m"]
-        feels = data["hourly"]["apparent_temperature"]
-        weather_codes = data["hourly"]["weathercode"]
-        hours = data["hourly"]["time"]
-
-        # Buscar la hora más cercana
-        for i, t in enumerate(hours):
-            if f"T{hour:02d}:00" in t:
-                return {
-                    "temperatura": temps[i],
-                    "humedad": hums[i],
-                    "sensacion_termica": feels[i],
-                    "codigo_clima": weather_codes[i],
-                }
-
-        return {"temperatura": None, "humedad": None, "sensacion_termica": None, "codigo_clima": None}
-
-    except Exception as e:
-        print(f"Error obteniendo clima para {date_str} {hour_str}: {e}")
-        return {"temperatura": None, "humedad": None, "sensacion_termica": None, "codigo_clima": None}
-
+SIN_DATOS = {"temperatura": None, "humedad": None, "sensacion_termica": None, "codigo_clima": None}
 
 def enrich_with_weather(df):
     """
     Añade columnas meteorológicas al DataFrame.
+    Se sacan las (fecha, hora) distintas, se descargan en paralelo solo los
+    días que no están en la cache en disco y el resultado se reparte a las
+    filas con un merge.
     """
-    weather_data = df.apply(lambda row: get_weather_for_time(row["fecha"], row["hora"]), axis=1)
-    weather_df = pd.DataFrame(list(weather_data))
+    fechas = pd.to_datetime(df["fecha"], errors="coerce").dt.strftime("%Y-%m-%d")
+    claves = pd.DataFrame({"fecha": fechas, "hora_clima": slot_keys.hora_minutes(df["hora"]) // 60}, index=df.index)
+    unicas = claves.dropna().drop_duplicates()
+
+    store = WeatherStore(lat=LAT, lon=LON)
+    horas = store.hourly(unicas["fecha"].unique(), url=OPEN_METEO_URL, chunk_days=CHUNK_DAYS,
+                         max_workers=MAX_WORKERS, limiter=RateLimiter(MAX_REQUESTS_PER_S))
+    print(f"🌦️ Clima: {len(unicas)} horas distintas para {len(df)} filas; {store.summary()}")
+
+    valores = [horas.get((f, int(h))) or tuple(SIN_DATOS.values()) for f, h in unicas.itertuples(index=False)]
+    tabla = pd.concat([unicas.reset_index(drop=True),
+                       pd.DataFrame(valores, columns=list(SIN_DATOS), dtype="float64")], axis=1)
+    weather_df = claves.merge(tabla, on=["fecha", "hora_clima"], how="left")[list(SIN_DATOS)]
+    weather_df.index = df.index
     df = pd.concat([df, weather_df], axis=1)
     return df
 
 
 def main():
-    if not os.path.exists(INPUT_PATH):
-        raise FileNotFoundError(f"❌ No se encontró {INPUT_PATH}. Ejecuta enriquecer_features_datos.py primero.")
-    
-    df = pd.read_csv(INPUT_PATH)
+    # Todo el histórico del ETL (antes queue_times_all_enriched.csv, que ya no se actualiza)
+    df = history_store.read_history()
+    if df.empty:
+        raise FileNotFoundError(f"❌ Histórico vacío en {history_store.HISTORY_DIR}. Ejecuta ingestion/pipeline_runner.py primero.")
+    # El clima de la ingesta se sustituye por el de la cache horaria
+    df = df.drop(columns=[c for c in SIN_DATOS if c in df.columns])
     print(f"🌤️ Enriqueciendo {len(df)} registros con datos meteorológicos...")
 
     df_weather = enrich_with_weather(df)
@@ -1,10 +1,25 @@
-import pandas as pd
+import os
+import sys
 from pathlib import Path
 
-input_file = Path("data/processed/queue_times_all_enriched.csv")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing import compact_schema
+
+# El histórico particionado es la versión al día de queue_times_all_enriched.csv
+# (el ETL ya no reescribe ese CSV): se exporta completo a un único Parquet
 output_file = Path("data/processed/queue_times_all_enriched.parquet")
 
-df = pd.read_csv(input_file)
+df = history_store.read_history()
+if df.empty:
+    raise FileNotFoundError(f"❌ Histórico vacío en {history_store.HISTORY_DIR}. Ejecuta ingestion/pipeline_runner.py primero.")
+# Según el día los indicadores llegan como 0/1, True/False o vacíos (p. ej. "abierta"
+# con el calendario desconocido) y Parquet necesita un único tipo por columna
+for col in df.columns:
+    if compact_schema.is_flag(col) and df[col].dtype == object:
+        df[col] = df[col].map({True: 1, False: 0, "True": 1, "False": 0}).astype("Int8")
 df.to_parquet(output_file, index=False)
 
-print(f"✅ Archivo Parquet generado en: {output_file}")
+print(f"✅ Archivo Parquet generado en: {output_file} ({len(df)} filas)")
@@ -1,6 +1,11 @@
 import pandas as pd
 import os
-import glob
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_compaction import read_raw
 
 # === RUTAS ===
 INPUT_DIR = "data/raw/queue_times"
@@ -26,16 +31,12 @@ def add_time_features(df):
 
 
 def main():
-    # Buscar todos los CSV dentro de la carpeta
-    csv_files = glob.glob(os.path.join(INPUT_DIR, "*.csv"))
-    if not csv_files:
+    # Días compactados + CSV sueltos, ya concatenados
+    df = read_raw(INPUT_DIR, with_source=True)
+    if df.empty:
         raise FileNotFoundError(f"❌ No se encontraron archivos CSV en {INPUT_DIR}")
 
-    print(f"📂 {len(csv_files)} archivos detectados en {INPUT_DIR}")
-
-    # Leer y concatenar todos los CSV
-    dfs = [pd.read_csv(f) for f in csv_files]
-    df = pd.concat(dfs, ignore_index=True)
+    print(f"📂 {df.pop('fichero').nunique()} archivos detectados en {INPUT_DIR}")
 
     # Añadir las columnas de tiempo si faltan
     df = add_time_features(df)
@@ -1,75 +1,82 @@
+import os
+import sys
+import locale
 import pandas as pd
 from pathlib import Path
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_compaction import read_raw
+
 # 📂 Ruta donde están los CSV originales
 raw_path = Path("data/raw/queue_times")
 
 # 📂 Ruta de salida final
 output_path = Path("data/processed/queue_times_all_enriched.csv")
 
-# 🔍 Buscar todos los archivos que empiecen por 'queue_times_'
-csv_files = sorted(raw_path.glob("queue_times_*.csv"))
-
-if not csv_files:
+# Aseguramos el orden de columnas
+columnas_finales = [
+    "zona", "atraccion", "tiempo_espera", "abierta",
+    "ultima_actualizacion", "fecha", "hora", "dia_semana",
+    "timestamp", "mes", "fin_de_semana"
+]
+
+# 🔍 Snapshots 'queue_times_*': días compactados + CSV sueltos del día en curso, leídos en
+# paralelo; un CSV que no se puede leer se avisa y se descarta sin tumbar el resto
+df = read_raw(str(raw_path), with_source=True, skip_errors=True)
+if df.empty:
     raise FileNotFoundError("❌ No se encontraron archivos 'queue_times_*.csv' en data/raw/queue_times")
-
-print(f"📄 Se encontraron {len(csv_files)} archivos CSV para combinar.\n")
-
-# 📦 Lista para ir acumulando los DataFrames
-dataframes = []
-
-for csv_file in csv_files:
-    print(f"➡️ Procesando {csv_file.name} ...")
-
-    try:
-        df = pd.read_csv(csv_file)
-
-        # --- Aseguramos que las columnas esperadas existan ---
-        if "ultima_actualizacion" not in df.columns:
-            raise KeyError(f"El archivo {csv_file.name} no tiene la columna 'ultima_actualizacion'.")
-
-        # Convertir a datetime
-        df["ultima_actualizacion"] = pd.to_datetime(df["ultima_actualizacion"], errors="coerce", utc=True)
-
-        # Añadir columnas nuevas si no existen
-        if "fecha" not in df.columns:
-            df["fecha"] = df["ultima_actualizacion"].dt.date
-
-        if "hora" not in df.columns:
-            df["hora"] = df["ultima_actualizacion"].dt.strftime("%H:%M")
-
-        if "dia_semana" not in df.columns:
-            df["dia_semana"] = df["ultima_actualizacion"].dt.day_name(locale="es_ES")
-
-        # Crear columnas derivadas
-        df["timestamp"] = df["ultima_actualizacion"].dt.tz_localize(None)
-        df["mes"] = df["ultima_actualizacion"].dt.month
-        df["fin_de_semana"] = df["ultima_actualizacion"].dt.dayofweek >= 5
-
-        # --- LIMPIEZA: eliminar zonas no deseadas ---
-        df = df[~df["zona"].isin(["Halloween", "Warner Beach"])]
-
-        # Aseguramos el orden de columnas
-        columnas_finales = [
-            "zona", "atraccion", "tiempo_espera", "abierta",
-            "ultima_actualizacion", "fecha", "hora", "dia_semana",
-            "timestamp", "mes", "fin_de_semana"
-        ]
-        for col in columnas_finales:
-            if col not in df.columns:
-                df[col] = None  # si falta alguna, la rellenamos
-
-        df = df[columnas_finales]
-
-        dataframes.append(df)
-
-    except Exception as e:
-        print(f"⚠️ Error procesando {csv_file.name}: {e}\n")
-
-# 🧩 Unir todos los DataFrames en uno solo
-if dataframes:
-    df_final = pd.concat(dataframes, ignore_index=True)
-
+df = df[df["fichero"].str.startswith("queue_times_")]
+
+print(f"📄 Se encontraron {df['fichero'].nunique()} snapshots para combinar.\n")
+
+# --- Aseguramos que las columnas esperadas existan (fichero a fichero) ---
+if "ultima_actualizacion" not in df.columns:
+    df["ultima_actualizacion"] = None
+sin_columna = df["ultima_actualizacion"].isna().groupby(df["fichero"], observed=True).all()
+for fichero in sin_columna.index[sin_columna]:
+    print(f"⚠️ Error procesando {fichero}: no tiene la columna 'ultima_actualizacion'.\n")
+df = df[~df["fichero"].isin(sin_columna.index[sin_columna])].drop(columns=["fichero"])
+
+df_final = None
+
+if not df.empty:
+    # Convertir a datetime
+    df["ultima_actualizacion"] = pd.to_datetime(df["ultima_actualizacion"], errors="coerce", utc=True)
+
+    # Rellenar columnas que faltan en los ficheros antiguos
+    for col in ["fecha", "hora", "dia_semana"]:
+        if col not in df.columns:
+            df[col] = None
+    df["fecha"] = df["fecha"].where(df["fecha"].notna(), df["ultima_actualizacion"].dt.date)
+    df["hora"] = df["hora"].where(df["hora"].notna(), df["ultima_actualizacion"].dt.strftime("%H:%M"))
+    # read_raw devuelve dia_semana como category: se pasa a texto para poder rellenar días nuevos
+    df["dia_semana"] = df["dia_semana"].astype(object)
+    sin_dia = df["dia_semana"].isna()
+    if sin_dia.any():
+        try:
+            dias = df.loc[sin_dia, "ultima_actualizacion"].dt.day_name(locale="es_ES")
+        except locale.Error:
+            # Locale no instalado en el sistema
+            dias = df.loc[sin_dia, "ultima_actualizacion"].dt.day_name()
+        df.loc[sin_dia, "dia_semana"] = dias
+
+    # Crear columnas derivadas
+    df["timestamp"] = df["ultima_actualizacion"].dt.tz_localize(None)
+    df["mes"] = df["ultima_actualizacion"].dt.month
+    df["fin_de_semana"] = df["ultima_actualizacion"].dt.dayofweek >= 5
+
+    # --- LIMPIEZA: eliminar zonas no deseadas ---
+    df = df[~df["zona"].isin(["Halloween", "Warner Beach"])]
+
+    for col in columnas_finales:
+        if col not in df.columns:
+            df[col] = None  # si falta alguna, la rellenamos
+
+    df_final = df[columnas_finales]
+
+if df_final is not None:
     # 🔍 Filtramos filas vacías o sin zona
     df_final = df_final.dropna(subset=["zona"])
     df_final = df_final[df_final["zona"].str.strip() != ""]
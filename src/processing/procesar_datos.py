@@ -1,20 +1,24 @@
 import pandas as pd
-import glob
 import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.raw_compaction import read_raw
 
 # 🗂 Ruta de los CSV crudos
 RAW_PATH = "data/raw/queue_times"
 CLEAN_PATH = "data/clean/"
 
 def load_and_merge_raw_data():
-    """Carga y combina todos los CSVs generados por la ingesta."""
-    csv_files = glob.glob(os.path.join(RAW_PATH, "*.csv"))
-    if not csv_files:
+    """Carga y combina todos los snapshots de la ingesta (días compactados + CSV sueltos)."""
+    df = read_raw(RAW_PATH, with_source=True)
+    if df.empty:
         raise FileNotFoundError("❌ No se encontraron CSVs en data/raw/. Ejecuta primero ingestion.py")
-    
-    dfs = [pd.read_csv(file) for file in csv_files]
-    df = pd.concat(dfs, ignore_index=True)
-    print(f"✅ CSVs combinados: {len(csv_files)} archivos, {len(df)} filas totales")
+
+    n_files = df.pop("fichero").nunique()
+    print(f"✅ CSVs combinados: {n_files} archivos, {len(df)} filas totales")
     return df
 
 def clean_unwanted_zones(df):
@@ -2,9 +2,14 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 
 # Ruta base del script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(os.path.dirname(BASE_DIR))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from src.data_preprocessing import slot_keys
 
 input_path = os.path.join(BASE_DIR, "../../data/clean/queue_times_weather.csv")
 output_path = os.path.join(BASE_DIR, "../../data/clean/")
@@ -16,10 +21,15 @@ os.makedirs(output_path, exist_ok=True)
 df = pd.read_csv(input_path)
 
 # -----------------------
-# 1️⃣ Revisar duplicados
+# 1️⃣ Revisar duplicados (por slot de 15 min y atracción: "11:40" y "11:40:09" son la misma lectura)
 # -----------------------
-duplicados = df.duplicated(subset=['fecha', 'hora', 'atraccion'], keep='first').sum()
-df = df.drop_duplicates(subset=['fecha', 'hora', 'atraccion'], keep='first')
+# Solo lectura de los códigos: una atracción sin código queda con atraccion_id nulo
+# y se distingue por su nombre
+df = slot_keys.add_keys(df, slot_keys.AttractionCodes.shared(os.path.join(ROOT_DIR, slot_keys.ATTRACTION_CODES_FILE)),
+                        add=False)
+clave = slot_keys.KEY_COLS + ["atraccion"]
+duplicados = df.duplicated(subset=clave, keep='first').sum()
+df = df.drop_duplicates(subset=clave, keep='first')
 
 # -----------------------
 # 2️⃣ Revisar valores nulos
@@ -36,7 +46,7 @@ df['codigo_clima'] = df['codigo_clima'].fillna('Desconocido')
 # 3️⃣ Tipos de datos
 # -----------------------
 df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-df['hora'] = pd.to_datetime(df['hora'], format='%H:%M:%S', errors='coerce').dt.hour
+df['hora'] = slot_keys.hora_minutes(df['hora']) // 60
 df['tiempo_espera'] = df['tiempo_espera'].astype(float)
 df['temperatura'] = df['temperatura'].astype(float)
 df['humedad'] = df['humedad'].astype(float)
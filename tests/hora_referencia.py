@@ -0,0 +1,68 @@
+"""Parser de hora antiguo (fila a fila) y casos límite: la referencia de slot_keys.
+
+Lo usan tests/test_slot_keys.py y benchmarks/bench_parse_hora.py. Los datos
+del repositorio solo se leen al llamar a ``valores_de_datos``.
+"""
+import os
+import sys
+import glob
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+
+DATA_DIR = os.path.join(BASE_DIR, "data")
+CASOS_LIMITE = [
+    "11:30", "11:30:45", " 09:05 ", "9:5", "11", "11.5", "11.9:59", "-1:30", "25:00", "11:", ":30",
+    "11:30:", "11::30", "11:30:00000", "11:30abc", "", "  ", "abc", "nan", "inf", "1e1", "1_0",
+    "11 : 30", "11:30.9", "0x10",
+    11, 11.5, -0.5, 0, True, np.int64(14), np.float32(13.75), np.float64(12.25), float("inf"),
+    np.nan, None, pd.NA, pd.NaT, dt.time(10, 15), pd.Timestamp("2025-01-01 16:45"),
+]
+
+
+def parse_hora_fila(hora_str):
+    """Parser antiguo de train_model.py/predict.py, la referencia."""
+    try:
+        if pd.isna(hora_str):
+            return np.nan
+        if isinstance(hora_str, (int, float)):
+            return int(hora_str)
+        s = str(hora_str).strip()
+        if ":" in s:
+            parts = s.split(":")
+            hora = int(float(parts[0]))
+            minuto = int(float(parts[1])) if len(parts) > 1 else 0
+            return hora + minuto / 60.0
+        return int(float(s))
+    except:
+        return np.nan
+
+
+def valores_de_datos(data_dir=DATA_DIR):
+    """Columnas hora de los datos del repositorio: {origen: Series de valores distintos}."""
+    columnas = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "**", "*.csv"), recursive=True)):
+        for modo, kwargs in [("inferido", {}), ("texto", {"dtype": str})]:
+            try:
+                df = pd.read_csv(path, usecols=lambda c: c == "hora", **kwargs)
+            except (ValueError, pd.errors.EmptyDataError):
+                continue
+            if "hora" in df.columns:
+                columnas[f"{os.path.relpath(path, BASE_DIR)} ({modo})"] = df["hora"].drop_duplicates()
+    historia = history_store.read_history(os.path.join(data_dir, "history"), columns=["hora"])
+    if "hora" in historia.columns and len(historia):
+        columnas["histórico particionado"] = historia["hora"].drop_duplicates()
+    return columnas
+
+
+def mismos(esperado, obtenido):
+    """Igualdad elemento a elemento en float64, con NaN igual a NaN."""
+    esperado = np.asarray(esperado, dtype="float64")
+    obtenido = np.asarray(obtenido, dtype="float64")
+    return (esperado == obtenido) | (np.isnan(esperado) & np.isnan(obtenido))
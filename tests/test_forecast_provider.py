@@ -0,0 +1,154 @@
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing.forecast_provider import (ForecastProvider, categoria_clima, synthetic_fetcher,
+                                                      HORIZON_DAYS, MEMO_TTL_S)
+from src.data_preprocessing.weather_store import FORECAST_TTL
+
+HOY = date(2025, 11, 1)
+MANANA = HOY + timedelta(days=1)
+
+
+class Relojes:
+    """Reloj monótono del memo y ``datetime`` del almacén en disco, movidos a mano."""
+
+    def __init__(self):
+        self.monotonic = 0.0
+        self.ahora = datetime(2025, 11, 1, 9, 0)
+
+    def avanzar(self, segundos):
+        self.monotonic += segundos
+        self.ahora += timedelta(seconds=segundos)
+
+
+class Contador:
+    """Fetcher que cuenta las peticiones y puede fallar a demanda."""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.peticiones = []
+        self.falla = False
+
+    def __call__(self, start, end, url=None, lat=None, lon=None):
+        self.peticiones.append((start, end))
+        if self.falla:
+            raise ConnectionError("sin red")
+        return self.fetch(start, end, url=url, lat=lat, lon=lon)
+
+
+@pytest.fixture
+def relojes():
+    return Relojes()
+
+
+def _provider(tmp_path, relojes, fetcher):
+    provider = ForecastProvider(str(tmp_path / "clima.sqlite"), fetcher=fetcher,
+                                today=lambda: HOY, clock=lambda: relojes.monotonic)
+    provider.store.clock = lambda: relojes.ahora
+    return provider
+
+
+@pytest.mark.parametrize("codigo, categoria", [
+    (0, 1), (1, 1), (2, 2), (3, 3), (45, 3), (48, 3),
+    (51, 4), (53, 4), (55, 4), (61, 4), (63, 4), (71, 4), (73, 4), (80, 4), (81, 4), (85, 4),
+    (65, 5), (67, 5), (75, 5), (82, 5), (86, 5), (95, 5), (96, 5), (99, 5),
+    (3.0, 3), ("63", 4),
+])
+def test_categoria_clima(codigo, categoria):
+    assert categoria_clima(codigo) == categoria
+
+
+def test_for_hour_valores_del_fetcher(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher(temperatura=18.5, humedad=70.0, sensacion_termica=17.0, codigo=63))
+    provider = _provider(tmp_path, relojes, fetcher)
+    assert provider.for_hour(MANANA, 14) == {"temperatura": 18.5, "humedad": 70.0,
+                                             "sensacion_termica": 17.0, "codigo_clima": 4}
+    # Una sola petición para todo el horizonte
+    fin = HOY + timedelta(days=HORIZON_DAYS - 1)
+    assert fetcher.peticiones == [(HOY.isoformat(), fin.isoformat())]
+
+
+def test_memo_acierto_sin_tocar_disco_ni_red(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    provider = _provider(tmp_path, relojes, fetcher)
+    provider.for_hour(MANANA, 12)
+    for hora in range(24):
+        provider.for_hour(MANANA, hora)
+    # Otro día del horizonte ya está en el memo
+    provider.for_hour(HOY + timedelta(days=5), 18)
+    assert provider.stats == {"memoria": 25, "disco_o_red": 1}
+    assert len(fetcher.peticiones) == 1
+
+
+def test_memo_caducado_lee_del_disco(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    provider = _provider(tmp_path, relojes, fetcher)
+    provider.for_hour(MANANA, 12)
+    relojes.avanzar(MEMO_TTL_S + 1)
+    assert provider.for_hour(MANANA, 12) is not None
+    # Memo caducado, pero la previsión en disco sigue vigente: sin petición nueva
+    assert provider.stats == {"memoria": 0, "disco_o_red": 2}
+    assert len(fetcher.peticiones) == 1
+
+
+def test_disco_caducado_vuelve_a_pedir(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher(codigo=0))
+    provider = _provider(tmp_path, relojes, fetcher)
+    provider.for_hour(MANANA, 12)
+    relojes.avanzar(FORECAST_TTL.total_seconds() - 60)
+    provider.for_hour(MANANA, 12)
+    assert len(fetcher.peticiones) == 1
+    # Pasado también el memo de la última lectura, la previsión en disco ya ha caducado
+    relojes.avanzar(MEMO_TTL_S + 60)
+    fetcher.fetch = synthetic_fetcher(codigo=95)
+    assert provider.for_hour(MANANA, 12)["codigo_clima"] == 5
+    assert len(fetcher.peticiones) == 2
+
+
+def test_disco_compartido_entre_procesos(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    _provider(tmp_path, relojes, fetcher).for_hour(MANANA, 12)
+    # Un proceso nuevo (memo vacío) encuentra la previsión en disco
+    otro = _provider(tmp_path, relojes, fetcher)
+    assert otro.for_hour(MANANA, 12) is not None
+    assert len(fetcher.peticiones) == 1
+
+
+def test_fallo_sin_copia_devuelve_none(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    fetcher.falla = True
+    provider = _provider(tmp_path, relojes, fetcher)
+    assert provider.for_hour(MANANA, 12) is None
+    assert len(fetcher.peticiones) == 1
+
+
+def test_fallo_con_copia_caducada_usa_la_copia(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher(temperatura=25.0, codigo=2))
+    provider = _provider(tmp_path, relojes, fetcher)
+    provider.for_hour(MANANA, 12)
+    relojes.avanzar(FORECAST_TTL.total_seconds() + 60)
+    fetcher.falla = True
+    prevision = provider.for_hour(MANANA, 12)
+    assert len(fetcher.peticiones) == 2
+    assert prevision == {"temperatura": 25.0, "humedad": 60.0, "sensacion_termica": 22.0, "codigo_clima": 2}
+
+
+def test_fuera_del_horizonte_sin_peticion(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    provider = _provider(tmp_path, relojes, fetcher)
+    assert provider.for_hour(HOY + timedelta(days=HORIZON_DAYS), 12) is None
+    assert fetcher.peticiones == []
+
+
+def test_fecha_pasada_pide_solo_ese_dia(tmp_path, relojes):
+    fetcher = Contador(synthetic_fetcher())
+    provider = _provider(tmp_path, relojes, fetcher)
+    ayer = HOY - timedelta(days=1)
+    assert provider.for_hour(ayer, 20) is not None
+    assert fetcher.peticiones == [(ayer.isoformat(), ayer.isoformat())]
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import history_store
+from src.data_preprocessing.key_index import KeyIndex, KEY_INDEX_FILE
+from src.data_preprocessing.slot_keys import AttractionCodes
+from scripts import add_temporada
+from scripts.combine_queue_times import combine
+
+ATRACCIONES = ["Abismo", "Tornado", "Los Rápidos"]
+
+
+@pytest.fixture(autouse=True)
+def datos(tmp_path, monkeypatch):
+    """Directorio de datos vacío: códigos de atracción, histórico e índice van a tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    AttractionCodes.shared().encode(pd.Series(ATRACCIONES), add=True)
+    return tmp_path
+
+
+def _filas(fecha, horas, atracciones=ATRACCIONES, espera=10):
+    return pd.DataFrame([
+        {"fecha": fecha, "hora": hora, "atraccion": a, "zona": "Zona", "tiempo_espera": espera}
+        for hora in horas for a in atracciones
+    ])
+
+
+def test_indice_nuevo_vacio():
+    index = KeyIndex(KEY_INDEX_FILE)
+    assert index.created
+    assert len(index) == 0
+    assert not KeyIndex(KEY_INDEX_FILE).created
+
+
+def test_rechaza_filas_ya_guardadas():
+    index = KeyIndex(KEY_INDEX_FILE)
+    index.add(_filas("2025-11-01", ["11:00", "11:15"]))
+    lote = _filas("2025-11-01", ["11:15", "11:30"])
+    nuevas, ndup = index.filter_new(lote)
+    assert ndup == 3
+    assert nuevas["hora"].tolist() == ["11:30"] * 3
+    # "11:20" cae en el slot de las 11:15, ya guardado
+    nuevas, ndup = index.filter_new(_filas("2025-11-01", ["11:20"]))
+    assert nuevas.empty and ndup == 3
+
+
+def test_duplicados_del_lote_gana_la_ultima():
+    index = KeyIndex(KEY_INDEX_FILE)
+    lote = pd.concat([_filas("2025-11-01", ["12:00"], espera=5), _filas("2025-11-01", ["12:05"], espera=40)],
+                     ignore_index=True)
+    nuevas, ndup = index.filter_new(lote)
+    assert ndup == 3
+    assert nuevas["tiempo_espera"].tolist() == [40] * 3
+
+
+def test_filter_new_no_toca_el_indice():
+    index = KeyIndex(KEY_INDEX_FILE)
+    lote = _filas("2025-11-01", ["11:00"])
+    for _ in range(2):
+        nuevas, ndup = index.filter_new(lote)
+        assert len(nuevas) == 3 and ndup == 0
+    assert len(index) == 0
+    # Solo add registra las claves
+    index.add(nuevas)
+    assert len(index) == 3
+    assert index.filter_new(lote)[0].empty
+
+
+def test_escritura_fallida_no_registra_claves(monkeypatch):
+    lote = _filas("2025-11-01", ["11:00", "11:15"])
+    nuevas = combine(lote, index=KeyIndex(KEY_INDEX_FILE))
+
+    def falla(df, root=None):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(add_temporada.history_store, "append_rows", falla)
+    with pytest.raises(OSError):
+        add_temporada.save_history(nuevas)
+    # El tick siguiente vuelve a ver las mismas filas como nuevas
+    index = KeyIndex(KEY_INDEX_FILE)
+    assert len(index) == 0
+    assert len(combine(lote, index=index)) == 6
+
+
+def test_rebuild_from_store_por_particiones():
+    root = history_store.HISTORY_DIR
+    history_store.write_partitions(_filas("2025-11-01", ["11:00", "11:15"]), root)
+    history_store.append_rows(_filas("2025-11-02", ["18:00"]), root)
+    history_store.append_rows(_filas("2025-11-02", ["18:15"], atracciones=["Abismo"]), root)
+
+    index = KeyIndex(KEY_INDEX_FILE)
+    index.add(_filas("2025-10-01", ["10:00"]))
+    index.rebuild_from_store(root)
+    # La clave huérfana de octubre desaparece; quedan las de las dos particiones
+    assert len(index) == 6 + 3 + 1
+    assert len(index.filter_new(_filas("2025-10-01", ["10:00"]))[0]) == 3
+    nuevas, ndup = index.filter_new(_filas("2025-11-02", ["18:15"]))
+    assert ndup == 1
+    assert sorted(nuevas["atraccion"]) == ["Los Rápidos", "Tornado"]
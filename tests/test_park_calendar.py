@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from ingestion.park_calendar import ParkCalendar, fixture_fetcher, parse_calendar
+
+# Respuesta sintética con la forma de la API (no grabada): noviembre de 2025,
+# abierto los fines de semana (1-2 de 12:00 a 22:00, el resto de 11:00 a 19:00)
+FIXTURE = os.path.join(BASE_DIR, "benchmarks", "fixtures", "parquesreunidos_calendar_2025-11_synthetic.json")
+CUARTO = timedelta(minutes=15)
+
+
+@pytest.fixture
+def calendario(tmp_path):
+    """Calendario cargado desde la respuesta sintética, sin red ni ficheros del repo."""
+    cal = ParkCalendar(str(tmp_path / "calendario.json"), fetcher=fixture_fetcher(FIXTURE),
+                       today=lambda: date(2025, 11, 1), log=lambda msg: None)
+    assert cal.refresh_if_stale()
+    return cal
+
+
+def _ticks(cal, dia, desde=0, hasta=24):
+    """Instantes del día (cada 15 min entre ``desde`` y ``hasta``) en que se deja pasar el tick."""
+    inicio = datetime.combine(dia, datetime.min.time()) + timedelta(hours=desde)
+    instantes = [inicio + i * CUARTO for i in range((hasta - desde) * 4)]
+    return [t for t in instantes if cal.should_tick(t, tick_every=CUARTO)]
+
+
+def test_parse_calendar_fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        dias = parse_calendar(json.load(f))
+    assert len(dias) == 30
+    assert dias["2025-11-01"] == {"abierto": True, "apertura": "12:00", "cierre": "22:00"}
+    assert dias["2025-11-08"] == {"abierto": True, "apertura": "11:00", "cierre": "19:00"}
+    assert dias["2025-11-03"] == {"abierto": False, "apertura": None, "cierre": None}
+    assert sum(d["abierto"] for d in dias.values()) == 8
+
+
+@pytest.mark.parametrize("payload, esperado", [
+    # Lista en la raíz, horario en la propia entrada
+    ([{"date": "2025-12-01", "isOpen": True, "openingTime": "10:00:00", "closingTime": "18:30:00"}],
+     {"abierto": True, "apertura": "10:00", "cierre": "18:30"}),
+    # Bajo "days", con "status" y horario "HH:MM-HH:MM"
+    ({"days": [{"day": "2025-12-01T00:00:00", "status": "OPEN", "openingHours": "11:00-20:00"}]},
+     {"abierto": True, "apertura": "11:00", "cierre": "20:00"}),
+    ({"data": [{"date": "2025-12-01", "status": "cerrado"}]},
+     {"abierto": False, "apertura": None, "cierre": None}),
+    # Sin ningún campo de estado conocido: desconocido
+    ({"calendar": [{"date": "2025-12-01", "estado": "?"}]},
+     {"abierto": None, "apertura": None, "cierre": None}),
+])
+def test_parse_calendar_formatos(payload, esperado):
+    assert parse_calendar(payload) == {"2025-12-01": esperado}
+
+
+def test_parse_calendar_descarta_entradas_sin_fecha():
+    assert parse_calendar({"calendar": [{"available": True}]}) == {}
+    assert parse_calendar({"otra_cosa": []}) == {}
+
+
+def test_dia_sin_calendario_cuenta_como_abierto(calendario):
+    # Fuera del horizonte descargado
+    cuando = datetime(2025, 12, 25, 3, 0)
+    assert calendario.is_open(cuando) is None
+    assert calendario.should_tick(cuando)
+    assert len(_ticks(calendario, cuando.date())) == 24 * 4
+
+
+def test_dia_con_estado_desconocido_cuenta_como_abierto(tmp_path):
+    cal = ParkCalendar(str(tmp_path / "calendario.json"),
+                       fetcher=lambda start, end: {"calendar": [{"date": "2025-11-03", "estado": "?"}]},
+                       today=lambda: date(2025, 11, 1), log=lambda msg: None)
+    cal.refresh_if_stale()
+    assert cal.is_open(datetime(2025, 11, 3, 4, 0)) is None
+    assert len(_ticks(cal, date(2025, 11, 3))) == 24 * 4
+
+
+def test_dia_cerrado_no_deja_pasar_ticks(calendario):
+    assert calendario.is_open(datetime(2025, 11, 5, 12, 0)) is False
+    assert _ticks(calendario, date(2025, 11, 5)) == []
+
+
+def test_dentro_del_horario_y_el_margen_siempre(calendario):
+    # 11:00-19:00 con 30 minutos de margen: de 10:30 a 19:30
+    dia = date(2025, 11, 8)
+    assert calendario.is_open(datetime(2025, 11, 8, 10, 30)) is True
+    assert calendario.is_open(datetime(2025, 11, 8, 19, 30)) is True
+    assert calendario.is_open(datetime(2025, 11, 8, 19, 45)) is False
+    pasan = _ticks(calendario, dia, 10, 20)
+    assert [t.strftime("%H:%M") for t in pasan[:2]] == ["10:00", "10:30"]
+    assert all(t in pasan for t in [datetime(2025, 11, 8, 10, 30) + i * CUARTO for i in range(37)])
+
+
+def test_fuera_de_horario_un_tick_por_hora(calendario):
+    dia = date(2025, 11, 8)
+    # Antes de abrir (00:00-10:30): solo el tick en punto de cada hora
+    madrugada = _ticks(calendario, dia, 0, 10)
+    assert [t.minute for t in madrugada] == [0] * 10
+    assert [t.hour for t in madrugada] == list(range(10))
+    # Después de cerrar (19:30-24:00): 20:00, 21:00, 22:00 y 23:00
+    noche = [t for t in _ticks(calendario, dia, 19, 24) if t > datetime(2025, 11, 8, 19, 30)]
+    assert [t.strftime("%H:%M") for t in noche] == ["20:00", "21:00", "22:00", "23:00"]
+
+
+def test_tick_por_franja_configurable(calendario):
+    cuando = datetime(2025, 11, 8, 2, 0)
+    assert calendario.should_tick(cuando, closed_every=timedelta(hours=2), tick_every=CUARTO)
+    assert not calendario.should_tick(cuando + timedelta(hours=1), closed_every=timedelta(hours=2),
+                                      tick_every=CUARTO)
+    # Con el scheduler a 5 minutos pasa el tick de las 03:00 pero no el de las 03:05
+    assert calendario.should_tick(datetime(2025, 11, 8, 3, 0), tick_every=timedelta(minutes=5))
+    assert not calendario.should_tick(datetime(2025, 11, 8, 3, 5), tick_every=timedelta(minutes=5))
+
+
+def test_refresco_una_vez_al_dia_y_copia_en_disco(tmp_path):
+    llamadas = []
+    hoy = {"valor": date(2025, 11, 1)}
+
+    def fetcher(start, end):
+        llamadas.append(start)
+        if len(llamadas) > 1:
+            raise ConnectionError("sin red")
+        return fixture_fetcher(FIXTURE)(start, end)
+
+    path = str(tmp_path / "calendario.json")
+    cal = ParkCalendar(path, fetcher=fetcher, today=lambda: hoy["valor"], log=lambda msg: None)
+    assert cal.refresh_if_stale()
+    assert not cal.refresh_if_stale()
+    assert llamadas == [date(2025, 11, 1)]
+
+    # Al día siguiente el refresco falla: se sigue usando la copia guardada
+    hoy["valor"] = date(2025, 11, 2)
+    assert not cal.refresh_if_stale()
+    assert not cal.refresh_if_stale()
+    assert len(llamadas) == 2
+    assert cal.is_open(datetime(2025, 11, 5, 12, 0)) is False
+
+    # Otro proceso arranca con la copia de disco
+    otro = ParkCalendar(path, fetcher=fetcher, today=lambda: date(2025, 11, 1), log=lambda msg: None)
+    assert otro.actualizado == "2025-11-01"
+    assert otro.dias == cal.dias
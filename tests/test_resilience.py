@@ -0,0 +1,232 @@
+import os
+import sys
+import threading
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from ingestion import resilience
+from ingestion.resilience import CircuitBreaker, TickScheduler, backoff_delay
+
+
+class Reloj:
+    """Reloj manual para CircuitBreaker y TickScheduler."""
+
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+# ---------------- backoff_delay ----------------
+
+@pytest.mark.parametrize("attempt, techo", [(0, 1.0), (1, 2.0), (3, 8.0), (5, 30.0), (20, 30.0)])
+def test_backoff_delay_limite_superior(monkeypatch, attempt, techo):
+    # Con el jitter al máximo la espera es base * 2^attempt, acotada por el techo
+    monkeypatch.setattr(resilience.random, "uniform", lambda a, b: b)
+    assert backoff_delay(attempt) == techo
+    monkeypatch.setattr(resilience.random, "uniform", lambda a, b: a)
+    assert backoff_delay(attempt) == 0
+
+
+def test_backoff_delay_dentro_de_rango():
+    resilience.random.seed(0)
+    for attempt in range(8):
+        techo = min(4.0, 0.5 * 2 ** attempt)
+        esperas = [backoff_delay(attempt, base_s=0.5, cap_s=4.0) for _ in range(200)]
+        assert all(0 <= e <= techo for e in esperas)
+        # Full jitter: las esperas se reparten por todo el rango
+        assert max(esperas) > techo / 2
+
+
+# ---------------- CircuitBreaker ----------------
+
+def _abrir(breaker, n):
+    for _ in range(n):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_breaker_se_abre_tras_el_umbral():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    _abrir(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    reloj.t = 9.9
+    assert not breaker.allow()
+
+
+def test_breaker_exito_reinicia_los_fallos():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_s=10, clock=Reloj())
+    _abrir(breaker, 2)
+    breaker.record_success()
+    _abrir(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_semiabierto_una_sola_prueba():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 2)
+    reloj.t = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Con la prueba en curso, el resto se rechaza
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_release_libera_la_prueba():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 1)
+    reloj.t = 10
+    assert breaker.allow()
+    # Prueba cancelada: ni éxito ni fallo, se permite otra
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_prueba_fallida_vuelve_a_abrir():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 3)
+    reloj.t = 15
+    assert breaker.allow()
+    breaker.record_failure()
+    # Un solo fallo en semiabierto basta, y el plazo cuenta desde ahora
+    assert breaker.state == CircuitBreaker.OPEN
+    reloj.t = 24
+    assert not breaker.allow()
+    reloj.t = 25
+    assert breaker.allow()
+
+
+def test_breaker_prueba_correcta_cierra():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 2)
+    reloj.t = 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert all(breaker.allow() for _ in range(5))
+
+
+def test_breaker_una_prueba_entre_hilos():
+    reloj = Reloj()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=10, clock=reloj)
+    _abrir(breaker, 1)
+    reloj.t = 10
+    barrera = threading.Barrier(8)
+    permitidas = []
+
+    def intentar():
+        barrera.wait()
+        permitidas.append(breaker.allow())
+
+    hilos = [threading.Thread(target=intentar) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert sum(permitidas) == 1
+
+
+# ---------------- TickScheduler ----------------
+
+def _scheduler(tick, **kwargs):
+    return TickScheduler(10, tick, log=lambda msg: None, **kwargs)
+
+
+def test_scheduler_omite_si_el_anterior_sigue_en_curso():
+    soltar, empezado = threading.Event(), threading.Event()
+
+    def lento():
+        empezado.set()
+        soltar.wait(5)
+
+    reloj = Reloj()
+    scheduler = _scheduler(lento, clock=reloj)
+    assert scheduler.trigger(0)
+    empezado.wait(5)
+    assert not scheduler.trigger(10)
+    assert not scheduler.trigger(20)
+    soltar.set()
+    scheduler.join(5)
+    assert scheduler.stats == {"ejecutados": 1, "omitidos": 2, "tardios": 0, "fallidos": 0, "suprimidos": 0}
+    # Terminado el lento, el siguiente entra
+    assert scheduler.trigger(30)
+    scheduler.join(5)
+    assert scheduler.stats["ejecutados"] == 2
+
+
+def test_scheduler_cuenta_los_tardios():
+    reloj = Reloj(100)
+    scheduler = _scheduler(lambda: None, clock=reloj, late_tolerance_s=60)
+    assert scheduler.trigger(50)
+    scheduler.join(5)
+    assert scheduler.trigger(30)
+    scheduler.join(5)
+    assert scheduler.stats["tardios"] == 1
+    assert scheduler.stats["ejecutados"] == 2
+
+
+def test_scheduler_tick_fallido_libera_el_siguiente():
+    llamadas = []
+
+    def falla():
+        llamadas.append(1)
+        raise RuntimeError("upstream caído")
+
+    scheduler = _scheduler(falla, clock=Reloj())
+    for slot in (0, 10, 20):
+        assert scheduler.trigger(slot)
+        scheduler.join(5)
+    assert len(llamadas) == 3
+    assert scheduler.stats["fallidos"] == 3
+    assert scheduler.stats["ejecutados"] == 0
+
+
+def test_scheduler_gate_suprime_sin_llamar_al_tick():
+    llamadas = []
+    abierto = {"valor": False}
+    scheduler = _scheduler(lambda: llamadas.append(1), clock=Reloj(), gate=lambda: abierto["valor"])
+    assert not scheduler.trigger(0)
+    assert not scheduler.trigger(10)
+    abierto["valor"] = True
+    assert scheduler.trigger(20)
+    scheduler.join(5)
+    assert llamadas == [1]
+    assert scheduler.stats["suprimidos"] == 2
+    assert scheduler.stats["omitidos"] == 0
+
+
+def test_run_forever_cuenta_las_horas_perdidas(monkeypatch):
+    reloj = Reloj()
+    lanzados = []
+    scheduler = _scheduler(lambda: lanzados.append(reloj.t), clock=reloj)
+    saltos = [45]
+
+    def dormir(segundos):
+        # Cada tick termina antes de avanzar el reloj; el primero simula una suspensión
+        scheduler.join(5)
+        reloj.t += saltos.pop() if saltos else segundos
+
+    monkeypatch.setattr(resilience.time, "sleep", dormir)
+    scheduler.run_forever(poll_s=10, max_slots=6)
+    scheduler.join(5)
+    # Tick a 0, suspensión hasta 45 (10, 20 y 30 perdidos), tick de 40 a las 45 y tick a 50
+    assert lanzados == [0, 45, 50]
+    assert scheduler.stats["omitidos"] == 3
+    assert scheduler.stats["ejecutados"] == 3
+    assert scheduler.stats["tardios"] == 0
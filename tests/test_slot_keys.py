@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from src.data_preprocessing import slot_keys
+from tests.hora_referencia import CASOS_LIMITE, parse_hora_fila, valores_de_datos, mismos
+
+
+@pytest.fixture(scope="module")
+def columnas_hora():
+    """Columnas hora de los CSV de data/ (inferidas y como texto) y del histórico, si existe."""
+    return valores_de_datos()
+
+
+def _comprobar_como_parser_antiguo(valores, origen="casos límite"):
+    esperado = valores.apply(parse_hora_fila) if len(valores) else pd.Series(dtype="float64")
+    obtenido = slot_keys.hora_decimal(valores)
+    ok = mismos(esperado, obtenido)
+    assert ok.all(), f"{origen}: distintos para {valores[~ok].head(10).tolist()}"
+    ok = mismos(esperado, [slot_keys.parse_hora(v) for v in valores])
+    assert ok.all(), f"{origen}: parse_hora distinto para {valores[~ok].head(10).tolist()}"
+
+
+def test_hora_decimal_datos_como_parser_antiguo(columnas_hora):
+    for origen, valores in sorted(columnas_hora.items()):
+        _comprobar_como_parser_antiguo(valores, origen)
+
+
+def test_hora_decimal_casos_limite_como_parser_antiguo():
+    _comprobar_como_parser_antiguo(pd.Series(CASOS_LIMITE, dtype="object"))
+
+
+@pytest.mark.parametrize("valor, minutos", [
+    ("11:40", 700), ("11:40:09", 700), (" 09:05 ", 545), ("9:5", 545), ("11", 660),
+    ("11.5", 690), (11.5, 690), (np.int64(14), 840), ("11:", np.nan), ("abc", np.nan),
+    ("inf", np.nan), ("", np.nan), (None, np.nan), (pd.NA, np.nan),
+])
+def test_hora_minutes(valor, minutos):
+    obtenido = slot_keys.hora_minutes(pd.Series([valor], dtype="object")).iloc[0]
+    assert mismos([minutos], [obtenido]).all()
+
+
+def test_hora_minutes_misma_hora_que_hora_decimal(columnas_hora):
+    # Con minutos enteros, las horas completas coinciden entre los dos formatos
+    for origen, valores in sorted(columnas_hora.items()):
+        horas = np.floor(slot_keys.hora_minutes(valores) / 60)
+        assert mismos(np.floor(slot_keys.hora_decimal(valores)), horas).all(), origen
+
+
+def test_hora_minutes_columna_numerica():
+    valores = pd.Series([11, 11.5, np.nan])
+    assert mismos(slot_keys.hora_minutes(valores), [660, 690, np.nan]).all()
+    assert slot_keys.hora_minutes(pd.Series([], dtype="object")).empty
+
+
+def test_slot_ids_mismo_slot_dentro_de_15_minutos():
+    fecha = ["2025-10-16"] * 5 + ["no es fecha"]
+    hora = ["11:40", "11:40:09", "11:44", "11:45", "abc", "11:40"]
+    slots = slot_keys.slot_ids(pd.Series(fecha), pd.Series(hora))
+    assert slots.iloc[0] == slots.iloc[1] == slots.iloc[2]
+    assert slots.iloc[3] == slots.iloc[0] + slot_keys.SLOT_MINUTES
+    assert slots.iloc[4:].isna().all()
+    assert slot_keys.slot_to_timestamp(slots.iloc[:1]).iloc[0] == pd.Timestamp("2025-10-16 11:30")
@@ -17,6 +17,16 @@ import warnings
 from datetime import datetime, timedelta
 warnings.filterwarnings('ignore')
 
+from src.data_preprocessing.history_store import read_history, HISTORY_DIR
+from src.data_preprocessing import compact_schema, holiday_calendar, trend_features
+from src.data_preprocessing.slot_keys import hora_decimal, parse_hora
+from src.data_preprocessing.slot_cube import SlotCube, CUBE_DIR
+
+# Los datos se leen siempre respecto a la raíz del repositorio
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BASE_DIR, HISTORY_DIR)
+CUBE_PATH = os.path.join(BASE_DIR, CUBE_DIR)
+
 os.makedirs("models", exist_ok=True)
 
 # -------------------------
@@ -26,7 +36,12 @@ print("=" * 70)
 print("🔍 CARGA Y ANÁLISIS INICIAL DEL DATASET")
 print("=" * 70)
 
-df = pd.read_csv("../data/clean/tiempos_final.csv")
+# Histórico particionado por fecha, con el esquema compacto (category, int8, int16, float32).
+# tiempos_final.csv ya no se actualiza: se importa una vez con history_store.py --import
+df = read_history(HISTORY_PATH)
+if df.empty:
+    raise SystemExit(f"❌ Histórico vacío en {HISTORY_PATH}: ejecuta el pipeline de ingesta o "
+                     "python src/data_preprocessing/history_store.py --import data/clean/tiempos_final.csv")
 print(f"Shape original: {df.shape}")
 print(f"Columnas: {df.columns.tolist()}")
 print(f"\nValores nulos:\n{df.isnull().sum()}")
@@ -50,24 +65,8 @@ print("=" * 70)
 
 df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce")
 
-# Función mejorada para parsear hora
-def parse_hora(hora_str):
-    try:
-        if pd.isna(hora_str):
-            return np.nan
-        if isinstance(hora_str, (int, float)):
-            return int(hora_str)
-        s = str(hora_str).strip()
-        if ":" in s:
-            parts = s.split(":")
-            hora = int(float(parts[0]))
-            minuto = int(float(parts[1])) if len(parts) > 1 else 0
-            return hora + minuto / 60.0
-        return int(float(s))
-    except:
-        return np.nan
-
-df["hora"] = df["hora"].apply(parse_hora)
+# Hora en horas decimales ("11:30" → 11.5) sobre los valores distintos, sin recorrer filas
+df["hora"] = hora_decimal(df["hora"])
 df["hora"] = df["hora"].fillna(df["hora"].median())
 
 # Features temporales COMPLETAS
@@ -93,20 +92,19 @@ df["es_dia_laborable"] = df["dia_semana_num"].isin([0, 1, 2, 3, 4]).astype(int)
 for mes_num in range(1, 13):
     df[f"es_mes_{mes_num}"] = (df["mes"] == mes_num).astype(int)
 
-# Temporada mejorada
-def get_temporada(mes):
-    if mes in [7, 8]:  # Verano
-        return 3  # Muy Alta
-    elif mes in [10]:  # Halloween
-        return 3  # Muy Alta
-    elif mes in [4, 5, 6, 12]:  # Primavera, Navidad
-        return 2  # Alta
-    elif mes in [3, 9, 11]:  # Media
-        return 1  # Media
-    else:
-        return 0  # Baja
+# Calendario: temporada (0 baja → 3 muy alta), festivos nacionales y de
+# Madrid (incluida Semana Santa), puentes y vacaciones escolares. Una
+# unión por fecha con la tabla precalculada, sin recorrer filas
+df = holiday_calendar.attach(df)
 
-df["temporada"] = df["mes"].apply(get_temporada)
+# Tendencia reciente de cada atracción (esperas de 15/30/60 min antes, medias y
+# máximos móviles, pendiente y minutos desde la apertura) sobre la rejilla del
+# cubo; las mismas funciones las usa predict.py en vivo. NaN sin lecturas previas
+# de la atracción ese mismo día, como al predecir una fecha futura
+cube = SlotCube(CUBE_PATH)
+if cube.created:
+    cube.rebuild_from_store(HISTORY_PATH)
+df = trend_features.attach(df, cube)
 
 # Features cíclicas mejoradas (más granularidad)
 df["hora_sin"] = np.sin(2 * np.pi * df["hora"] / 24)
@@ -147,53 +145,6 @@ df["es_hora_valle_manana"] = (df["hora_int"] < 14)& (df["hora_int"] < 15).astype
 df["es_hora_valle_tarde"] = (df["hora_int"] > 18).astype(int)  # Después de 18:00
 df["es_hora_valle"] = (df["es_hora_valle_manana"] | df["es_hora_valle_tarde"]).astype(int)
 
-# Features de PUENTES/FESTIVOS (España)
-def es_festivo_espana(fecha):
-    """Detecta festivos en España"""
-    mes = fecha.month
-    dia = fecha.day
-    
-    # Festivos fijos
-    if mes == 1 and dia == 1:  # Año Nuevo
-        return 1
-    if mes == 1 and dia == 6:  # Reyes
-        return 1
-    if mes == 5 and dia == 1:  # Día del Trabajo
-        return 1
-    if mes == 10 and dia == 12:  # Día de la Hispanidad
-        return 1
-    if mes == 11 and dia == 1:  # Todos los Santos
-        return 1
-    if mes == 12 and dia == 6:  # Constitución
-        return 1
-    if mes == 12 and dia == 8:  # Inmaculada
-        return 1
-    if mes == 12 and dia == 25:  # Navidad
-        return 1
-    return 0
-
-def es_puente(fecha):
-    """Detecta si un día es parte de un puente (festivo + fin de semana cercano)"""
-    if es_festivo_espana(fecha):
-        return 1
-    
-    # Verificar si el día anterior o siguiente es festivo
-    dia_anterior = fecha - pd.Timedelta(days=1)
-    dia_siguiente = fecha + pd.Timedelta(days=1)
-    
-    # Si es viernes y el lunes siguiente es festivo, o si es lunes y el viernes anterior es festivo
-    if fecha.weekday() == 4 and es_festivo_espana(dia_siguiente):  # Viernes antes de festivo
-        return 1
-    if fecha.weekday() == 0 and es_festivo_espana(dia_anterior):  # Lunes después de festivo
-        return 1
-    if fecha.weekday() == 6 and es_festivo_espana(dia_anterior):  # Domingo después de festivo (sábado)
-        return 1
-    
-    return 0
-
-df["es_festivo"] = df["fecha"].apply(es_festivo_espana)
-df["es_puente"] = df["fecha"].apply(es_puente)
-
 # Interacciones con hora y puentes
 df["hora_apertura_fin_semana"] = df["es_hora_apertura"] * df["es_fin_de_semana"]
 df["hora_pico_puente"] = df["es_hora_pico"] * df["es_puente"]
@@ -207,7 +158,7 @@ print("📊 CREANDO FEATURES HISTÓRICAS GRANULARES")
 print("=" * 70)
 
 # Histórico por mes
-hist_mes = df.groupby(["atraccion", "mes"])["tiempo_espera"].agg(
+hist_mes = df.groupby(["atraccion", "mes"], observed=True)["tiempo_espera"].agg(
     count_mes="count",
     mean_mes="mean",
     median_mes="median",
@@ -218,7 +169,7 @@ hist_mes = df.groupby(["atraccion", "mes"])["tiempo_espera"].agg(
 ).reset_index()
 
 # Histórico por hora (usar hora_int para mejor agrupación)
-hist_hora = df.groupby(["atraccion", "hora_int"])["tiempo_espera"].agg(
+hist_hora = df.groupby(["atraccion", "hora_int"], observed=True)["tiempo_espera"].agg(
     count_hora="count",
     mean_hora="mean",
     median_hora="median",
@@ -229,7 +180,7 @@ hist_hora = df.groupby(["atraccion", "hora_int"])["tiempo_espera"].agg(
 hist_hora = hist_hora.rename(columns={"hora_int": "hora"})  # Renombrar para compatibilidad
 
 # Histórico por día de semana (CRÍTICO para diferenciar sábado/domingo)
-hist_dia_semana = df.groupby(["atraccion", "dia_semana_num"])["tiempo_espera"].agg(
+hist_dia_semana = df.groupby(["atraccion", "dia_semana_num"], observed=True)["tiempo_espera"].agg(
     count_dia="count",
     mean_dia="mean",
     median_dia="median",
@@ -239,7 +190,7 @@ hist_dia_semana = df.groupby(["atraccion", "dia_semana_num"])["tiempo_espera"].a
 ).reset_index()
 
 # Histórico por mes Y día de semana (MUY IMPORTANTE)
-hist_mes_dia = df.groupby(["atraccion", "mes", "dia_semana_num"])["tiempo_espera"].agg(
+hist_mes_dia = df.groupby(["atraccion", "mes", "dia_semana_num"], observed=True)["tiempo_espera"].agg(
     count_mes_dia="count",
     mean_mes_dia="mean",
     median_mes_dia="median",
@@ -248,7 +199,7 @@ hist_mes_dia = df.groupby(["atraccion", "mes", "dia_semana_num"])["tiempo_espera
 ).reset_index()
 
 # Histórico por hora Y día de semana
-hist_hora_dia = df.groupby(["atraccion", "hora_int", "dia_semana_num"])["tiempo_espera"].agg(
+hist_hora_dia = df.groupby(["atraccion", "hora_int", "dia_semana_num"], observed=True)["tiempo_espera"].agg(
     count_hora_dia="count",
     mean_hora_dia="mean",
     median_hora_dia="median",
@@ -257,7 +208,7 @@ hist_hora_dia = df.groupby(["atraccion", "hora_int", "dia_semana_num"])["tiempo_
 hist_hora_dia = hist_hora_dia.rename(columns={"hora_int": "hora"})  # Renombrar para compatibilidad
 
 # Histórico por mes Y hora
-hist_mes_hora = df.groupby(["atraccion", "mes", "hora_int"])["tiempo_espera"].agg(
+hist_mes_hora = df.groupby(["atraccion", "mes", "hora_int"], observed=True)["tiempo_espera"].agg(
     count_mes_hora="count",
     mean_mes_hora="mean",
     median_mes_hora="median",
@@ -311,7 +262,10 @@ df["is_noviembre"] = (df["mes"] == 11).astype(int)
 df["is_octubre_fin_semana"] = ((df["mes"] == 10) & (df["es_fin_de_semana"] == 1)).astype(int)
 df["is_noviembre_fin_semana"] = ((df["mes"] == 11) & (df["es_fin_de_semana"] == 1)).astype(int)
 
-print(f"Features creadas: {len(df.columns)} columnas")
+# Decenas de indicadores 0/1 e interacciones: int8/float32 en lugar de int64/float64
+memoria_antes = compact_schema.memory_mb(df)
+df = compact_schema.compact(df)
+print(f"Features creadas: {len(df.columns)} columnas ({memoria_antes:.1f} MB → {compact_schema.memory_mb(df):.1f} MB)")
 
 # -------------------------
 # 4) PREPARACIÓN DE DATOS PARA MODELO
@@ -353,7 +307,7 @@ def target_encoding_improved(X_tr, X_te, y_tr, cols):
         if col in X_tr.columns:
             # Target encoding con smoothing
             mean_target = y_tr.mean()
-            stats = y_tr.groupby(X_tr[col]).agg(['mean', 'count']).reset_index()
+            stats = y_tr.groupby(X_tr[col], observed=True).agg(['mean', 'count']).reset_index()
             stats.columns = [col, 'mean', 'count']
             
             # Smoothing: más peso a la media global cuando hay pocos ejemplos
@@ -363,13 +317,14 @@ def target_encoding_improved(X_tr, X_te, y_tr, cols):
             map_enc = dict(zip(stats[col], stats['encoded']))
             encoding_maps[col] = map_enc
             
-            X_tr_enc[f"{col}_enc"] = X_tr[col].map(map_enc).fillna(mean_target)
-            X_te_enc[f"{col}_enc"] = X_te[col].map(map_enc).fillna(mean_target)
+            # astype: con columnas category, map devuelve otra category y fillna no admitiría valores nuevos
+            X_tr_enc[f"{col}_enc"] = X_tr[col].map(map_enc).astype("float32").fillna(mean_target)
+            X_te_enc[f"{col}_enc"] = X_te[col].map(map_enc).astype("float32").fillna(mean_target)
             
             # También crear frecuencia encoding
             freq_map = X_tr[col].value_counts().to_dict()
-            X_tr_enc[f"{col}_freq"] = X_tr[col].map(freq_map).fillna(0)
-            X_te_enc[f"{col}_freq"] = X_te[col].map(freq_map).fillna(0)
+            X_tr_enc[f"{col}_freq"] = X_tr[col].map(freq_map).astype("float32").fillna(0)
+            X_te_enc[f"{col}_freq"] = X_te[col].map(freq_map).astype("float32").fillna(0)
             
             # Eliminar columna original
             X_tr_enc = X_tr_enc.drop(columns=[col])
@@ -382,7 +337,7 @@ X_train_enc, X_test_enc, encoding_maps = target_encoding_improved(
 )
 
 # Asegurar que no queden columnas object
-non_numeric = X_train_enc.select_dtypes(include=['object']).columns.tolist()
+non_numeric = X_train_enc.select_dtypes(include=['object', 'category']).columns.tolist()
 if non_numeric:
     print(f"Eliminando columnas no numéricas: {non_numeric}")
     X_train_enc = X_train_enc.drop(columns=non_numeric)
@@ -524,8 +479,9 @@ def prepare_input_for_prediction(input_dict, df_train, scaler, encoding_maps, co
     # Meses
     es_mes_dict = {i: 1 if mes == i else 0 for i in range(1, 13)}
     
-    # Temporada
-    temporada = get_temporada(mes)
+    # Calendario: temporada, festivo, puente y vacaciones escolares
+    calendario = holiday_calendar.day_flags(fecha)
+    temporada = calendario["temporada"]
     
     # Features cíclicas
     hora_sin = np.sin(2 * np.pi * hora / 24)
@@ -626,34 +582,9 @@ def prepare_input_for_prediction(input_dict, df_train, scaler, encoding_maps, co
     es_hora_valle = 1 if (es_hora_valle_manana or es_hora_valle_tarde) else 0
     
     # Features de PUENTES/FESTIVOS
-    def es_festivo_espana(fecha):
-        mes = fecha.month
-        dia = fecha.day
-        if mes == 1 and dia == 1: return 1
-        if mes == 1 and dia == 6: return 1
-        if mes == 5 and dia == 1: return 1
-        if mes == 10 and dia == 12: return 1
-        if mes == 11 and dia == 1: return 1
-        if mes == 12 and dia == 6: return 1
-        if mes == 12 and dia == 8: return 1
-        if mes == 12 and dia == 25: return 1
-        return 0
-    
-    def es_puente(fecha):
-        if es_festivo_espana(fecha):
-            return 1
-        dia_anterior = fecha - pd.Timedelta(days=1)
-        dia_siguiente = fecha + pd.Timedelta(days=1)
-        if fecha.weekday() == 4 and es_festivo_espana(dia_siguiente):
-            return 1
-        if fecha.weekday() == 0 and es_festivo_espana(dia_anterior):
-            return 1
-        if fecha.weekday() == 6 and es_festivo_espana(dia_anterior):
-            return 1
-        return 0
-    
-    es_festivo = es_festivo_espana(fecha)
-    es_puente_val = es_puente(fecha)
+    es_festivo = calendario["es_festivo"]
+    es_puente_val = calendario["es_puente"]
+    es_vacaciones_escolares = calendario["es_vacaciones_escolares"]
     
     # Interacciones con hora y puentes
     hora_apertura_fin_semana = es_hora_apertura * es_fin_de_semana
@@ -750,6 +681,7 @@ def prepare_input_for_prediction(input_dict, df_train, scaler, encoding_maps, co
         "es_hora_valle": es_hora_valle,
         "es_festivo": es_festivo,
         "es_puente": es_puente_val,
+        "es_vacaciones_escolares": es_vacaciones_escolares,
         "hora_apertura_fin_semana": hora_apertura_fin_semana,
         "hora_pico_puente": hora_pico_puente,
         "puente_fin_semana": puente_fin_semana,
@@ -757,6 +689,9 @@ def prepare_input_for_prediction(input_dict, df_train, scaler, encoding_maps, co
         "atraccion_enc": atraccion_enc,
     }
     
+    # Tendencia reciente de la atracción desde el cubo (NaN sin lecturas previas ese día)
+    feature_dict.update(trend_features.features_at(fecha.normalize() + pd.Timedelta(hours=hora), atraccion, cube))
+    
     # Añadir frecuencias si existen
     if "zona_freq" in columnas_entrenamiento:
         zona_freq_map = df_train["zona"].value_counts().to_dict() if "zona" in df_train.columns else {}
@@ -886,33 +821,7 @@ def predict_wait_realista(input_dict):
     es_hora_valle = (hora_int < 10 or hora_int > 18)
     
     # Detectar puente/festivo
-    def es_festivo_espana(fecha):
-        mes = fecha.month
-        dia = fecha.day
-        if mes == 1 and dia == 1: return 1
-        if mes == 1 and dia == 6: return 1
-        if mes == 5 and dia == 1: return 1
-        if mes == 10 and dia == 12: return 1
-        if mes == 11 and dia == 1: return 1
-        if mes == 12 and dia == 6: return 1
-        if mes == 12 and dia == 8: return 1
-        if mes == 12 and dia == 25: return 1
-        return 0
-    
-    def es_puente(fecha):
-        if es_festivo_espana(fecha):
-            return 1
-        dia_anterior = fecha - pd.Timedelta(days=1)
-        dia_siguiente = fecha + pd.Timedelta(days=1)
-        if fecha.weekday() == 4 and es_festivo_espana(dia_siguiente):
-            return 1
-        if fecha.weekday() == 0 and es_festivo_espana(dia_anterior):
-            return 1
-        if fecha.weekday() == 6 and es_festivo_espana(dia_anterior):
-            return 1
-        return 0
-    
-    es_puente_val = es_puente(fecha)
+    es_puente_val = holiday_calendar.day_flags(fecha)["es_puente"]
     
     # PRIORIZAR históricos por hora - si tenemos datos específicos por hora, usarlos directamente
     # Si tenemos histórico por hora específica, usarlo como base principal
@@ -1204,7 +1113,7 @@ joblib.dump(hist_dia_semana, "models/hist_dia_semana.pkl")
 joblib.dump(hist_mes_dia, "models/hist_mes_dia.pkl")
 joblib.dump(hist_hora_dia, "models/hist_hora_dia.pkl")
 joblib.dump(hist_mes_hora, "models/hist_mes_hora.pkl")
-joblib.dump(df, "models/df_processed.pkl")  
+joblib.dump(compact_schema.compact(df), "models/df_processed.pkl")
 
 print("✅ Todos los artefactos guardados correctamente")
 